@@ -0,0 +1,50 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Hızlı açılış profili (klinik bilgisayarları için önerilen):
+#   pyinstaller Mikrobiyoloji_onedir.spec  ->  dist/Mikrobiyoloji/Mikrobiyoloji.exe (klasörüyle dağıtılır)
+# - onedir: onefile'ın her açılışta tüm paketi geçici klasöre açma adımı yoktur
+# - optimize=2: modüller önceden derlenmiş, docstring/assert'siz .pyc olarak gömülür
+# - upx=False: DLL'ler açılışta sıkıştırmadan çözülmez (antivirüs taraması da kısalır)
+# Açılış süresi: ENFEKSIYON_ZAMANLAMA=acilis.log ortam değişkeniyle ölçülür (acilis.py).
+
+
+a = Analysis(
+    ['enfeksiyon.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['tkinter', 'pydoc_data'],
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='Mikrobiyoloji',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='Mikrobiyoloji',
+)
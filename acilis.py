@@ -0,0 +1,96 @@
+"""Açılış süresi ölçümü.
+
+ENFEKSIYON_ZAMANLAMA=1 ile açılışta aşama süreleri stderr'e ve durum çubuğuna yazılır;
+değer bir dosya yoluysa (ENFEKSIYON_ZAMANLAMA=acilis.log) satır o dosyaya da eklenir
+(konsolsuz exe için). Aşamalar:
+  yorumlayıcı   süreç oluşturulmasından enfeksiyon.py'nin ilk satırına (exe'de önyükleyici dahil)
+  içe aktarma   enfeksiyon.py'nin modül yüklemeleri
+  veritabanı    veritabani_olustur (göçler, ilk açılışta şema)
+  pencere       QApplication + AnaPencere kurulumu (ilk hasta sayfası dahil)
+  ilk çizim     show()'dan ana pencerenin ekrana ilk çizilmesine
+PyInstaller onefile'da paketin geçici klasöre açılması ayrı (üst) süreçte yapıldığından
+'yorumlayıcı' süresine girmez; onedir yapıda (Mikrobiyoloji_onedir.spec) bu adım hiç yoktur.
+"""
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+ORTAM = "ENFEKSIYON_ZAMANLAMA"
+
+def etkin() -> bool:
+    return os.environ.get(ORTAM, "") not in ("", "0")
+
+def surec_yasi() -> Optional[float]:
+    """Sürecin oluşturulmasından bu yana geçen saniye; desteklenmeyen sistemde None."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            k32 = ctypes.windll.kernel32
+            # FILETIME: 1601'den beri 100 ns; 8 baytlık yapı, küçük uçlu 64 bit sayıyla aynı
+            olusma, cikis, cekirdek, kullanici, simdi = (ctypes.c_ulonglong() for _ in range(5))
+            if not k32.GetProcessTimes(wintypes.HANDLE(-1), ctypes.byref(olusma), ctypes.byref(cikis),
+                                       ctypes.byref(cekirdek), ctypes.byref(kullanici)):
+                return None
+            k32.GetSystemTimeAsFileTime(ctypes.byref(simdi))
+            return (simdi.value - olusma.value) / 1e7
+        with open("/proc/self/stat") as f:
+            baslama = int(f.read().rsplit(")", 1)[1].split()[19])  # 22. alan: açılıştan beri saat tıkı
+        with open("/proc/uptime") as f:
+            acik = float(f.read().split()[0])
+        return max(0.0, acik - baslama / os.sysconf("SC_CLK_TCK"))
+    except (OSError, AttributeError, ValueError, IndexError):
+        return None
+
+class AcilisOlcumu(QObject):
+    """Aşama sürelerini toplar; ana pencere ilk kez çizildikten sonra özeti yazar."""
+    def __init__(self, bas: float, parent=None):
+        super().__init__(parent)
+        self.asamalar: List[Tuple[str, float]] = []
+        self._son = bas
+        self._pencere = None
+        yas = surec_yasi()
+        if yas is not None:
+            self.asamalar.append(("yorumlayıcı", max(0.0, yas - (time.perf_counter() - bas))))
+
+    def asama(self, ad: str):
+        simdi = time.perf_counter()
+        self.asamalar.append((ad, simdi - self._son))
+        self._son = simdi
+
+    def ilk_cizimi_bekle(self, pencere):
+        self._pencere = pencere
+        pencere.installEventFilter(self)
+
+    def eventFilter(self, nesne, olay):
+        if nesne is self._pencere and olay.type() == QEvent.Paint:
+            nesne.removeEventFilter(self)
+            # Paint olayı çizimden önce gelir; çizim ve ekrana aktarım bitince ölç
+            QTimer.singleShot(0, self._cizildi)
+        return False
+
+    def _cizildi(self):
+        self.asama("ilk çizim")
+        self.yaz()
+
+    def ozet(self) -> str:
+        toplam = sum(s for _, s in self.asamalar)
+        return ("Açılış: " + ", ".join(f"{ad} {s * 1000:.0f} ms" for ad, s in self.asamalar)
+                + f" (toplam {toplam * 1000:.0f} ms)")
+
+    def yaz(self):
+        metin = self.ozet()
+        if sys.stderr:
+            print(metin, file=sys.stderr)
+        hedef = os.environ.get(ORTAM, "")
+        if hedef not in ("", "0", "1"):
+            try:
+                with open(hedef, "a", encoding="utf-8") as f:
+                    f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {metin}\n")
+            except OSError:
+                pass
+        if self._pencere is not None:
+            self._pencere.statusBar().showMessage(metin, 15000)
@@ -22,25 +22,11 @@ class Ui_MainWindow(object):
         MainWindow.setSizePolicy(sizePolicy)
         self.centralwidget = QtWidgets.QWidget(MainWindow)
         self.centralwidget.setObjectName("centralwidget")
-        self.tableWidget = QtWidgets.QTableWidget(self.centralwidget)
-        self.tableWidget.setGeometry(QtCore.QRect(20, 20, 611, 351))
-        self.tableWidget.setMaximumSize(QtCore.QSize(16777214, 16777215))
-        self.tableWidget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
-        self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(6)
-        self.tableWidget.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.tableWidget.setHorizontalHeaderItem(5, item)
+        self.tableHasta = QtWidgets.QTableView(self.centralwidget)
+        self.tableHasta.setGeometry(QtCore.QRect(20, 20, 611, 351))
+        self.tableHasta.setMaximumSize(QtCore.QSize(16777214, 16777215))
+        self.tableHasta.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tableHasta.setObjectName("tableHasta")
         self.btnHastaEkle = QtWidgets.QPushButton(self.centralwidget)
         self.btnHastaEkle.setGeometry(QtCore.QRect(20, 380, 75, 23))
         self.btnHastaEkle.setObjectName("btnHastaEkle")
@@ -71,18 +57,6 @@ class Ui_MainWindow(object):
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
-        item = self.tableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "ID"))
-        item = self.tableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "TC"))
-        item = self.tableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Ad"))
-        item = self.tableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Soyad"))
-        item = self.tableWidget.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "Doğum Tarihi"))
-        item = self.tableWidget.horizontalHeaderItem(5)
-        item.setText(_translate("MainWindow", "Servis"))
         self.btnHastaEkle.setText(_translate("MainWindow", "Ekle"))
         self.btnHastaGuncelle.setText(_translate("MainWindow", "Güncelle"))
         self.btnHastaSil.setText(_translate("MainWindow", "Sil"))
@@ -0,0 +1,125 @@
+"""Anket geçmişi: hasta başına tek güncel satır + alan bazında farklar.
+
+anket tablosunda her hastanın yalnızca son hali (taban satır) durur. Her kayıt anket_surum'a bir
+sürüm ekler; o kayıtta değişen alanların ÖNCEKİ değerleri anket_fark'a yazılır (ters fark).
+Eski bir sürüm, taban satırdan geriye doğru farklar uygulanarak tek sorguda kurulur; sık
+istenen son hal doğrudan okunur (kayitlar.son_anket).
+Eski sürüm istemcilerin düz INSERT ile eklediği tam satırlar bir sonraki kayıtta ya da geçmiş
+okunurken sürüm olarak geçmişe katılır (_satirlari_birlestir).
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from anket_semasi import Anket, EKLE_SQL, META, SON_ANKET_SQL, SUTUNLAR
+from veritabani import Veritabani, db
+
+_SIRA = {c: i for i, c in enumerate(SUTUNLAR)}
+
+@dataclass
+class Surum:
+    no: int
+    created_at: str
+    degisiklikler: List[Tuple[str, object, object]] = field(default_factory=list)  # (sütun, önceki, yeni)
+
+def farklar(eski: Sequence, yeni: Sequence) -> List[Tuple[str, object, object]]:
+    """İki anketin (SUTUNLAR sırasıyla değerler) değişen alanları."""
+    return [(c, e, y) for c, e, y in zip(SUTUNLAR, eski, yeni) if e != y]
+
+# ------------------ Yazma ------------------
+def _satirlari_birlestir(cur, hasta_id: int):
+    # Eski sürüm istemciler düz INSERT ile tam satır ekler: hastanın satırları sırayla sürüm olur
+    # (sürümü olmayan ilk satır dahil), farklar yazılır ve yalnızca en yeni satır taban olarak kalır.
+    satirlar = cur.execute(f"SELECT {', '.join(Anket._fields)} FROM anket WHERE hasta_id=? ORDER BY id",
+                           (hasta_id,)).fetchall()
+    no = cur.execute("SELECT COALESCE(MAX(no), 0) FROM anket_surum WHERE hasta_id=?", (hasta_id,)).fetchone()[0]
+    for i in range(1 if no else 0, len(satirlar)):  # sürümü olan taban satır zaten geçmişte
+        no += 1
+        sid = cur.execute("INSERT INTO anket_surum(hasta_id, no, created_at) VALUES (?,?,?)",
+                          (hasta_id, no, satirlar[i][2])).lastrowid
+        if i:
+            cur.executemany("INSERT INTO anket_fark(surum_id, sutun, deger) VALUES (?,?,?)",
+                            [(sid, c, e) for c, e, _ in farklar(satirlar[i - 1][META:], satirlar[i][META:])])
+    if len(satirlar) > 1:
+        cur.execute("DELETE FROM anket WHERE hasta_id=? AND id<?", (hasta_id, satirlar[-1][0]))
+
+def birlestir_gerekli(hasta_id: int, vt: Veritabani = None) -> bool:
+    """Eski istemcinin eklediği, henüz geçmişe katılmamış anket satırı var mı."""
+    n, surum = (vt or db()).tek(
+        "SELECT COUNT(*), EXISTS(SELECT 1 FROM anket_surum WHERE hasta_id=?) FROM anket WHERE hasta_id=?",
+        (hasta_id, hasta_id))
+    return n > 1 or (n == 1 and not surum)
+
+def birlestir(hasta_id: int, vt: Veritabani = None):
+    vt = vt or db()
+    if birlestir_gerekli(hasta_id, vt):
+        with vt.islem() as cur:
+            _satirlari_birlestir(cur, hasta_id)
+
+def kaydet(hasta_id: int, degerler: Sequence, zaman: str, vt: Veritabani = None) -> int:
+    """Yeni sürümü yazar (yalnızca değişen alanlar güncellenir); sürüm numarasını döndürür."""
+    vt = vt or db()
+    degerler = tuple(degerler)
+    with vt.islem() as cur:
+        _satirlari_birlestir(cur, hasta_id)
+        taban = cur.execute(SON_ANKET_SQL, (hasta_id,)).fetchone()
+        no = cur.execute("SELECT COALESCE(MAX(no), 0) + 1 FROM anket_surum WHERE hasta_id=?",
+                         (hasta_id,)).fetchone()[0]
+        sid = cur.execute("INSERT INTO anket_surum(hasta_id, no, created_at) VALUES (?,?,?)",
+                          (hasta_id, no, zaman)).lastrowid
+        if taban is None:
+            cur.execute(EKLE_SQL, (hasta_id, zaman, *degerler))
+            return no
+        degisen = farklar(taban[META:], degerler)
+        cur.executemany("INSERT INTO anket_fark(surum_id, sutun, deger) VALUES (?,?,?)",
+                        [(sid, c, e) for c, e, _ in degisen])
+        atama = "".join(f", {c}=?" for c, _, _ in degisen)
+        cur.execute(f"UPDATE anket SET created_at=?{atama} WHERE id=?",
+                    (zaman, *(y for _, _, y in degisen), taban[0]))
+    return no
+
+# ------------------ Okuma ------------------
+_GERI_FARKLAR = """
+    SELECT s.no, f.sutun, f.deger FROM anket_surum s JOIN anket_fark f ON f.surum_id = s.id
+    WHERE s.hasta_id = ? AND s.no > ? ORDER BY s.no DESC
+"""
+
+def surum_getir(hasta_id: int, no: int, vt: Veritabani = None) -> Optional[Anket]:
+    """no'lu sürümdeki anket: taban satıra daha yeni sürümlerin farkları geriye doğru uygulanır."""
+    vt = vt or db()
+    birlestir(hasta_id, vt)
+    with vt.islem(yazma=False) as cur:
+        taban = cur.execute(SON_ANKET_SQL, (hasta_id,)).fetchone()
+        zaman = cur.execute("SELECT created_at FROM anket_surum WHERE hasta_id=? AND no=?",
+                            (hasta_id, no)).fetchone()
+        if taban is None or zaman is None:
+            return None
+        degerler = list(taban[META:])
+        for _, sutun, deger in cur.execute(_GERI_FARKLAR, (hasta_id, no)):
+            if sutun in _SIRA:
+                degerler[_SIRA[sutun]] = deger
+    return Anket(taban[0], hasta_id, zaman[0], *degerler)
+
+def surumler(hasta_id: int, vt: Veritabani = None) -> List[Surum]:
+    """Tüm sürümler (yeniden eskiye) ve her birinde değişen alanlar; ilk sürüm dolu alanları listeler."""
+    vt = vt or db()
+    birlestir(hasta_id, vt)
+    with vt.islem(yazma=False) as cur:
+        taban = cur.execute(SON_ANKET_SQL, (hasta_id,)).fetchone()
+        if taban is None:
+            return []
+        liste = [Surum(no, t) for no, t in cur.execute(
+            "SELECT no, created_at FROM anket_surum WHERE hasta_id=? ORDER BY no DESC", (hasta_id,))]
+        geri = {}
+        for no, sutun, deger in cur.execute(_GERI_FARKLAR, (hasta_id, 0)):
+            if sutun in _SIRA:
+                geri.setdefault(no, []).append((sutun, deger))
+    # Tek geçiş: 'guncel' sırayla her sürümün hali olur
+    guncel = list(taban[META:])
+    for s in liste:
+        for sutun, eski in sorted(geri.get(s.no, ()), key=lambda x: _SIRA[x[0]]):
+            i = _SIRA[sutun]
+            s.degisiklikler.append((sutun, eski, guncel[i]))
+            guncel[i] = eski
+    if liste:
+        liste[-1].degisiklikler = [(c, None, v) for c, v in zip(SUTUNLAR, guncel) if v not in (None, "")]
+    return liste
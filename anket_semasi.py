@@ -0,0 +1,122 @@
+"""Hasta anketinin tek tanımı.
+
+Tablo sütunları (veritabani_olustur), form (AnketPenceresi), kayıt/yükleme SQL'i ve rapor
+tablosu buradan üretilir. Yeni soru eklemek için ilgili bölüme bir Alan satırı eklemek yeterlidir;
+sütun bir sonraki açılışta _ensure_columns ile eklenir.
+
+Alan türleri:
+  vy      Var / Yok
+  eh      Evet / Hayır
+  vy_not  Var / Yok + not (iki sütun: ad, ad_not; varsayılan Yok)
+  metin   tek satır metin
+  sayi    tam sayı (INTEGER)
+  secim   açılır liste (secenekler)
+  uzun    çok satırlı metin
+"""
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+@dataclass(frozen=True)
+class Alan:
+    ad: str
+    etiket: str
+    tur: str = "metin"
+    ipucu: str = ""
+    secenekler: Tuple[str, ...] = ()
+
+    @property
+    def sutunlar(self) -> Tuple[str, ...]:
+        return (self.ad, self.ad + "_not") if self.tur == "vy_not" else (self.ad,)
+
+    @property
+    def sql_tipi(self) -> str:
+        return "INTEGER" if self.tur == "sayi" else "TEXT"
+
+    @property
+    def varsayilanlar(self) -> tuple:
+        # Boş formun kaydedeceği değerler (vy_not başlangıçta Yok seçili)
+        return ("Yok", None) if self.tur == "vy_not" else (None,)
+
+A = Alan
+BOLUMLER: List[Tuple[str, Tuple[Alan, ...]]] = [
+    ("ÖN TANI", (
+        A("ates", "Ateş", "vy"), A("oksuruk", "Öksürük", "vy"), A("gece_terleme", "Gece terlemesi", "vy"),
+        A("kilo_kaybi", "Kilo kaybı", "vy"), A("aile_tb", "Ailede TB hastalığı", "vy"),
+        A("usye_asye", "Sık ÜSYE/ASYE öyküsü", "vy"), A("agzi_acik", "Ağzı açık uyuma", "vy"),
+        A("inhaler", "İnhaler/Nebülizatör kullanım öyküsü", "vy"), A("evneb", "Evde nebülizatör cihazı", "vy"),
+        A("yasam_yeri", "Yaşam yeri", "secim", secenekler=("", "Müstakil ev", "Apartman", "Diğer")),
+        A("evde_kisi", "Evde yaşayan kişi sayısı", "sayi", "Sayı"),
+        A("hayvan", "Hayvan/Böcek teması", "vy_not", "Örn: kedi tırmalaması…"),
+        A("cigsut", "Çiğ süt ve ürünleri tüketimi", "vy"), A("oral_aft", "Oral aft", "vy"),
+        A("genital_ulser", "Genital ülser", "vy"),
+        A("tekrarlayan", "Tekrarlayan belirtiler (serbest)", "metin", "Örn: Ateş, Eklem ağrısı…"),
+        A("eklem", "Eklemlerde ağrı/şişlik/kızarıklık", "vy_not", "Örn: sağ diz ağrısı…"),
+        A("romatizma", "Ailede bilinen romatizmal hastalık", "vy"),
+    )),
+    ("ÖZGEÇMİŞ", (
+        A("hafta", "HAFTA", "metin", "Örn: 39+2"), A("nsvy_cs", "NSVY - C/S", "metin", "Örn: NSVY"),
+        A("gr", "GR", "metin", "Örn: 3200 g"),
+        A("kuvoz", "Küvözde kalmış mı?", "eh"), A("anne_sutu", "Anne sütü", "eh"),
+        A("asilari", "Aşıları", "metin", "Çocukluk dönemi aşı bilgisi…"),
+        A("anne_yas", "ANNE YAŞ"), A("anne_ss", "ANNE S/S"), A("baba_yas", "BABA YAŞ"), A("baba_ss", "BABA S/S"),
+        A("akrabalik", "Akrabalık", "vy_not", "Açıklama…"),
+        A("cocuk1", "1. Çocuk (Yaş/K-E/SS)"), A("cocuk2", "2. Çocuk (Yaş/K-E/SS)"),
+        A("cocuk3", "3. Çocuk (Yaş/K-E/SS)"), A("cocuk4", "4. Çocuk (Yaş/K-E/SS)"),
+        A("aile_hastalik", "Ailede bilinen önemli hastalık", "vy_not", "Örn: talasemi taşıyıcılığı…"),
+    )),
+    ("FİZİK MUAYENE (FM)", (
+        A("ta", "Tansiyon (TA)"), A("n", "Nabız (N)"), A("t", "Vücut ısısı (T)"), A("ss", "Solunum (SS)"),
+        A("boy", "BOY"), A("genel_durum", "GENEL DURUM", "metin", "Serbest tanım…"),
+        A("alerji", "ALERJİ", "vy_not", "Alerjen / açıklama…"), A("diyabet", "DİYABET", "vy_not", "Açıklama…"),
+        A("orofarenks", "OROFARENKS-TONSİLLER", "metin", "Bulgu…"), A("postnazal", "POSTNAZAL AKINTI", "vy"),
+        A("servikal", "SERVİKAL LAP", "metin", "Bulgu…"),
+        A("solunum", "SOLUNUM SESLERİ", "metin", "Doğal / açıklama…"),
+        A("ral", "RAL", "vy_not", "Açıklama…"), A("ronkus", "RONKÜS", "vy_not", "Açıklama…"),
+        A("kalp_ritim", "KALP SESLERİ RİTMİK", "eh"), A("kalp_not", "KALP NOTU", "metin", "Ek açıklama…"),
+        A("ufurum", "ÜFÜRÜM", "vy"), A("batin", "BATIN RAHAT", "eh"),
+        A("batin_not", "BATIN NOTU", "metin", "Ek açıklama…"),
+        A("hsm", "HSM", "vy"), A("ense", "ENSE SERTLİĞİ", "vy"),
+        A("mib", "MENİNGEAL İRRİTASYON BULGUSU (MİB)", "vy"), A("dokuntu", "DÖKÜNTÜ", "vy"),
+    )),
+    ("KLİNİK GÖZLEM", (
+        A("klinik_gozlem", "Klinik gözlem", "uzun", "Klinik gözlem / notlar…"),
+    )),
+]
+del A
+
+ALANLAR: Tuple[Alan, ...] = tuple(a for _, alanlar in BOLUMLER for a in alanlar)
+SUTUNLAR: Tuple[str, ...] = tuple(c for a in ALANLAR for c in a.sutunlar)
+VARSAYILANLAR: tuple = tuple(v for a in ALANLAR for v in a.varsayilanlar)
+ETIKETLER = {c: a.etiket + (" (not)" if c != a.ad else "") for a in ALANLAR for c in a.sutunlar}
+
+def sutun_tanimlari() -> List[Tuple[str, str]]:
+    """veritabani_olustur için (sütun, SQL tipi)."""
+    return [(c, a.sql_tipi if c == a.ad else "TEXT") for a in ALANLAR for c in a.sutunlar]
+
+# ------------------ SQL ------------------
+# Anket kaydı: meta sütunlar + şema sütunları, bu sırayla
+Anket = namedtuple("Anket", ("id", "hasta_id", "created_at") + SUTUNLAR)
+META = 3
+
+SON_ANKET_SQL = f"SELECT {', '.join(Anket._fields)} FROM anket WHERE hasta_id=? ORDER BY id DESC LIMIT 1"
+EKLE_SQL = (f"INSERT INTO anket(hasta_id, created_at, {', '.join(SUTUNLAR)}) "
+            f"VALUES ({', '.join('?' * (len(SUTUNLAR) + 2))})")
+
+# ------------------ Rapor ------------------
+def rapor_satirlari(anket: Anket) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """[(bölüm, [(etiket, değer), ...])]; boş alanlar atlanır, not varsa değerin yanına eklenir."""
+    sonuc = []
+    for baslik, alanlar in BOLUMLER:
+        satirlar = []
+        for a in alanlar:
+            deger: Optional[object] = getattr(anket, a.ad)
+            if deger in (None, ""):
+                continue
+            metin = str(deger)
+            if a.tur == "vy_not" and getattr(anket, a.ad + "_not"):
+                metin += f" ({getattr(anket, a.ad + '_not')})"
+            satirlar.append((a.etiket, metin))
+        if satirlar:
+            sonuc.append((baslik, satirlar))
+    return sonuc
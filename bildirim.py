@@ -0,0 +1,71 @@
+"""Pencereler arası değişiklik bildirimi.
+
+Tetikleyiciler hasta/bakteri/antibiyogram/ilac/lab/anket yazmalarını degisiklik tablosuna işler
+(veritabani._degisiklik_gunlugu_olustur). DegisiklikYolu günlüğü son okunan id'den itibaren okur ve
+her satırı Qt sinyaliyle yayınlar; açık pencereler yalnızca etkilenen satırı günceller.
+
+- Bu süreçteki yazmalar: Veritabani.yazma_sonrasi ile commit'ten hemen sonra okunur.
+- Başka süreçlerin yazmaları (ör. ağ paylaşımındaki diğer kullanıcılar): PRAGMA data_version
+  izlenir; günlük yalnızca sürüm değiştiğinde okunur.
+Python'un sqlite3 modülü update_hook sunmadığından süreç içi bildirim de günlük üzerinden yapılır;
+her değişiklik (hangi pencereden gelirse gelsin) tam bir kez yayınlanır.
+"""
+from typing import NamedTuple, Optional
+
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+from veritabani import Veritabani, db
+
+class Degisiklik(NamedTuple):
+    varlik: str                 # tablo: hasta, bakteri, antibiyogram, ilac, lab, anket
+    kayit_id: int
+    islem: str                  # ekle / guncelle / sil
+    hasta_id: Optional[int]
+    bakteri_id: Optional[int]   # bakteri ve antibiyogram için
+
+class DegisiklikYolu(QObject):
+    degisti = pyqtSignal(object)  # Degisiklik
+    _yazildi = pyqtSignal()
+    DIS_IZLEME_MS = 2000
+
+    def __init__(self, vt: Veritabani = None, parent=None):
+        super().__init__(parent)
+        self.vt = vt or db()
+        self._son_id = self.vt.tek("SELECT COALESCE(MAX(id), 0) FROM degisiklik")[0]
+        self._surum = None
+        # Kuyruklu: yazan kod (ör. satırı kendisi ekleyen pencere) bitince okunur; arka plan
+        # iş parçacığındaki yazmalar da böylece GUI iş parçacığına gelir
+        self._yazildi.connect(self.tara, Qt.QueuedConnection)
+        self.vt.yazma_sonrasi.append(self._yazildi.emit)
+        self._zamanlayici = QTimer(self)
+        self._zamanlayici.timeout.connect(self._dis_kontrol)
+
+    def dis_izlemeyi_baslat(self, ms: int = None):
+        """Başka süreçlerin yazmalarını izler (data_version; günlük yalnızca değişince okunur)."""
+        self._surum = self.vt.tek("PRAGMA data_version")[0]
+        self._zamanlayici.start(ms or self.DIS_IZLEME_MS)
+
+    def _dis_kontrol(self):
+        surum = self.vt.tek("PRAGMA data_version")[0]
+        if surum != self._surum:
+            self._surum = surum
+            self.tara()
+
+    def tara(self):
+        rows = self.vt.sorgu(
+            "SELECT id, varlik, kayit_id, islem, hasta_id, bakteri_id FROM degisiklik WHERE id > ? ORDER BY id",
+            (self._son_id,))
+        if not rows:
+            return
+        self._son_id = rows[-1][0]
+        for r in rows:
+            self.degisti.emit(Degisiklik(*r[1:]))
+
+_yol: Optional[DegisiklikYolu] = None
+
+def yol() -> DegisiklikYolu:
+    """Uygulama genelindeki tek yol (ilk çağrıda, GUI iş parçacığında kurulur)."""
+    global _yol
+    if _yol is None:
+        _yol = DegisiklikYolu()
+    return _yol
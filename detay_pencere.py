@@ -176,6 +176,9 @@ class Ui_MainWindow(object):
         self.btnLabKaydet = QtWidgets.QPushButton(self.grpLaboratuvar)
         self.btnLabKaydet.setGeometry(QtCore.QRect(330, 790, 75, 23))
         self.btnLabKaydet.setObjectName("btnLabKaydet")
+        self.btnLabTrend = QtWidgets.QPushButton(self.grpLaboratuvar)
+        self.btnLabTrend.setGeometry(QtCore.QRect(330, 734, 75, 21))
+        self.btnLabTrend.setObjectName("btnLabTrend")
         self.pushButton = QtWidgets.QPushButton(self.grpLaboratuvar)
         self.pushButton.setGeometry(QtCore.QRect(330, 762, 75, 21))
         self.pushButton.setObjectName("pushButton")
@@ -354,6 +357,7 @@ class Ui_MainWindow(object):
         self.label_20.setText(_translate("MainWindow", "Fosfor  ( P )            :"))
         self.label_21.setText(_translate("MainWindow", "Magnezyum ( Mg )  :"))
         self.btnLabKaydet.setText(_translate("MainWindow", "Kaydet"))
+        self.btnLabTrend.setText(_translate("MainWindow", "Trend"))
         self.pushButton.setText(_translate("MainWindow", "Yazdır"))
         self.grpMikrobiyoloji.setTitle(_translate("MainWindow", "MİKROBİYOLOJİ"))
         self.btnAntibiyogramsil.setText(_translate("MainWindow", "Antibiyogram Sil"))
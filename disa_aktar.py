@@ -0,0 +1,90 @@
+"""Klinik tabloların akış halinde dışa aktarımı (CSV, isteğe bağlı Parquet).
+
+Satırlar fetchmany ile parça parça okunur; bellek kullanımı tablo boyutundan bağımsızdır.
+Parquet için pyarrow gerekir (pip install pyarrow); yoksa yalnızca CSV kullanılabilir.
+"""
+import csv
+import os
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from veritabani import TABLOLAR, Veritabani, db
+
+PARCA = 5000
+
+def satir_akisi(tablo: str, vt: Veritabani = None, parca: int = PARCA) -> Iterator[List[tuple]]:
+    """tablo satırlarını id sırasıyla en fazla `parca` satırlık listeler halinde üretir."""
+    vt = vt or db()
+    cur = vt.baglanti().execute(f"SELECT * FROM {tablo} ORDER BY id")
+    while True:
+        rows = cur.fetchmany(parca)
+        if not rows:
+            return
+        yield rows
+
+# ------------------ CSV ------------------
+def csv_yaz(tablo: str, yol: str, vt: Veritabani = None) -> int:
+    vt = vt or db()
+    n = 0
+    # utf-8-sig: Excel Türkçe karakterleri doğru açsın
+    with open(yol, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(vt.sutunlar(tablo))
+        for rows in satir_akisi(tablo, vt):
+            w.writerows(rows); n += len(rows)
+    return n
+
+# ------------------ Parquet ------------------
+def _arrow_tipi(pa, sql_tipi: str):
+    t = (sql_tipi or "").upper()
+    if "INT" in t:
+        return pa.int64()
+    if any(k in t for k in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+def _arrow_dizisi(pa, degerler, tip):
+    # SQLite tip zorlamaz: TEXT sütunda sayı, REAL sütunda metin olabilir
+    if tip == pa.string():
+        degerler = [None if v is None else str(v) for v in degerler]
+    try:
+        return pa.array(degerler, type=tip)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        def sayi(v):
+            try: return None if v is None else float(v)
+            except (TypeError, ValueError): return None
+        return pa.array([sayi(v) for v in degerler], type=tip)
+
+def parquet_yaz(tablo: str, yol: str, vt: Veritabani = None, parca: int = 50000) -> int:
+    """Sütunlu yazım: lab'daki REAL sütunlar float64 olarak saklanır. pyarrow gerekir."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet çıktısı için pyarrow kurulu olmalı (pip install pyarrow).")
+    vt = vt or db()
+    bilgi = vt.sorgu(f"PRAGMA table_info({tablo})")
+    sema = pa.schema([(r[1], _arrow_tipi(pa, r[2])) for r in bilgi])
+    n = 0
+    with pq.ParquetWriter(yol, sema, compression="zstd") as yazici:
+        for rows in satir_akisi(tablo, vt, parca):
+            sutunlar = list(zip(*rows))
+            yazici.write_batch(pa.record_batch(
+                [_arrow_dizisi(pa, s, alan.type) for s, alan in zip(sutunlar, sema)], schema=sema))
+            n += len(rows)
+    return n
+
+# ------------------ Hepsi ------------------
+BICIMLER = {"csv": (csv_yaz, ".csv"), "parquet": (parquet_yaz, ".parquet")}
+
+def tumunu_disa_aktar(klasor: str, bicim: str = "csv", tablolar: Sequence[str] = TABLOLAR,
+                      vt: Veritabani = None) -> Dict[str, Tuple[str, int]]:
+    """Tabloları klasor/<tablo>.<bicim> olarak yazar; tek okuma işleminde (tutarlı anlık görüntü)."""
+    vt = vt or db()
+    yaz, uzanti = BICIMLER[bicim]
+    os.makedirs(klasor, exist_ok=True)
+    sonuc = {}
+    with vt.islem(yazma=False):
+        for t in tablolar:
+            yol = os.path.join(klasor, t + uzanti)
+            sonuc[t] = (yol, yaz(t, yol, vt))
+    return sonuc
@@ -1,147 +1,65 @@
 import sys
-import sqlite3
-import os
-import csv
+import time
+
+_ACILIS = time.perf_counter()  # açılış süresi ölçümü (acilis.py) için
+
+# Alt komutla çağrıldıysa (python -m enfeksiyon report ...) GUI modüllerini hiç yüklemeden CLI'ye geç
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import multiprocessing
+    multiprocessing.freeze_support()
+    from komut_satiri import main as _cli_main
+    sys.exit(_cli_main())
+
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import List, Optional, Tuple
 
-from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
-from PyQt5.QtCore import QDate, Qt, QDateTime
-from PyQt5.QtGui import QIntValidator, QTextDocument, QKeySequence
+from PyQt5.QtCore import (
+    QDate, Qt, QDateTime, QAbstractTableModel, QModelIndex,
+    QObject, QPointF, QRunnable, QThreadPool, QTimer, pyqtSignal
+)
+from PyQt5.QtGui import QIntValidator, QKeySequence, QPainter, QPen, QColor, QPolygonF
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QMessageBox, QDialog,
     QFormLayout, QLineEdit, QDialogButtonBox, QTableWidgetItem,
     QDateEdit, QComboBox, QHeaderView, QTableWidget,
     QScrollArea, QWidget, QVBoxLayout, QLabel, QHBoxLayout,
     QRadioButton, QToolBar, QAction, QTextEdit, QFileDialog,
-    QAbstractButton
+    QAbstractButton, QAbstractItemView, QCheckBox, QProgressDialog, QInputDialog,
+    QDockWidget, QListWidget, QToolTip, QButtonGroup, QTabWidget
 )
 
+import acilis
 from ana_pencere import Ui_MainWindow
+from pano import pano_ozeti
 from detay_pencere import Ui_MainWindow as Ui_DetayPencere
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "hastatakip.db")
-
-# ------------------ Veritabanı ------------------
-def _ensure_columns(cur, table, cols: List[Tuple[str, str]]):
-    cur.execute(f"PRAGMA table_info({table})")
-    mevcut = {r[1] for r in cur.fetchall()}
-    for ad, tip in cols:
-        if ad not in mevcut:
-            cur.execute(f"ALTER TABLE {table} ADD COLUMN {ad} {tip}")
-
-def veritabani_olustur():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # hasta
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS hasta(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tc TEXT UNIQUE,
-            ad TEXT,
-            soyad TEXT,
-            dogum TEXT,
-            servis TEXT
-        )
-    """)
-
-    # bakteri
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS bakteri(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            kultur_ornegi TEXT,
-            isim TEXT,
-            ureme_tarihi TEXT,
-            hasta_id INTEGER,
-            FOREIGN KEY(hasta_id) REFERENCES hasta(id)
-        )
-    """)
-    _ensure_columns(cur, "bakteri", [("kultur_ornegi", "TEXT")])
-
-    # antibiyogram
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS antibiyogram(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            antibiyotik TEXT,
-            sonuc TEXT,
-            bakteri_id INTEGER,
-            FOREIGN KEY(bakteri_id) REFERENCES bakteri(id)
-        )
-    """)
-
-    # ilac
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ilac(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ilac TEXT,
-            baslangic TEXT,
-            bitis TEXT,
-            dozaj TEXT,
-            hasta_id INTEGER,
-            FOREIGN KEY(hasta_id) REFERENCES hasta(id)
-        )
-    """)
-
-    # laboratuvar
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS lab(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            hasta_id INTEGER,
-            created_at TEXT,
-            ppd TEXT,
-            crp REAL, lokosit REAL, lenfosit REAL, notrofil REAL, pct REAL,
-            glukoz REAL, na REAL, cl REAL, p REAL, mg REAL,
-            ast REAL, alt REAL, ggt REAL, alp REAL,
-            tbil REAL, dbil REAL, albumin REAL,
-            kreatinin REAL, bun REAL, egfrt REAL,
-            FOREIGN KEY(hasta_id) REFERENCES hasta(id)
-        )
-    """)
-
-    # anket
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS anket(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            hasta_id INTEGER,
-            created_at TEXT
-        )
-    """)
-
-    gerekli = [
-        ("ates","TEXT"),("oksuruk","TEXT"),("gece_terleme","TEXT"),("kilo_kaybi","TEXT"),
-        ("aile_tb","TEXT"),("usye_asye","TEXT"),("agzi_acik","TEXT"),("inhaler","TEXT"),
-        ("evneb","TEXT"),("yasam_yeri","TEXT"),("evde_kisi","INTEGER"),
-        ("hayvan","TEXT"),("hayvan_not","TEXT"),("cigsut","TEXT"),("oral_aft","TEXT"),
-        ("genital_ulser","TEXT"),("tekrarlayan","TEXT"),("eklem","TEXT"),("eklem_not","TEXT"),
-        ("romatizma","TEXT"),
-        ("hafta","TEXT"),("nsvy_cs","TEXT"),("gr","TEXT"),("kuvoz","TEXT"),("anne_sutu","TEXT"),
-        ("asilari","TEXT"),("anne_yas","TEXT"),("anne_ss","TEXT"),("baba_yas","TEXT"),
-        ("baba_ss","TEXT"),("akrabalik","TEXT"),("akrabalik_not","TEXT"),
-        ("cocuk1","TEXT"),("cocuk2","TEXT"),("cocuk3","TEXT"),("cocuk4","TEXT"),
-        ("aile_hastalik","TEXT"),("aile_hastalik_not","TEXT"),
-        ("ta","TEXT"),("n","TEXT"),("t","TEXT"),("ss","TEXT"),("boy","TEXT"),
-        ("genel_durum","TEXT"),("alerji","TEXT"),("alerji_not","TEXT"),
-        ("diyabet","TEXT"),("diyabet_not","TEXT"),("orofarenks","TEXT"),
-        ("postnazal","TEXT"),("servikal","TEXT"),("solunum","TEXT"),
-        ("ral","TEXT"),("ral_not","TEXT"),("ronkus","TEXT"),("ronkus_not","TEXT"),
-        ("kalp_ritim","TEXT"),("kalp_not","TEXT"),("ufurum","TEXT"),("batin","TEXT"),
-        ("batin_not","TEXT"),("hsm","TEXT"),("ense","TEXT"),("mib","TEXT"),("dokuntu","TEXT"),
-        ("klinik_gozlem","TEXT")
-    ]
-    _ensure_columns(cur, "anket", gerekli)
-
-    conn.commit()
-    conn.close()
+import anket_gecmisi
+import bildirim
+import anket_semasi
+import kayitlar
+from kayitlar import Antibiyogram, Bakteri, Hasta, Ilac, tarih_goster
+from veritabani import db, fts_sorgusu, tr_katla, veritabani_olustur
 
 # ------------------ Yardımcılar ------------------
-def try_get_int(item: Optional[QTableWidgetItem]) -> Optional[int]:
-    if not item:
-        return None
+# Tarihler veritabanında ISO (KAYIT_TARIHI) saklanır, ekranda GOSTERIM_TARIHI ile gösterilir
+KAYIT_TARIHI = "yyyy-MM-dd"
+GOSTERIM_TARIHI = "dd-MM-yyyy"
+
+def qdate_coz(s: str) -> QDate:
+    for bicim in (KAYIT_TARIHI, GOSTERIM_TARIHI):
+        d = QDate.fromString((s or "")[:10], bicim)
+        if d.isValid():
+            return d
+    return QDate()
+
+@contextmanager
+def tablo_guncelleme(t: QTableWidget):
+    """Toplu tablo değişikliği: görünüm sinyalleri susturulur, yeniden çizim sonda bir kez yapılır."""
+    eski = t.blockSignals(True); t.setUpdatesEnabled(False)
     try:
-        return int(item.text())
-    except Exception:
-        return None
+        yield t
+    finally:
+        t.setUpdatesEnabled(True); t.blockSignals(eski)
 
 # ------------------ Dialoglar ------------------
 class HastaEkleDialog(QDialog):
@@ -171,7 +89,7 @@ class HastaEkleDialog(QDialog):
         return (self.tc_input.text().strip(),
                 self.ad_input.text().strip(),
                 self.soyad_input.text().strip(),
-                self.dogum_input.date().toString("dd-MM-yyyy"),
+                self.dogum_input.date().toString(KAYIT_TARIHI),
                 self.servis_input.text().strip())
 
 class BakteriEkleDialog(QDialog):
@@ -200,7 +118,7 @@ class BakteriEkleDialog(QDialog):
     def get_data(self):
         return (self.kultur_input.currentText().strip(),
                 self.bakteri_input.text().strip(),
-                self.tarih_input.date().toString("dd-MM-yyyy"))
+                self.tarih_input.date().toString(KAYIT_TARIHI))
 
 class AntibiyogramEkleDialog(QDialog):
     def __init__(self, baslik="Antibiyogram Bilgisi", parent=None):
@@ -237,241 +155,393 @@ class IlacEkleDialog(QDialog):
 
     def get_data(self):
         return (self.ilac_input.text().strip(),
-                self.baslangic_input.date().toString("dd-MM-yyyy"),
-                self.bitis_input.date().toString("dd-MM-yyyy"),
+                self.baslangic_input.date().toString(KAYIT_TARIHI),
+                self.bitis_input.date().toString(KAYIT_TARIHI),
                 self.dozaj_input.text().strip())
 
+class TopluRaporDialog(QDialog):
+    def __init__(self, servisler: List[str], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Toplu PDF Rapor")
+        layout = QFormLayout(self)
+        self.servis_input = QComboBox(); self.servis_input.setEditable(True)
+        self.servis_input.addItems(["(Tümü)"] + servisler)
+        self.tarih_kutu = QCheckBox("Bu tarih aralığında kaydı olanlar")
+        self.baslangic_input = QDateEdit(); self.baslangic_input.setCalendarPopup(True)
+        self.baslangic_input.setDate(QDate.currentDate().addMonths(-1))
+        self.bitis_input = QDateEdit(); self.bitis_input.setCalendarPopup(True); self.bitis_input.setDate(QDate.currentDate())
+        for w in (self.baslangic_input, self.bitis_input):
+            w.setEnabled(False); self.tarih_kutu.toggled.connect(w.setEnabled)
+        layout.addRow("Servis:", self.servis_input)
+        layout.addRow(self.tarih_kutu)
+        layout.addRow("Başlangıç:", self.baslangic_input)
+        layout.addRow("Bitiş:", self.bitis_input)
+        btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+    def get_data(self):
+        servis = self.servis_input.currentText().strip()
+        if servis == "(Tümü)": servis = ""
+        if not self.tarih_kutu.isChecked():
+            return servis, None, None
+        return (servis,
+                self.baslangic_input.date().toString(KAYIT_TARIHI),
+                self.bitis_input.date().toString(KAYIT_TARIHI))
+
 # ------------------ ANKET ------------------
+# Her alan türü için form satırını kurar; (satır widget'ı, pencere özniteliği, okuyucular, yazıcılar)
+# döndürür. Okuyucu/yazıcılar anket_semasi.SUTUNLAR sırasıyla birebir eşleşir.
+def _secim_kurucu(etiketler: Tuple[str, str], notlu: bool = False):
+    def kur(alan: anket_semasi.Alan):
+        row = QWidget(); h = QHBoxLayout(row); h.setContentsMargins(0,0,0,0)
+        grup = QButtonGroup(row); rbs = [QRadioButton(e) for e in etiketler]
+        for rb in rbs: grup.addButton(rb); h.addWidget(rb)
+        def oku():
+            for rb, e in zip(rbs, etiketler):
+                if rb.isChecked(): return e
+            return None
+        varsayilan = etiketler[1] if notlu else None
+        def yaz(v):
+            v = varsayilan if v is None else v
+            grup.setExclusive(False)  # hepsini boşaltabilmek için
+            for rb, e in zip(rbs, etiketler): rb.setChecked(e == v)
+            grup.setExclusive(True)
+        if not notlu:
+            h.addStretch(1)
+            return row, tuple(rbs), [oku], [yaz]
+        le = QLineEdit(); le.setPlaceholderText(alan.ipucu or "Not…"); le.setMinimumWidth(220)
+        rbs[0].toggled.connect(le.setEnabled)
+        h.addWidget(le); h.addStretch(1); yaz(None); le.setEnabled(False)
+        return (row, (*rbs, le), [oku, lambda: le.text().strip() or None],
+                [yaz, lambda v: le.setText(v or "")])
+    return kur
+
+def _metin_kurucu(alan):
+    le = QLineEdit(); le.setPlaceholderText(alan.ipucu); le.setMinimumWidth(220)
+    return le, le, [lambda: le.text().strip() or None], [lambda v: le.setText("" if v is None else str(v))]
+
+def _sayi_kurucu(alan):
+    le = QLineEdit(); le.setValidator(QIntValidator(0, 999)); le.setPlaceholderText(alan.ipucu)
+    return le, le, [lambda: int(le.text()) if le.text() else None], [lambda v: le.setText("" if v is None else str(v))]
+
+def _liste_kurucu(alan):
+    cmb = QComboBox(); cmb.addItems(alan.secenekler)
+    return cmb, cmb, [lambda: cmb.currentText() or None], [lambda v: cmb.setCurrentText(v or "")]
+
+def _uzun_kurucu(alan):
+    te = QTextEdit(); te.setPlaceholderText(alan.ipucu); te.setMinimumHeight(140)
+    return te, te, [lambda: te.toPlainText().strip() or None], [lambda v: te.setPlainText("" if v is None else str(v))]
+
+ALAN_KURUCULARI = {
+    "vy": _secim_kurucu(("Var", "Yok")), "eh": _secim_kurucu(("Evet", "Hayır")),
+    "vy_not": _secim_kurucu(("Var", "Yok"), notlu=True),
+    "metin": _metin_kurucu, "sayi": _sayi_kurucu, "secim": _liste_kurucu, "uzun": _uzun_kurucu,
+}
+
+class _AnketBolumu:
+    """Bir sekme: widget'ları ilk gösterildiğinde kurulur; o zamana kadar değerleri listede tutulur."""
+    def __init__(self, baslik: str, alanlar, bas: int):
+        self.baslik, self.alanlar = baslik, alanlar
+        self.bas = bas
+        self.son = bas + sum(len(a.sutunlar) for a in alanlar)
+        self.degerler = list(anket_semasi.VARSAYILANLAR[bas:self.son])
+        self.okuyucular = self.yazicilar = None
+
+    @property
+    def kuruldu(self) -> bool:
+        return self.okuyucular is not None
+
+    def yukle(self, degerler):
+        self.degerler = list(degerler[self.bas:self.son])
+        if self.kuruldu:
+            for yaz, v in zip(self.yazicilar, self.degerler): yaz(v)
+
+    def oku(self) -> list:
+        return [oku() for oku in self.okuyucular] if self.kuruldu else self.degerler
+
 class AnketPenceresi(QDialog):
+    """Form anket_semasi.BOLUMLER'den kurulur; her bölüm bir sekmedir ve ilk açıldığında oluşturulur.
+    Pencere oturum boyunca bir kez yaratılıp bagla() ile başka hastaya bağlanır (AnaPencere.anket_ac).
+    Kurulan alanların widget'ları aynı adlı öznitelikte durur (self.ates, self.hayvan, ...)."""
     def __init__(self, hasta_id: int, parent=None):
         super().__init__(parent)
-        self.hasta_id = hasta_id
-        self.setWindowTitle("Hasta Anketi (Detaylı)")
         self.setMinimumSize(880, 640)
-        self._v = lambda pair: "Var" if pair[0].isChecked() else ("Yok" if pair[1].isChecked() else None)
-        self._e = lambda pair: "Evet" if pair[0].isChecked() else ("Hayır" if pair[1].isChecked() else None)
 
         root = QVBoxLayout(self)
         root.addWidget(QLabel("HASTA ANKETİ", self))
-        scroll = QScrollArea(self); scroll.setWidgetResizable(True); root.addWidget(scroll)
-        content = QWidget(); scroll.setWidget(content); self.form = QFormLayout(content)
-
-        def add_header(text: str):
-            lbl = QLabel(text, self); f = lbl.font(); f.setBold(True); f.setPointSize(max(11, f.pointSize()+1)); lbl.setFont(f)
-            self.form.addRow(lbl)
-
-        def add_vy(label: str):
-            row = QWidget(); h = QHBoxLayout(row); h.setContentsMargins(0,0,0,0)
-            rb1, rb2 = QRadioButton("Var"), QRadioButton("Yok")
-            h.addWidget(rb1); h.addWidget(rb2); h.addStretch(1)
-            self.form.addRow(QLabel(label), row); return rb1, rb2
-
-        def add_eh(label: str):
-            row = QWidget(); h = QHBoxLayout(row); h.setContentsMargins(0,0,0,0)
-            rb1, rb2 = QRadioButton("Evet"), QRadioButton("Hayır")
-            h.addWidget(rb1); h.addWidget(rb2); h.addStretch(1)
-            self.form.addRow(QLabel(label), row); return rb1, rb2
-
-        def add_vy_note(label: str, ph="Not…"):
-            row = QWidget(); h = QHBoxLayout(row); h.setContentsMargins(0,0,0,0)
-            rb1, rb2, le = QRadioButton("Var"), QRadioButton("Yok"), QLineEdit(); le.setPlaceholderText(ph); le.setMinimumWidth(220)
-            def toggle():
-                le.setEnabled(rb1.isChecked())
-            rb1.toggled.connect(toggle); rb2.toggled.connect(toggle); rb2.setChecked(True); toggle()
-            h.addWidget(rb1); h.addWidget(rb2); h.addWidget(le); h.addStretch(1)
-            self.form.addRow(QLabel(label), row); return rb1, rb2, le
-
-        def add_text(label: str, ph=""):
-            le = QLineEdit(); le.setPlaceholderText(ph); le.setMinimumWidth(220); self.form.addRow(QLabel(label), le); return le
-
-        def add_combo(label: str, items: List[str]):
-            cmb = QComboBox(); cmb.addItems(items); self.form.addRow(QLabel(label), cmb); return cmb
-
-        def add_int(label: str, ph="Sayı"):
-            le = QLineEdit(); le.setValidator(QIntValidator(0, 999)); le.setPlaceholderText(ph); self.form.addRow(QLabel(label), le); return le
-
-        # --- Ön tanı
-        add_header("ÖN TANI")
-        self.ates = add_vy("Ateş"); self.oksuruk = add_vy("Öksürük"); self.gece_terleme = add_vy("Gece terlemesi")
-        self.kilo_kaybi = add_vy("Kilo kaybı"); self.aile_tb = add_vy("Ailede TB hastalığı")
-        self.usye_asye = add_vy("Sık ÜSYE/ASYE öyküsü"); self.agzi_acik = add_vy("Ağzı açık uyuma")
-        self.inhaler = add_vy("İnhaler/Nebülizatör kullanım öyküsü"); self.evneb = add_vy("Evde nebülizatör cihazı")
-        self.yasam_yeri = add_combo("Yaşam yeri", ["", "Müstakil ev", "Apartman", "Diğer"])
-        self.evde_kisi = add_int("Evde yaşayan kişi sayısı")
-        self.hayvan = add_vy_note("Hayvan/Böcek teması", "Örn: kedi tırmalaması…")
-        self.cigsut = add_vy("Çiğ süt ve ürünleri tüketimi"); self.oral_aft = add_vy("Oral aft"); self.genital_ulser = add_vy("Genital ülser")
-        self.tekrarlayan = add_text("Tekrarlayan belirtiler (serbest)", "Örn: Ateş, Eklem ağrısı…")
-        self.eklem = add_vy_note("Eklemlerde ağrı/şişlik/kızarıklık", "Örn: sağ diz ağrısı…")
-        self.romatizma = add_vy("Ailede bilinen romatizmal hastalık")
-
-        # --- Özgeçmiş
-        add_header("ÖZGEÇMİŞ")
-        self.hafta = add_text("HAFTA", "Örn: 39+2"); self.nsvy_cs = add_text("NSVY - C/S", "Örn: NSVY"); self.gr = add_text("GR", "Örn: 3200 g")
-        self.kuvoz = add_eh("Küvözde kalmış mı?"); self.anne_sutu = add_eh("Anne sütü"); self.asilari = add_text("Aşıları", "Çocukluk dönemi aşı bilgisi…")
-        self.anne_yas = add_text("ANNE YAŞ"); self.anne_ss = add_text("ANNE S/S"); self.baba_yas = add_text("BABA YAŞ"); self.baba_ss = add_text("BABA S/S")
-        self.akrabalik = add_vy_note("Akrabalık", "Açıklama…")
-        self.cocuk1 = add_text("1. Çocuk (Yaş/K-E/SS)"); self.cocuk2 = add_text("2. Çocuk (Yaş/K-E/SS)")
-        self.cocuk3 = add_text("3. Çocuk (Yaş/K-E/SS)"); self.cocuk4 = add_text("4. Çocuk (Yaş/K-E/SS)")
-        self.aile_hastalik = add_vy_note("Ailede bilinen önemli hastalık", "Örn: talasemi taşıyıcılığı…")
-
-        # --- FM
-        add_header("FİZİK MUAYENE (FM)")
-        self.ta = add_text("Tansiyon (TA)"); self.n = add_text("Nabız (N)"); self.t = add_text("Vücut ısısı (T)"); self.ss = add_text("Solunum (SS)")
-        self.boy = add_text("BOY"); self.genel_durum = add_text("GENEL DURUM", "Serbest tanım…")
-        self.alerji = add_vy_note("ALERJİ", "Alerjen / açıklama…"); self.diyabet = add_vy_note("DİYABET", "Açıklama…")
-        self.orofarenks = add_text("OROFARENKS-TONSİLLER", "Bulgu…"); self.postnazal = add_vy("POSTNAZAL AKINTI")
-        self.servikal = add_text("SERVİKAL LAP", "Bulgu…"); self.solunum = add_text("SOLUNUM SESLERİ", "Doğal / açıklama…")
-        self.ral = add_vy_note("RAL","Açıklama…"); self.ronkus = add_vy_note("RONKÜS","Açıklama…")
-        self.kalp_ritim = add_eh("KALP SESLERİ RİTMİK"); self.kalp_not = add_text("KALP NOTU","Ek açıklama…")
-        self.ufurum = add_vy("ÜFÜRÜM"); self.batin = add_eh("BATIN RAHAT"); self.batin_not = add_text("BATIN NOTU","Ek açıklama…")
-        self.hsm = add_vy("HSM"); self.ense = add_vy("ENSE SERTLİĞİ"); self.mib = add_vy("MENİNGEAL İRRİTASYON BULGUSU (MİB)")
-        self.dokuntu = add_vy("DÖKÜNTÜ")
-
-        # ---------- KLİNİK GÖZLEM ----------
-        add_header("KLİNİK GÖZLEM")
-        self.klinik_gozlem = QTextEdit()
-        self.klinik_gozlem.setPlaceholderText("Klinik gözlem / notlar…")
-        self.klinik_gozlem.setMinimumHeight(140)
-        self.form.addRow(QLabel("Klinik gözlem"), self.klinik_gozlem)
+        self.sekmeler = QTabWidget(self); root.addWidget(self.sekmeler)
+        self._bolumler: List[_AnketBolumu] = []
+        bas = 0
+        for baslik, alanlar in anket_semasi.BOLUMLER:
+            b = _AnketBolumu(baslik, alanlar, bas); bas = b.son
+            self._bolumler.append(b)
+            scroll = QScrollArea(); scroll.setWidgetResizable(True)
+            self.sekmeler.addTab(scroll, baslik)
+        self.sekmeler.currentChanged.connect(self._bolumu_kur)
 
         btns = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
-        btns.accepted.connect(self.kaydet); btns.rejected.connect(self.reject); root.addWidget(btns)
-        self._son_anketi_yukle()
-
-    def _son_anketi_yukle(self):
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT * FROM anket WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (self.hasta_id,))
-        row = cur.fetchone()
-        if not row:
-            conn.close()
+        btns.accepted.connect(self.kaydet); btns.rejected.connect(self.reject)
+        btnGecmis = btns.addButton("Geçmiş…", QDialogButtonBox.ActionRole)
+        btnGecmis.clicked.connect(lambda: AnketGecmisiPenceresi(self.hasta_id, self).exec_())
+        root.addWidget(btns)
+        self.bagla(hasta_id)
+        self._bolumu_kur(self.sekmeler.currentIndex())
+
+    def _bolumu_kur(self, i: int):
+        if i < 0 or self._bolumler[i].kuruldu:
             return
-        colnames = [d[1] for d in cur.execute("PRAGMA table_info(anket)")]
-        data = dict(zip(colnames, row)); conn.close()
-
-        def set_vy(pair, key):
-            v = data.get(key)
-            if v == "Var": pair[0].setChecked(True)
-            elif v == "Yok": pair[1].setChecked(True)
-
-        def set_eh(pair, key):
-            v = data.get(key)
-            if v == "Evet": pair[0].setChecked(True)
-            elif v == "Hayır": pair[1].setChecked(True)
-
-        def set_txt(widget, key):
-            val = data.get(key)
-            if isinstance(widget, tuple):  # (rb1, rb2, le)
-                set_vy((widget[0], widget[1]), key)
-                nk = key + "_not" if key + "_not" in data else None
-                if nk:
-                    widget[2].setText(data.get(nk) or "")
-            else:
-                if hasattr(widget, "setPlainText"):
-                    widget.setPlainText("" if val is None else str(val))
-                else:
-                    widget.setText("" if val is None else str(val))
-
-        # Ön tanı
-        for pair,key in [(self.ates,"ates"),(self.oksuruk,"oksuruk"),(self.gece_terleme,"gece_terleme"),
-                         (self.kilo_kaybi,"kilo_kaybi"),(self.aile_tb,"aile_tb"),(self.usye_asye,"usye_asye"),
-                         (self.agzi_acik,"agzi_acik"),(self.inhaler,"inhaler"),(self.evneb,"evneb"),
-                         (self.cigsut,"cigsut"),(self.oral_aft,"oral_aft"),(self.genital_ulser,"genital_ulser"),
-                         (self.romatizma,"romatizma")]:
-            set_vy(pair, key)
-
-        self.yasam_yeri.setCurrentText(data.get("yasam_yeri") or "")
-        self.evde_kisi.setText("" if data.get("evde_kisi") in (None,"") else str(data.get("evde_kisi")))
-        set_vy(self.hayvan[:2], "hayvan"); self.hayvan[2].setText(data.get("hayvan_not") or "")
-        self.tekrarlayan.setText(data.get("tekrarlayan") or "")
-        set_vy(self.eklem[:2], "eklem"); self.eklem[2].setText(data.get("eklem_not") or "")
-
-        # Özgeçmiş
-        for w,k in [(self.hafta,"hafta"),(self.nsvy_cs,"nsvy_cs"),(self.gr,"gr"),(self.asilari,"asilari"),
-                    (self.anne_yas,"anne_yas"),(self.anne_ss,"anne_ss"),(self.baba_yas,"baba_yas"),(self.baba_ss,"baba_ss"),
-                    (self.cocuk1,"cocuk1"),(self.cocuk2,"cocuk2"),(self.cocuk3,"cocuk3"),(self.cocuk4,"cocuk4")]:
-            set_txt(w,k)
-        set_eh(self.kuvoz,"kuvoz"); set_eh(self.anne_sutu,"anne_sutu")
-        set_vy(self.akrabalik[:2],"akrabalik"); self.akrabalik[2].setText(data.get("akrabalik_not") or "")
-        set_vy(self.aile_hastalik[:2],"aile_hastalik"); self.aile_hastalik[2].setText(data.get("aile_hastalik_not") or "")
-
-        # FM
-        for w,k in [(self.ta,"ta"),(self.n,"n"),(self.t,"t"),(self.ss,"ss"),(self.boy,"boy"),
-                    (self.genel_durum,"genel_durum"),(self.orofarenks,"orofarenks"),(self.servikal,"servikal"),
-                    (self.solunum,"solunum"),(self.kalp_not,"kalp_not"),(self.batin_not,"batin_not"),
-                    (self.hsm,"hsm"),(self.ense,"ense"),(self.mib,"mib"),(self.dokuntu,"dokuntu")]:
-            set_txt(w,k)
-        for pair,key in [(self.postnazal,"postnazal"),(self.ufurum,"ufurum")]: set_vy(pair,key)
-        set_vy(self.alerji[:2], "alerji"); self.alerji[2].setText(data.get("alerji_not") or "")
-        set_vy(self.diyabet[:2], "diyabet"); self.diyabet[2].setText(data.get("diyabet_not") or "")
-        set_vy(self.ral[:2], "ral"); self.ral[2].setText(data.get("ral_not") or "")
-        set_vy(self.ronkus[:2], "ronkus"); self.ronkus[2].setText(data.get("ronkus_not") or "")
-        set_eh(self.kalp_ritim, "kalp_ritim"); set_eh(self.batin, "batin")
-        set_txt(self.klinik_gozlem, "klinik_gozlem")
+        b = self._bolumler[i]
+        content = QWidget(); form = QFormLayout(content)
+        okuyucular, yazicilar = [], []
+        for alan in b.alanlar:
+            satir, oznitelik, oku, yaz = ALAN_KURUCULARI[alan.tur](alan)
+            form.addRow(QLabel(alan.etiket), satir)
+            setattr(self, alan.ad, oznitelik)
+            okuyucular += oku; yazicilar += yaz
+        b.okuyucular, b.yazicilar = okuyucular, yazicilar
+        for yaz, v in zip(yazicilar, b.degerler): yaz(v)
+        self.sekmeler.widget(i).setWidget(content)
+
+    def bagla(self, hasta_id: int):
+        """Pencereyi hastanın son anketiyle doldurur (yoksa boş form); kurulmamış sekmeler kurulmaz."""
+        self.hasta_id = hasta_id
+        self.setWindowTitle(f"Hasta Anketi (Detaylı) - ID {hasta_id}")
+        son = kayitlar.son_anket(hasta_id)
+        degerler = son[anket_semasi.META:] if son else anket_semasi.VARSAYILANLAR
+        for b in self._bolumler:
+            b.yukle(degerler)
 
     def kaydet(self):
-        V, E = self._v, self._e
-        def txt(w):
-            if isinstance(w, tuple):
-                return (V((w[0],w[1])), w[2].text().strip() or None)
-            if hasattr(w, "toPlainText"):
-                return w.toPlainText().strip() or None
-            return w.text().strip() or None
-
-        # Ön tanı
-        ates, oksuruk, gece, kilo = V(self.ates), V(self.oksuruk), V(self.gece_terleme), V(self.kilo_kaybi)
-        aile_tb, usye, agzi, inhaler = V(self.aile_tb), V(self.usye_asye), V(self.agzi_acik), V(self.inhaler)
-        evneb = V(self.evneb); yasam = self.yasam_yeri.currentText() or None
-        evde_kisi = int(self.evde_kisi.text()) if self.evde_kisi.text() else None
-        hayvan, hayvan_not = txt(self.hayvan); cigsut, oral, genital = V(self.cigsut), V(self.oral_aft), V(self.genital_ulser)
-        tekrarlayan = self.tekrarlayan.text().strip() or None; eklem, eklem_not = txt(self.eklem); rom = V(self.romatizma)
-
-        # Özgeçmiş
-        hafta, nsvy_cs, gr = txt(self.hafta), txt(self.nsvy_cs), txt(self.gr)
-        kuvoz, anne_sutu = E(self.kuvoz), E(self.anne_sutu)
-        asilari = txt(self.asilari); anne_yas, anne_ss = txt(self.anne_yas), txt(self.anne_ss)
-        baba_yas, baba_ss = txt(self.baba_yas), txt(self.baba_ss)
-        akrabalik, akrabalik_not = txt(self.akrabalik)
-        cocuk1, cocuk2, cocuk3, cocuk4 = txt(self.cocuk1), txt(self.cocuk2), txt(self.cocuk3), txt(self.cocuk4)
-        aile_hastalik, aile_hastalik_not = txt(self.aile_hastalik)
-
-        # FM
-        ta, n, t, ss, boy = txt(self.ta), txt(self.n), txt(self.t), txt(self.ss), txt(self.boy)
-        genel = txt(self.genel_durum)
-        alerji, alerji_not = txt(self.alerji); diyabet, diyabet_not = txt(self.diyabet)
-        orofarenks, postnazal, servikal, solunum = txt(self.orofarenks), V(self.postnazal), txt(self.servikal), txt(self.solunum)
-        ral, ral_not = txt(self.ral); ronkus, ronkus_not = txt(self.ronkus)
-        kalp_ritim, kalp_not = E(self.kalp_ritim), txt(self.kalp_not)
-        ufurum, batin, batin_not = V(self.ufurum), E(self.batin), txt(self.batin_not)
-        hsm, ense, mib, dokuntu = V(self.hsm), V(self.ense), V(self.mib), V(self.dokuntu)
-        klinik_gozlem = txt(self.klinik_gozlem)
+        degerler = []
+        for b in self._bolumler:
+            degerler += b.oku()
+        no = anket_gecmisi.kaydet(self.hasta_id, degerler, QDateTime.currentDateTime().toString(Qt.ISODate))
+        QMessageBox.information(self, "Kaydedildi", f"Anket kaydedildi (sürüm {no})."); self.accept()
+
+class AnketGecmisiPenceresi(QDialog):
+    """Anket sürümleri: seçilen kayıtta değişen alanlar ya da o sürümün tam hali."""
+    def __init__(self, hasta_id: int, parent=None):
+        super().__init__(parent)
+        self.hasta_id = hasta_id
+        self.setWindowTitle(f"Anket Geçmişi - ID {hasta_id}"); self.resize(860, 560)
+        self.surumler = anket_gecmisi.surumler(hasta_id)
+
+        root = QVBoxLayout(self); h = QHBoxLayout(); root.addLayout(h)
+        self.liste = QListWidget(); self.liste.setMaximumWidth(260); h.addWidget(self.liste)
+        sag = QVBoxLayout(); h.addLayout(sag, 1)
+        self.tam_hal = QCheckBox("Sürümün tam hali"); sag.addWidget(self.tam_hal)
+        self.tablo = QTableWidget(0, 3); self.tablo.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tablo.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tablo.verticalHeader().setVisible(False); sag.addWidget(self.tablo)
+        btns = QDialogButtonBox(QDialogButtonBox.Close); btns.rejected.connect(self.reject); root.addWidget(btns)
+
+        for s in self.surumler:
+            self.liste.addItem(f"#{s.no}  {tarih_goster(s.created_at)} {(s.created_at or '')[11:16]}"
+                               f"  ({len(s.degisiklikler)} alan)")
+        self.liste.currentRowChanged.connect(self.goster)
+        self.tam_hal.toggled.connect(lambda _: self.goster(self.liste.currentRow()))
+        if self.surumler:
+            self.liste.setCurrentRow(0)
+        else:
+            self.liste.addItem("Kayıtlı anket yok"); self.liste.setEnabled(False)
 
-        row = {
-            "hasta_id": self.hasta_id, "created_at": QDateTime.currentDateTime().toString(Qt.ISODate),
-            "ates":ates,"oksuruk":oksuruk,"gece_terleme":gece,"kilo_kaybi":kilo,"aile_tb":aile_tb,"usye_asye":usye,
-            "agzi_acik":agzi,"inhaler":inhaler,"evneb":evneb,"yasam_yeri":yasam,"evde_kisi":evde_kisi,
-            "hayvan":hayvan,"hayvan_not":hayvan_not,"cigsut":cigsut,"oral_aft":oral,"genital_ulser":genital,
-            "tekrarlayan":tekrarlayan,"eklem":eklem,"eklem_not":eklem_not,"romatizma":rom,
-            "hafta":hafta,"nsvy_cs":nsvy_cs,"gr":gr,"kuvoz":kuvoz,"anne_sutu":anne_sutu,"asilari":asilari,
-            "anne_yas":anne_yas,"anne_ss":anne_ss,"baba_yas":baba_yas,"baba_ss":baba_ss,
-            "akrabalik":akrabalik,"akrabalik_not":akrabalik_not,
-            "cocuk1":cocuk1,"cocuk2":cocuk2,"cocuk3":cocuk3,"cocuk4":cocuk4,
-            "aile_hastalik":aile_hastalik,"aile_hastalik_not":aile_hastalik_not,
-            "ta":ta,"n":n,"t":t,"ss":ss,"boy":boy,"genel_durum":genel,
-            "alerji":alerji,"alerji_not":alerji_not,"diyabet":diyabet,"diyabet_not":diyabet_not,
-            "orofarenks":orofarenks,"postnazal":postnazal,"servikal":servikal,"solunum":solunum,
-            "ral":ral,"ral_not":ral_not,"ronkus":ronkus,"ronkus_not":ronkus_not,
-            "kalp_ritim":kalp_ritim,"kalp_not":kalp_not,"ufurum":ufurum,
-            "batin":batin,"batin_not":batin_not,"hsm":hsm,"ense":ense,"mib":mib,"dokuntu":dokuntu,
-            "klinik_gozlem": klinik_gozlem,
-        }
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cols = ",".join(row.keys()); qs = ",".join("?" for _ in row)
-        cur.execute(f"INSERT INTO anket({cols}) VALUES ({qs})", list(row.values()))
-        conn.commit(); conn.close()
-        QMessageBox.information(self, "Kaydedildi", "Anket başarıyla kaydedildi."); self.accept()
+    def goster(self, i: int):
+        if not 0 <= i < len(self.surumler):
+            return
+        s = self.surumler[i]
+        degisen = {c: (e, y) for c, e, y in s.degisiklikler}
+        if self.tam_hal.isChecked():
+            anket = anket_gecmisi.surum_getir(self.hasta_id, s.no)
+            satirlar = [(c, getattr(anket, c)) for c in anket_semasi.SUTUNLAR] if anket else []
+            basliklar = ["Alan", "Değer"]
+        else:
+            satirlar = [(c, e, y) for c, (e, y) in degisen.items()]
+            basliklar = ["Alan", "Önceki", "Yeni"]
+        self.tablo.setUpdatesEnabled(False)
+        self.tablo.setColumnCount(len(basliklar)); self.tablo.setHorizontalHeaderLabels(basliklar)
+        self.tablo.setRowCount(len(satirlar))
+        kalin = self.font(); kalin.setBold(True)
+        for r, (c, *degerler) in enumerate(satirlar):
+            for k, v in enumerate((anket_semasi.ETIKETLER[c], *degerler)):
+                item = QTableWidgetItem("" if v is None else str(v))
+                if c in degisen and len(basliklar) == 2: item.setFont(kalin)
+                self.tablo.setItem(r, k, item)
+        self.tablo.setUpdatesEnabled(True)
+
+# ------------------ Hasta listesi modeli ------------------
+class HastaModel(QAbstractTableModel):
+    """hasta tablosunu sayfa sayfa (keyset: id > son_id) getiren model.
+
+    Görünüm kaydırıldıkça canFetchMore/fetchMore ile yeni sayfa çekilir;
+    açılış ve "Tümü" tablo boyutundan bağımsız olarak tek sayfa okur.
+    """
+    BASLIKLAR = ["ID", "TC", "Ad", "Soyad", "Doğum", "Servis"]
+    SAYFA = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[tuple] = []
+        self._kosul, self._params = "", ()
+        self._son_id = 0
+        self._bitti = True
+
+    def yukle(self, kosul: str = "", params=(), ilk_sayfa: Optional[List[tuple]] = None):
+        """Filtreyi ayarlar ve ilk sayfayı getirir. kosul: ek WHERE parçası.
+
+        ilk_sayfa verilirse (arka planda önceden çekilmiş) sorgu tekrar çalıştırılmaz.
+        """
+        self.beginResetModel()
+        self._rows = []; self._kosul, self._params = kosul, tuple(params)
+        self._son_id = 0; self._bitti = False
+        self.endResetModel()
+        self._sayfa_ekle(self.sayfa_getir(kosul, self._params, 0) if ilk_sayfa is None else ilk_sayfa)
+
+    @classmethod
+    def sayfa_getir(cls, kosul: str, params: tuple, son_id: int) -> List[Hasta]:
+        # GUI dışındaki iş parçacıklarından da çağrılabilir (kendi bağlantısını kullanır)
+        ek = f" AND ({kosul})" if kosul else ""
+        return db().sorgu(
+            f"SELECT {kayitlar.secim(Hasta)} FROM hasta WHERE id > ?{ek} ORDER BY id LIMIT ?",
+            (son_id, *params, cls.SAYFA), tip=Hasta)
+
+    def _sayfa_ekle(self, yeni: List[Hasta]):
+        if len(yeni) < self.SAYFA:
+            self._bitti = True
+        if not yeni:
+            return
+        ilk = len(self._rows)
+        self.beginInsertRows(QModelIndex(), ilk, ilk + len(yeni) - 1)
+        self._rows.extend(yeni); self._son_id = yeni[-1].id
+        self.endInsertRows()
+
+    # --- Qt arayüzü ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.BASLIKLAR)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        val = self._rows[index.row()][index.column()]
+        if index.column() == 4:
+            return tarih_goster(val)
+        return "" if val is None else str(val)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.BASLIKLAR[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._bitti
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._bitti:
+            return
+        self._sayfa_ekle(self.sayfa_getir(self._kosul, self._params, self._son_id))
+
+    # --- Yardımcılar ---
+    def satir(self, r: int) -> Optional[Hasta]:
+        return self._rows[r] if 0 <= r < len(self._rows) else None
+
+    def satiri_yenile(self, r: int):
+        eski = self.satir(r)
+        if eski is None: return
+        yeni = kayitlar.hasta_getir(eski.id)
+        if yeni is None: return
+        self._rows[r] = yeni
+        self.dataChanged.emit(self.index(r, 0), self.index(r, self.columnCount() - 1))
+
+    def satir_bul(self, hasta_id: int) -> int:
+        return next((r for r, h in enumerate(self._rows) if h.id == hasta_id), -1)
+
+    def kayda_kadar_getir(self, hasta_id: int) -> int:
+        """hasta_id okunana (ya da liste bitene) kadar sayfa getirir; satır numarasını, yoksa -1 döndürür."""
+        while self._son_id < hasta_id and not self._bitti:
+            self.fetchMore()
+        return self.satir_bul(hasta_id)
+
+    def satiri_kaldir(self, r: int):
+        self.beginRemoveRows(QModelIndex(), r, r)
+        del self._rows[r]
+        self.endRemoveRows()
+
+    def yeni_kayit(self, hasta_id: int):
+        # Filtresiz ve tüm sayfalar okunmuşsa sona eklenir; değilse sırası gelince fetchMore getirir
+        if self._kosul or not self._bitti or hasta_id <= self._son_id:
+            return
+        h = kayitlar.hasta_getir(hasta_id)
+        if h is None: return
+        r = len(self._rows)
+        self.beginInsertRows(QModelIndex(), r, r)
+        self._rows.append(h); self._son_id = h.id
+        self.endInsertRows()
+
+def hasta_arama_kosulu(q: str) -> Tuple[str, tuple]:
+    """HastaModel.yukle için WHERE parçası: FTS5 varsa indeksle, yoksa katlanmış LIKE ile.
+
+    İki yol da aynı kuralı uygular: her arama kelimesi tc/ad/soyad/servis'teki bir kelimenin
+    başıyla eşleşmeli (önek; 'sah' -> 'Şahin', ama 'hin' eşleşmez).
+    """
+    if db().hasta_fts_var():
+        m = fts_sorgusu(q)
+        # Yalnızca tırnaktan oluşan aramada MATCH '' hata verir; LIKE yolu gibi süzmesiz
+        return ("id IN (SELECT rowid FROM hasta_fts WHERE hasta_fts MATCH ?)", (m,)) if m else ("1", ())
+    kosullar, params = [], []
+    for k in tr_katla(q).replace('"', "").split():
+        k = k.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        kosullar.append("(" + " OR ".join(
+            f"tr_katla({c}) LIKE ? ESCAPE '\\' OR tr_katla({c}) LIKE ? ESCAPE '\\'"
+            for c in ("tc", "ad", "soyad", "servis")) + ")")
+        params += [f"{k}%", f"% {k}%"] * 4
+    return " AND ".join(kosullar) or "1", tuple(params)
+
+class _AramaSinyalleri(QObject):
+    bitti = pyqtSignal(int, str, object, object)  # arama_no, kosul, params, ilk sayfa
+
+class HastaAramaIsi(QRunnable):
+    """Arama sorgusunun ilk sayfasını arka planda çalıştırır; sonucu sinyalle GUI'ye iletir."""
+    def __init__(self, no: int, kosul: str, params: tuple):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.no, self.kosul, self.params = no, kosul, params
+        self.sinyaller = _AramaSinyalleri()
+
+    def run(self):
+        try:
+            rows = HastaModel.sayfa_getir(self.kosul, self.params, 0)
+        except Exception:
+            rows = []
+        self.sinyaller.bitti.emit(self.no, self.kosul, self.params, rows)
+
+# ------------------ Pano ------------------
+class PanoPaneli(QWidget):
+    """Servis özeti; ozet_sayac'tan okunduğu için veritabanı boyutundan bağımsız, anında yenilenir."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        lay = QVBoxLayout(self)
+        self.lbl_hasta = QLabel(); self.lbl_tedavi = QLabel(); self.lbl_kultur = QLabel()
+        for w in (self.lbl_hasta, self.lbl_tedavi, self.lbl_kultur):
+            lay.addWidget(w)
+        lay.addWidget(QLabel("<b>Servislere göre hasta</b>"))
+        self.servis_listesi = QListWidget(); lay.addWidget(self.servis_listesi)
+
+    def yenile(self):
+        oz = pano_ozeti()
+        self.lbl_hasta.setText(f"<b>Toplam hasta:</b> {oz.toplam_hasta}")
+        self.lbl_tedavi.setText(f"<b>Aktif antibiyotik tedavisi:</b> {oz.aktif_tedavi}")
+        self.lbl_kultur.setText(f"<b>Son 7 günde üreyen kültür:</b> {oz.haftalik_kultur}")
+        self.servis_listesi.clear()
+        self.servis_listesi.addItems([f"{servis or '(servissiz)'}: {n}" for servis, n in oz.servisler])
 
 # ------------------ Ana Pencere ------------------
 class AnaPencere(QMainWindow, Ui_MainWindow):
+    ARAMA_GECIKME_MS = 250
+    PANO_YENILEME_MS = 60_000  # gün dönümü için; veri değişiklikleri bildirim yolundan gelir
+
     def __init__(self):
         super().__init__()
         self.setupUi(self)
@@ -481,15 +551,36 @@ class AnaPencere(QMainWindow, Ui_MainWindow):
         self.search_bar = QToolBar("Arama", self); self.addToolBar(Qt.TopToolBarArea, self.search_bar)
         self.search_edit = QLineEdit(self); self.search_edit.setPlaceholderText("TC, ad veya soyad…")
         self.search_edit.returnPressed.connect(self.hasta_ara)
+        # Yazarken arama: son tuştan ARAMA_GECIKME_MS sonra, sorgu arka planda
+        self._arama_zamanlayici = QTimer(self); self._arama_zamanlayici.setSingleShot(True)
+        self._arama_zamanlayici.setInterval(self.ARAMA_GECIKME_MS)
+        self._arama_zamanlayici.timeout.connect(self.hasta_ara)
+        self.search_edit.textChanged.connect(lambda _: self._arama_zamanlayici.start())
+        self._arama_havuzu = QThreadPool(self)
+        self._arama_havuzu.setMaxThreadCount(1); self._arama_havuzu.setExpiryTimeout(-1)
+        self._arama_no = 0; self._arama_isi = None
+        self._anket_penceresi: Optional[AnketPenceresi] = None
+        self.detay_pencereleri = DetayPencereleri()
         act_ara = QAction("Ara", self); act_ara.triggered.connect(self.hasta_ara)
         act_tumu = QAction("Tümü", self); act_tumu.triggered.connect(self.hasta_listele)
         self.search_bar.addWidget(self.search_edit); self.search_bar.addAction(act_ara); self.search_bar.addAction(act_tumu)
+        act_toplu = QAction("Toplu PDF", self); act_toplu.triggered.connect(self.toplu_pdf_ac)
+        act_csv = QAction("CSV Dışa Aktar", self); act_csv.triggered.connect(self.csv_disa_aktar)
+        act_ice = QAction("İçe Aktar", self); act_ice.triggered.connect(self.dosya_ice_aktar)
+        self.search_bar.addSeparator(); self.search_bar.addAction(act_toplu); self.search_bar.addAction(act_csv)
+        self.search_bar.addAction(act_ice)
 
         # Tablo
-        self.tableWidget.setSelectionBehavior(QTableWidget.SelectRows)
-        self.tableWidget.setSelectionMode(QTableWidget.SingleSelection)
-        self.tableWidget.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.tableWidget.setAlternatingRowColors(True)
+        self.hasta_model = HastaModel(self)
+        tv = self.tableHasta
+        tv.setModel(self.hasta_model)
+        tv.setSelectionBehavior(QAbstractItemView.SelectRows)
+        tv.setSelectionMode(QAbstractItemView.SingleSelection)
+        tv.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        tv.setAlternatingRowColors(True)
+        tv.setColumnHidden(0, True)
+        hdr = tv.horizontalHeader()
+        for c in range(1, 6): hdr.setSectionResizeMode(c, QHeaderView.Stretch)
 
         # Butonlar
         if hasattr(self, "btnHastaEkle"): self.btnHastaEkle.clicked.connect(self.hasta_ekle)
@@ -498,60 +589,135 @@ class AnaPencere(QMainWindow, Ui_MainWindow):
         if hasattr(self, "btnDetayGoster"): self.btnDetayGoster.clicked.connect(self.detay_ac)
         if hasattr(self, "btnAnket"): self.btnAnket.clicked.connect(self.anket_ac)
 
+        # Pano
+        self.pano = PanoPaneli(self)
+        dock = QDockWidget("Pano", self); dock.setWidget(self.pano)
+        dock.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+        self.addDockWidget(Qt.RightDockWidgetArea, dock)
+        self._pano_zamanlayici = QTimer(self); self._pano_zamanlayici.setInterval(self.PANO_YENILEME_MS)
+        self._pano_zamanlayici.timeout.connect(self.pano.yenile); self._pano_zamanlayici.start()
+        # Art arda gelen değişiklikler (toplu silme, içe aktarma) için tek yenileme
+        self._pano_gecikme = QTimer(self); self._pano_gecikme.setSingleShot(True); self._pano_gecikme.setInterval(100)
+        self._pano_gecikme.timeout.connect(self.pano.yenile)
+
+        # Bu ve diğer pencerelerin / süreçlerin yazmaları
+        bildirim.yol().degisti.connect(self._degisiklik)
+        bildirim.yol().dis_izlemeyi_baslat()
+
         self.hasta_listele()
 
+    def _degisiklik(self, d: bildirim.Degisiklik):
+        if d.varlik in ("hasta", "bakteri", "ilac"):
+            self._pano_gecikme.start()
+        if d.varlik != "hasta":
+            return
+        if d.islem == "ekle":
+            self.hasta_model.yeni_kayit(d.kayit_id); return
+        r = self.hasta_model.satir_bul(d.kayit_id)
+        if r < 0: return
+        if d.islem == "sil": self.hasta_model.satiri_kaldir(r)
+        else: self.hasta_model.satiri_yenile(r)
+
     def _secili_hasta_id(self) -> Optional[int]:
-        r = self.tableWidget.currentRow()
-        if r < 0:
-            return None
-        return try_get_int(self.tableWidget.item(r, 0))
+        satir = self.hasta_model.satir(self.tableHasta.currentIndex().row())
+        return satir.id if satir else None
 
     def anket_ac(self):
         hid = self._secili_hasta_id()
         if hid is None:
             QMessageBox.warning(self, "Uyarı", "Anket için hasta seçin!")
             return
-        dlg = AnketPenceresi(hid, self)
-        dlg.exec_()
+        # Form bir kez kurulur; sonraki açılışlarda yalnızca yeni hastaya bağlanır
+        if self._anket_penceresi is None:
+            self._anket_penceresi = AnketPenceresi(hid, self)
+        else:
+            self._anket_penceresi.bagla(hid)
+        self._anket_penceresi.exec_()
 
     def detay_ac(self):
         hid = self._secili_hasta_id()
         if hid is None:
             QMessageBox.warning(self, "Uyarı", "Detay için hasta seçin!")
             return
-        self.detay = DetayPencere(hasta_id=hid)
-        self.detay.show()
-
-    def _hasta_tabloyu_doldur(self, rows):
-        tw = self.tableWidget
-        tw.clear(); tw.setColumnCount(6)
-        tw.setHorizontalHeaderLabels(["ID", "TC", "Ad", "Soyad", "Doğum", "Servis"])
-        tw.setRowCount(0)
-        for row in rows:
-            r = tw.rowCount(); tw.insertRow(r)
-            for c, val in enumerate(row):
-                tw.setItem(r, c, QTableWidgetItem("" if val is None else str(val)))
-        tw.setColumnHidden(0, True)
-        hdr = tw.horizontalHeader(); hdr.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        for c in range(1, 6): hdr.setSectionResizeMode(c, QHeaderView.Stretch)
+        self.detay = self.detay_pencereleri.ac(hid)
+
+    def toplu_pdf_ac(self):
+        import toplu_rapor
+        servisler = sorted(s for s, _ in pano_ozeti().servisler if s)
+        dlg = TopluRaporDialog(servisler, self)
+        if dlg.exec_() != QDialog.Accepted: return
+        servis, bas, bit = dlg.get_data()
+        idler = toplu_rapor.hasta_idleri(servis or None, bas, bit)
+        if not idler:
+            QMessageBox.information(self, "Bilgi", "Seçime uyan hasta bulunamadı."); return
+        klasor = QFileDialog.getExistingDirectory(self, "PDF klasörü seç")
+        if not klasor: return
+
+        prog = QProgressDialog("Raporlar hazırlanıyor…", "İptal", 0, len(idler), self)
+        prog.setWindowModality(Qt.WindowModal); prog.setMinimumDuration(0)
+        def ilerleme(biten, toplam):
+            prog.setValue(biten); QApplication.processEvents()
+            return not prog.wasCanceled()
+        sonuclar = toplu_rapor.toplu_pdf(idler, klasor, ilerleme=ilerleme)
+        prog.close()
+        hatalar = [(hid, hata) for hid, _, hata in sonuclar if hata]
+        mesaj = f"{len(sonuclar) - len(hatalar)} / {len(idler)} rapor kaydedildi:\n{klasor}"
+        if hatalar:
+            mesaj += "\n\nHatalı:\n" + "\n".join(f"ID {hid}: {h}" for hid, h in hatalar[:10])
+        QMessageBox.information(self, "Toplu PDF", mesaj)
+
+    def csv_disa_aktar(self):
+        import disa_aktar
+        klasor = QFileDialog.getExistingDirectory(self, "CSV klasörü seç")
+        if not klasor: return
+        try:
+            sonuc = disa_aktar.tumunu_disa_aktar(klasor, "csv")
+        except Exception as e:
+            QMessageBox.critical(self, "Hata", f"Dışa aktarım başarısız:\n{e}"); return
+        QMessageBox.information(self, "Dışa Aktar", "\n".join(f"{t}: {n} satır" for t, (_, n) in sonuc.items()))
+
+    def dosya_ice_aktar(self):
+        import ice_aktar
+        turler = {"Mikrobiyoloji (antibiyogram)": "mikro", "Laboratuvar": "lab"}
+        secim, ok = QInputDialog.getItem(self, "İçe Aktar", "Dosya türü:", list(turler), 0, False)
+        if not ok: return
+        yol, _ = QFileDialog.getOpenFileName(self, "Dosya seç", "", "Metin/CSV (*.csv *.txt *.tsv);;Tümü (*)")
+        if not yol: return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            sonuc = ice_aktar.TURLER[turler[secim]](yol)
+        except Exception as e:
+            QMessageBox.critical(self, "Hata", f"İçe aktarım başarısız:\n{e}"); return
+        finally:
+            QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "İçe Aktar", sonuc.ozet())
 
     def hasta_listele(self):
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT id, tc, ad, soyad, dogum, servis FROM hasta ORDER BY id")
-        rows = cur.fetchall(); conn.close(); self._hasta_tabloyu_doldur(rows)
+        # Bekleyen ya da süren arama sonradan gelip "Tümü" listesinin üzerine yazmasın
+        self._arama_zamanlayici.stop()
+        self._arama_no += 1
+        if self._arama_isi is not None:
+            self._arama_havuzu.tryTake(self._arama_isi)
+        self.hasta_model.yukle()
+        self.pano.yenile()
 
     def hasta_ara(self):
+        self._arama_zamanlayici.stop()
         q = (self.search_edit.text() or "").strip()
-        if not q:
-            self.hasta_listele(); return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("""
-            SELECT id, tc, ad, soyad, dogum, servis
-            FROM hasta
-            WHERE tc LIKE ? OR LOWER(ad) LIKE LOWER(?) OR LOWER(soyad) LIKE LOWER(?)
-            ORDER BY id
-        """, (f"%{q}%", f"%{q}%", f"%{q}%"))
-        rows = cur.fetchall(); conn.close(); self._hasta_tabloyu_doldur(rows)
+        kosul, params = hasta_arama_kosulu(q) if q else ("", ())
+        # Henüz başlamamış eski aramayı kuyruktan at; başlamış olanın sonucu _arama_sonucu'nda elenir
+        self._arama_no += 1
+        if self._arama_isi is not None:
+            self._arama_havuzu.tryTake(self._arama_isi)
+        isi = HastaAramaIsi(self._arama_no, kosul, params)
+        isi.sinyaller.bitti.connect(self._arama_sonucu)
+        self._arama_isi = isi
+        self._arama_havuzu.start(isi)
+
+    def _arama_sonucu(self, no: int, kosul: str, params, rows):
+        if no != self._arama_no:
+            return
+        self.hasta_model.yukle(kosul, params, rows)
 
     def hasta_ekle(self):
         dlg = HastaEkleDialog("Yeni Hasta Ekle", self)
@@ -559,13 +725,19 @@ class AnaPencere(QMainWindow, Ui_MainWindow):
         tc, ad, soyad, dogum, servis = dlg.get_data()
         if not tc or not ad or not soyad:
             QMessageBox.warning(self, "Uyarı", "TC, Ad ve Soyad boş olamaz!"); return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT id FROM hasta WHERE tc=?", (tc,))
-        if cur.fetchone():
-            conn.close(); QMessageBox.warning(self, "Hata", f"Bu TC ({tc}) ile kayıtlı hasta zaten var!"); return
-        cur.execute("INSERT INTO hasta(tc, ad, soyad, dogum, servis) VALUES (?,?,?,?,?)",
-                    (tc, ad, soyad, dogum, servis))
-        conn.commit(); conn.close(); self.hasta_listele()
+        vt = db()
+        if vt.tek("SELECT id FROM hasta WHERE tc=?", (tc,)):
+            QMessageBox.warning(self, "Hata", f"Bu TC ({tc}) ile kayıtlı hasta zaten var!"); return
+        hid = vt.calistir("INSERT INTO hasta(tc, ad, soyad, dogum, servis) VALUES (?,?,?,?,?)",
+                          (tc, ad, soyad, dogum, servis)).lastrowid
+        # Filtreli ya da yarım okunmuş listeye yeni_kayit satır eklemez: filtreyi kaldır, kayda kadar getir
+        r = self.hasta_model.satir_bul(hid)
+        if r < 0:
+            self.search_edit.blockSignals(True); self.search_edit.clear(); self.search_edit.blockSignals(False)
+            self.hasta_listele()
+            r = self.hasta_model.kayda_kadar_getir(hid)
+        if r >= 0:
+            self.tableHasta.selectRow(r); self.tableHasta.scrollTo(self.hasta_model.index(r, 1))
 
     def hasta_sil(self):
         hid = self._secili_hasta_id()
@@ -574,47 +746,188 @@ class AnaPencere(QMainWindow, Ui_MainWindow):
         if QMessageBox.question(self, "Onay", "Seçili hastayı silmek istiyor musunuz?",
                                 QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes:
             return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("DELETE FROM antibiyogram WHERE bakteri_id IN (SELECT id FROM bakteri WHERE hasta_id=?)", (hid,))
-        cur.execute("DELETE FROM bakteri WHERE hasta_id=?", (hid,))
-        cur.execute("DELETE FROM ilac WHERE hasta_id=?", (hid,))
-        cur.execute("DELETE FROM anket WHERE hasta_id=?", (hid,))
-        cur.execute("DELETE FROM lab WHERE hasta_id=?", (hid,))
-        cur.execute("DELETE FROM hasta WHERE id=?", (hid,))
-        conn.commit(); conn.close(); self.hasta_listele()
+        with db().islem() as cur:
+            cur.execute("DELETE FROM antibiyogram WHERE bakteri_id IN (SELECT id FROM bakteri WHERE hasta_id=?)", (hid,))
+            cur.execute("DELETE FROM bakteri WHERE hasta_id=?", (hid,))
+            cur.execute("DELETE FROM ilac WHERE hasta_id=?", (hid,))
+            cur.execute("DELETE FROM anket WHERE hasta_id=?", (hid,))
+            cur.execute("DELETE FROM lab WHERE hasta_id=?", (hid,))
+            cur.execute("DELETE FROM hasta WHERE id=?", (hid,))
 
     def hasta_guncelle(self):
-        r = self.tableWidget.currentRow()
+        r = self.tableHasta.currentIndex().row()
         if r < 0: QMessageBox.warning(self, "Uyarı", "Güncellemek için hasta seçin!"); return
         hid = self._secili_hasta_id()
         if hid is None: QMessageBox.warning(self, "Uyarı", "Geçersiz hasta ID!"); return
 
-        tc = self.tableWidget.item(r,1).text() if self.tableWidget.item(r,1) else ""
-        ad = self.tableWidget.item(r,2).text() if self.tableWidget.item(r,2) else ""
-        soyad = self.tableWidget.item(r,3).text() if self.tableWidget.item(r,3) else ""
-        dogum = self.tableWidget.item(r,4).text() if self.tableWidget.item(r,4) else ""
-        servis = self.tableWidget.item(r,5).text() if self.tableWidget.item(r,5) else ""
+        _, tc, ad, soyad, dogum, servis = ("" if v is None else str(v) for v in self.hasta_model.satir(r))
 
         dlg = HastaEkleDialog("Hasta Güncelle", self)
         dlg.tc_input.setText(tc); dlg.ad_input.setText(ad); dlg.soyad_input.setText(soyad)
         if dogum:
-            d = QDate.fromString(dogum, "dd-MM-yyyy")
+            d = qdate_coz(dogum)
             if d.isValid(): dlg.dogum_input.setDate(d)
         dlg.servis_input.setText(servis)
 
         if dlg.exec_() != QDialog.Accepted: return
         yeni_tc, yeni_ad, yeni_soyad, yeni_dogum, yeni_servis = dlg.get_data()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT id FROM hasta WHERE tc=? AND id<>?", (yeni_tc, hid))
-        if cur.fetchone():
-            conn.close(); QMessageBox.warning(self, "Hata", f"Bu TC ({yeni_tc}) başka bir hastada kayıtlı!"); return
-        cur.execute("""UPDATE hasta SET tc=?, ad=?, soyad=?, dogum=?, servis=? WHERE id=?""",
+        vt = db()
+        if vt.tek("SELECT id FROM hasta WHERE tc=? AND id<>?", (yeni_tc, hid)):
+            QMessageBox.warning(self, "Hata", f"Bu TC ({yeni_tc}) başka bir hastada kayıtlı!"); return
+        vt.calistir("""UPDATE hasta SET tc=?, ad=?, soyad=?, dogum=?, servis=? WHERE id=?""",
                     (yeni_tc, yeni_ad, yeni_soyad, yeni_dogum, yeni_servis, hid))
-        conn.commit(); conn.close(); self.hasta_listele(); self.tableWidget.selectRow(r)
+        self.tableHasta.selectRow(r)  # satır ve pano bildirim yolundan güncellenir
         QMessageBox.information(self, "Başarılı", "Hasta bilgileri güncellendi.")
 
+# ------------------ Lab trend ------------------
+class TrendGrafigi(QWidget):
+    """Tek serinin çizgi grafiği. Seri ekran genişliği kadar noktaya (LTTB) seyreltilip
+    tek drawPolyline ile çizilir; binlerce ölçümde de yeniden boyama hızlı kalır."""
+    KENAR_SOL, KENAR_SAG, KENAR_UST, KENAR_ALT = 60, 16, 16, 28
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(480, 260); self.setMouseTracking(True)
+        self.x = self.y = ()
+        self._cizim = None  # (genişlik, seyreltilmiş x, seyreltilmiş y)
+
+    def seri_ayarla(self, x, y):
+        self.x, self.y = x, y; self._cizim = None
+        self.update()
+
+    def _alan(self):
+        return (self.KENAR_SOL, self.KENAR_UST,
+                max(self.width() - self.KENAR_SOL - self.KENAR_SAG, 1),
+                max(self.height() - self.KENAR_UST - self.KENAR_ALT, 1))
+
+    def _noktalar(self):
+        import lab_trend
+        _, _, w, _ = self._alan()
+        if self._cizim is None or self._cizim[0] != w:
+            self._cizim = (w, *lab_trend.seyrelt(self.x, self.y, w))
+        return self._cizim[1], self._cizim[2]
+
+    def _olcek(self):
+        x0, x1 = self.x[0], self.x[-1]
+        y0, y1 = min(self.y), max(self.y)
+        if x1 == x0: x0, x1 = x0 - 1, x1 + 1
+        if y1 == y0: y0, y1 = y0 - 1, y1 + 1
+        return x0, x1, y0, y1
+
+    def _ekran(self, tx, ty, olcek):
+        sol, ust, w, h = self._alan()
+        x0, x1, y0, y1 = olcek
+        return QPointF(sol + (tx - x0) / (x1 - x0) * w, ust + h - (ty - y0) / (y1 - y0) * h)
+
+    def paintEvent(self, e):
+        p = QPainter(self)
+        p.fillRect(self.rect(), self.palette().base())
+        sol, ust, w, h = self._alan()
+        p.setPen(QPen(QColor(160, 160, 160))); p.drawRect(sol, ust, w, h)
+        if not self.x:
+            p.drawText(self.rect(), Qt.AlignCenter, "Ölçüm yok"); return
+        olcek = self._olcek()
+        xs, ys = self._noktalar()
+        p.setRenderHint(QPainter.Antialiasing)
+        # 1 px kalem: kalın/kesirli kalemde kırık çizginin dış hattı hesaplanır, çok yavaşlar
+        p.setPen(QPen(QColor(30, 100, 200), 1))
+        p.drawPolyline(QPolygonF([self._ekran(a, b, olcek) for a, b in zip(xs, ys)]))
+        if len(xs) <= 60:
+            p.setBrush(QColor(30, 100, 200))
+            for a, b in zip(xs, ys):
+                p.drawEllipse(self._ekran(a, b, olcek), 2.5, 2.5)
+        # eksen etiketleri
+        p.setPen(self.palette().text().color())
+        x0, x1, y0, y1 = olcek
+        p.drawText(2, ust + 10, sol - 6, 14, Qt.AlignRight, f"{y1:.4g}")
+        p.drawText(2, ust + h - 12, sol - 6, 14, Qt.AlignRight, f"{y0:.4g}")
+        tarih = lambda t: QDateTime.fromSecsSinceEpoch(int(t)).toString("dd-MM-yyyy")
+        p.drawText(sol, ust + h + 4, w, 16, Qt.AlignLeft, tarih(self.x[0]))
+        p.drawText(sol, ust + h + 4, w, 16, Qt.AlignRight, tarih(self.x[-1]))
+
+    def mouseMoveEvent(self, e):
+        if not self.x: return
+        import bisect
+        sol, _, w, _ = self._alan()
+        x0, x1, _, _ = self._olcek()
+        t = x0 + (e.pos().x() - sol) / w * (x1 - x0)
+        i = min(bisect.bisect_left(self.x, t), len(self.x) - 1)
+        if i > 0 and t - self.x[i - 1] < self.x[i] - t: i -= 1
+        zaman = QDateTime.fromSecsSinceEpoch(int(self.x[i])).toString("dd-MM-yyyy HH:mm")
+        QToolTip.showText(e.globalPos(), f"{zaman}: {self.y[i]:g}", self)
+
+    def resizeEvent(self, e):
+        self._cizim = None
+        super().resizeEvent(e)
+
+class LabTrendPenceresi(QDialog):
+    def __init__(self, hasta_id: int, parent=None):
+        super().__init__(parent)
+        import lab_trend
+        self.setWindowTitle(f"Laboratuvar Trendi - ID {hasta_id}")
+        self.resize(760, 420)
+        self.seriler = lab_trend.lab_serileri(hasta_id)  # tek sorgu
+        lay = QVBoxLayout(self)
+        ust = QHBoxLayout(); lay.addLayout(ust)
+        self.cmb = QComboBox(); ust.addWidget(QLabel("Parametre:")); ust.addWidget(self.cmb, 1)
+        self.lbl_bilgi = QLabel(); ust.addWidget(self.lbl_bilgi)
+        self.grafik = TrendGrafigi(self); lay.addWidget(self.grafik, 1)
+        for c, d in self.seriler.degerler.items():
+            if any(v == v for v in d):
+                self.cmb.addItem(lab_trend.ETIKETLER.get(c, c), c)
+        self.cmb.currentIndexChanged.connect(self.seri_sec)
+        self.seri_sec()
+
+    def seri_sec(self, *_):
+        c = self.cmb.currentData()
+        if c is None:
+            self.grafik.seri_ayarla((), ()); self.lbl_bilgi.setText("Laboratuvar ölçümü yok."); return
+        x, y = self.seriler.seri(c)
+        self.grafik.seri_ayarla(x, y)
+        self.lbl_bilgi.setText(f"{len(x)} ölçüm, son: {y[-1]:g}")
+
 # ------------------ Detay Penceresi ------------------
+class _YuklemeSinyalleri(QObject):
+    bitti = pyqtSignal(object, object)  # iş, sonuç (hata olursa Exception)
+
+class DetayYuklemeIsi(QRunnable):
+    """DetayPencere'nin bir bölümünü (başlık, bakteri, ilaç, lab) arka planda okur."""
+    def __init__(self, no: int, parca: str, oku):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.no, self.parca, self.oku = no, parca, oku
+        self.sinyaller = _YuklemeSinyalleri()
+
+    def run(self):
+        try:
+            sonuc = self.oku()
+        except Exception as e:
+            sonuc = e
+        self.sinyaller.bitti.emit(self, sonuc)
+
+# Çalışan işler pencere kapansa da bitene kadar burada tutulur (Python nesnesi erken silinmesin).
+# İş parçacıkları süresiz yaşar; her biri kendi SQLite bağlantısını tekrar kullanır.
+_detay_havuzu: Optional[QThreadPool] = None
+_detay_isleri = set()
+
+def detay_isi_baslat(isi: DetayYuklemeIsi):
+    global _detay_havuzu
+    if _detay_havuzu is None:
+        _detay_havuzu = QThreadPool()
+        _detay_havuzu.setMaxThreadCount(4); _detay_havuzu.setExpiryTimeout(-1)
+    _detay_isleri.add(isi)
+    isi.sinyaller.bitti.connect(lambda i, _: _detay_isleri.discard(i))
+    _detay_havuzu.start(isi)
+
+def detay_isi_geri_al(isi: DetayYuklemeIsi) -> bool:
+    """Henüz başlamamış işi kuyruktan çıkarır."""
+    if _detay_havuzu is not None and _detay_havuzu.tryTake(isi):
+        _detay_isleri.discard(isi)
+        return True
+    return False
+
 class DetayPencere(QMainWindow, Ui_DetayPencere):
+    kapandi = pyqtSignal()
     BAK_SIRA, BAK_ID, BAK_KULTUR, BAK_AD, BAK_TARIH = 0, 1, 2, 3, 4
     ABG_SIRA, ABG_ID, ABG_AB, ABG_SONUC = 0, 1, 2, 3
     ABX_SIRA, ABX_ID, ABX_ILAC, ABX_BAS, ABX_BIT, ABX_DOZ = 0, 1, 2, 3, 4, 5
@@ -645,11 +958,8 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         self.btnAntibiyogramSil = _pick_ci("btnAntibiyogramSil","btnAntibiyogramSil_","btnAntibiyogramSil_2")
         self.btnAntibiyogramGuncelle = _pick_ci("btnAntibiyogramGuncelle","btnAntibiyogramGuncelle","btnAntibiyogramGuncelle_2")
 
-        # Başlık
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT ad, soyad FROM hasta WHERE id=?", (self.hasta_id,))
-        h = cur.fetchone(); conn.close()
-        self.setWindowTitle(f"Hasta Detayları - ID {self.hasta_id} - {h[0]} {h[1]}" if h else f"Hasta Detayları - ID {self.hasta_id}")
+        # Başlık (ad soyad arka planda yüklenince eklenir)
+        self.setWindowTitle(f"Hasta Detayları - ID {self.hasta_id}")
 
         # Bakteri tablosu
         t = self.tableBakteri
@@ -706,14 +1016,13 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         self._wire_print_controls()
 
         self.tableBakteri.cellClicked.connect(self.bakteri_secildi)
-        self.listele_bakteri()
-        self.listele_ilac()
 
         # Laboratuvar
         self.btnLabKaydet = getattr(self, "btnLabKaydet", None)
         self.btnLabYukle  = getattr(self, "btnLabYukle", None)
         if self.btnLabKaydet: self.btnLabKaydet.clicked.connect(self.lab_kaydet)
         if self.btnLabYukle:  self.btnLabYukle.clicked.connect(self.lab_son_kaydi_yukle)
+        if hasattr(self, "btnLabTrend"): self.btnLabTrend.clicked.connect(self.lab_trend_ac)
 
         from PyQt5.QtGui import QDoubleValidator
         def _val(*names):
@@ -725,9 +1034,44 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
              "le_ast","le_alt","le_ggt","le_alp","le_tbil","le_dbil","le_albumin",
              "le_kreatinin","le_bun","le_egfrt")
 
-        # --- ÖNEMLİ: açılışta son lab kaydını yükle
+        # Bakteri, ilaç ve son lab kaydı arka planda yüklenir; pencere beklemeden açılır
         self._lab_loading = False
-        self.lab_son_kaydi_yukle(show_message=False)
+        self._yukleme_no = 0
+        self._isler = set()
+        self._bekleyen = set()
+        self._abg_bakteri: Optional[int] = None
+        self._abg_onbellek = kayitlar.AntibiyogramOnbellegi()
+        self.yukleme_eksik = False
+        bildirim.yol().degisti.connect(self._degisiklik)
+        self.bagla(self.hasta_id)
+
+    def bagla(self, hasta_id: int, sor: bool = True) -> bool:
+        """Pencereyi başka bir hastaya bağlar (setupUi tekrarlanmaz); bölümler arka planda yüklenir.
+
+        Kaydedilmemiş lab girişi varsa önce sorulur (sor=False ise bağlanmaz); vazgeçilirse False.
+        """
+        if self.kaydedilmemis() and (not sor or QMessageBox.question(
+                self, "Kaydedilmemiş değerler",
+                "Bu penceredeki kaydedilmemiş laboratuvar değerleri silinecek. Devam edilsin mi?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No) != QMessageBox.Yes):
+            return False
+        self.yuklemeyi_iptal_et()
+        self.hasta_id = int(hasta_id)
+        self.setWindowTitle(f"Hasta Detayları - ID {self.hasta_id}")
+        for t in (self.tableBakteri, self.tableAntibiyogram, self.tableilac):
+            if t: t.setRowCount(0)
+        for w in self._lab_alanlari(): w.clear()
+        self._abg_bakteri = None
+        self._abg_onbellek.yenile({})
+        self.arka_planda_yukle()
+        return True
+
+    def _lab_alanlari(self) -> List[QLineEdit]:
+        return [w for w in self.findChildren(QLineEdit) if w.objectName().startswith("le_")]
+
+    def kaydedilmemis(self) -> bool:
+        """Kullanıcının değiştirip kaydetmediği lab alanı var mı."""
+        return any(w.isModified() for w in self._lab_alanlari())
 
     # --- Yazdır bağlama ---
     def _wire_print_controls(self):
@@ -763,69 +1107,192 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
                 if not (btn.toolTip() or ""):
                     btn.setToolTip("Raporu yazdır (Ctrl+P)")
 
-    # --- Yardımcı metodlar ---
-    def _table_exists(self, cur, name: str) -> bool:
-        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,))
-        return cur.fetchone() is not None
+    # --- Arka planda yükleme ---
+    def _yukleyiciler(self):
+        hid = self.hasta_id
+        def bakteri():
+            return kayitlar.bakteriler(hid), kayitlar.hastanin_antibiyogramlari(hid)
+        return {
+            "baslik": (lambda: kayitlar.hasta_getir(hid), self._baslik_doldur, ()),
+            "bakteri": (bakteri, lambda r: self._bakteri_doldur(*r), ("widgetbakteri", "widgetantibiyogram")),
+            "ilac": (lambda: kayitlar.ilaclar(hid), self._ilac_doldur, ("widgeilac",)),
+            "lab": (lambda: kayitlar.son_lab(hid), self._lab_doldur, ("grpLaboratuvar",)),
+        }
 
-    def _q(self, cur, sql, params=()):
-        cur.execute(sql, params)
-        return cur.fetchall()
+    def _bolum_etkin(self, widgetlar, etkin: bool):
+        for ad in widgetlar:
+            w = getattr(self, ad, None)
+            if w is not None: w.setEnabled(etkin)
+
+    def arka_planda_yukle(self):
+        """Her bölüm ayrı bir işte paralel okunur; bölüm verisi gelene kadar devre dışı kalır."""
+        self.yuklemeyi_iptal_et()
+        self.yukleme_eksik = False
+        self._yukleyici = self._yukleyiciler()
+        for parca, (oku, _, widgetlar) in self._yukleyici.items():
+            self._bolum_etkin(widgetlar, False)
+            isi = DetayYuklemeIsi(self._yukleme_no, parca, oku)
+            isi.sinyaller.bitti.connect(self._parca_geldi)
+            self._isler.add(isi); self._bekleyen.add(parca)
+            detay_isi_baslat(isi)
+
+    def yuklemeyi_iptal_et(self):
+        # Başlamamış işler kuyruktan alınır; çalışanların sonucu yükleme numarasından elenir
+        self._yukleme_no += 1
+        for isi in list(self._isler):
+            if detay_isi_geri_al(isi): self._isler.discard(isi)
+        if self._bekleyen:
+            self.yukleme_eksik = True  # yeniden gösterilirse baştan yüklenir (DetayPencereleri.ac)
+        self._bekleyen.clear()
+
+    def _parca_geldi(self, isi, sonuc):
+        self._isler.discard(isi)
+        if isi.no != self._yukleme_no or isi.parca not in self._bekleyen:
+            return
+        self._bekleyen.discard(isi.parca)
+        _, doldur, widgetlar = self._yukleyici[isi.parca]
+        self._bolum_etkin(widgetlar, True)
+        if isinstance(sonuc, Exception):
+            QMessageBox.warning(self, "Uyarı", f"Veriler okunamadı ({isi.parca}):\n{sonuc}"); return
+        doldur(sonuc)
+
+    def closeEvent(self, e):
+        self.yuklemeyi_iptal_et()
+        super().closeEvent(e)
+        self.kapandi.emit()
+
+    def _baslik_doldur(self, h: Optional[Hasta]):
+        if h: self.setWindowTitle(f"Hasta Detayları - ID {self.hasta_id} - {h.ad} {h.soyad}")
 
     # --- Olaylar / Listeleme ---
+    # Tam liste yalnızca açılışta ve bakteri değişince okunur; ekle/sil/güncelle yalnızca etkilenen
+    # satırı yazar (lastrowid / rowcount). rowcount 0 ise satır başka yerden değişmiştir: tam yenileme.
     def bakteri_secildi(self, row: int, _col: int):
         it = self.tableBakteri.item(row, self.BAK_ID)
         if it: self.listele_antibiyogram(it.text())
 
     def listele_bakteri(self):
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("""SELECT id, kultur_ornegi, isim, ureme_tarihi FROM bakteri WHERE hasta_id=?""", (self.hasta_id,))
-        rows = cur.fetchall(); conn.close()
-        t = self.tableBakteri; t.setRowCount(0)
-        for sira, (bid, kultur, ad, tarih) in enumerate(rows, start=1):
-            r = t.rowCount(); t.insertRow(r)
-            t.setItem(r, self.BAK_SIRA, QTableWidgetItem(str(sira))); t.item(r, self.BAK_SIRA).setTextAlignment(Qt.AlignCenter)
-            t.setItem(r, self.BAK_ID, QTableWidgetItem(str(bid)))
-            t.setItem(r, self.BAK_KULTUR, QTableWidgetItem(kultur or ""))
-            t.setItem(r, self.BAK_AD, QTableWidgetItem(ad or ""))
-            t.setItem(r, self.BAK_TARIH, QTableWidgetItem(tarih or "")); t.item(r, self.BAK_TARIH).setTextAlignment(Qt.AlignCenter)
+        self._bakteri_doldur(kayitlar.bakteriler(self.hasta_id), kayitlar.hastanin_antibiyogramlari(self.hasta_id))
+
+    def _bakteri_doldur(self, rows, antibiyogramlar):
+        # Tüm bakterilerin sonuçları önbelleğe alınır; bakteriler arası geçiş sorgu yapmaz
+        self._abg_onbellek.yenile({b.id: antibiyogramlar.get(b.id, []) for b in rows})
+        t = self.tableBakteri
+        with tablo_guncelleme(t):
+            t.setRowCount(len(rows))
+            for r, b in enumerate(rows):
+                self._bakteri_satiri(r, b)
+            if rows: t.selectRow(0)
         if rows:
-            t.selectRow(0); self.listele_antibiyogram(str(rows[0][0]))
+            self.listele_antibiyogram(str(rows[0].id))
         else:
-            if self.tableAntibiyogram: self.tableAntibiyogram.setRowCount(0)
+            self._antibiyogram_doldur([])
+
+    def _bakteri_satiri(self, r: int, b: Bakteri):
+        t = self.tableBakteri
+        t.setItem(r, self.BAK_SIRA, QTableWidgetItem(str(r + 1))); t.item(r, self.BAK_SIRA).setTextAlignment(Qt.AlignCenter)
+        t.setItem(r, self.BAK_ID, QTableWidgetItem(str(b.id)))
+        t.setItem(r, self.BAK_KULTUR, QTableWidgetItem(b.kultur_ornegi or ""))
+        t.setItem(r, self.BAK_AD, QTableWidgetItem(b.isim or ""))
+        t.setItem(r, self.BAK_TARIH, QTableWidgetItem(tarih_goster(b.ureme_tarihi))); t.item(r, self.BAK_TARIH).setTextAlignment(Qt.AlignCenter)
 
     def listele_antibiyogram(self, bakteri_id: str):
         if not self.tableAntibiyogram: return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("SELECT id, antibiyotik, sonuc FROM antibiyogram WHERE bakteri_id=? ORDER BY id", (bakteri_id,))
-        rows = cur.fetchall(); conn.close()
-        t = self.tableAntibiyogram; t.setRowCount(0)
-        for sira, (aid, ab, sonuc) in enumerate(rows, start=1):
-            r = t.rowCount(); t.insertRow(r)
-            t.setItem(r, self.ABG_SIRA, QTableWidgetItem(str(sira)))
-            t.setItem(r, self.ABG_ID, QTableWidgetItem(str(aid)))
-            t.setItem(r, self.ABG_AB, QTableWidgetItem(ab or ""))
-            t.setItem(r, self.ABG_SONUC, QTableWidgetItem(sonuc or ""))
-            t.item(r, self.ABG_SIRA).setTextAlignment(Qt.AlignCenter)
-            t.item(r, self.ABG_SONUC).setTextAlignment(Qt.AlignCenter)
+        self._antibiyogram_doldur(self._abg_onbellek.getir(int(bakteri_id)), int(bakteri_id))
+
+    def _antibiyogram_doldur(self, rows, bakteri_id: Optional[int] = None):
+        self._abg_bakteri = bakteri_id  # tabloda sonuçları gösterilen bakteri
+        if not self.tableAntibiyogram: return
+        t = self.tableAntibiyogram
+        with tablo_guncelleme(t):
+            t.setRowCount(len(rows))
+            for r, a in enumerate(rows):
+                self._antibiyogram_satiri(r, a)
+
+    def _antibiyogram_satiri(self, r: int, a: Antibiyogram):
+        t = self.tableAntibiyogram
+        t.setItem(r, self.ABG_SIRA, QTableWidgetItem(str(r + 1)))
+        t.setItem(r, self.ABG_ID, QTableWidgetItem(str(a.id)))
+        t.setItem(r, self.ABG_AB, QTableWidgetItem(a.antibiyotik or ""))
+        t.setItem(r, self.ABG_SONUC, QTableWidgetItem(a.sonuc or ""))
+        t.item(r, self.ABG_SIRA).setTextAlignment(Qt.AlignCenter)
+        t.item(r, self.ABG_SONUC).setTextAlignment(Qt.AlignCenter)
 
     def listele_ilac(self):
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("""SELECT id, ilac, baslangic, bitis, dozaj FROM ilac
-                       WHERE hasta_id=? ORDER BY id""", (self.hasta_id,))
-        rows = cur.fetchall(); conn.close()
-        t = self.tableilac; t.setRowCount(0)
-        for sira, (kid, ad, bas, bit, doz) in enumerate(rows, start=1):
-            r = t.rowCount(); t.insertRow(r)
-            t.setItem(r, self.ABX_SIRA, QTableWidgetItem(str(sira)))
-            t.setItem(r, self.ABX_ID, QTableWidgetItem(str(kid)))
-            t.setItem(r, self.ABX_ILAC, QTableWidgetItem(ad or ""))
-            t.setItem(r, self.ABX_BAS, QTableWidgetItem(bas or ""))
-            t.setItem(r, self.ABX_BIT, QTableWidgetItem(bit or ""))
-            t.setItem(r, self.ABX_DOZ, QTableWidgetItem(doz or ""))
-            t.item(r, self.ABX_SIRA).setTextAlignment(Qt.AlignCenter)
-            t.item(r, self.ABX_BAS).setTextAlignment(Qt.AlignCenter)
-            t.item(r, self.ABX_BIT).setTextAlignment(Qt.AlignCenter)
+        self._ilac_doldur(kayitlar.ilaclar(self.hasta_id))
+
+    def _ilac_doldur(self, rows):
+        t = self.tableilac
+        with tablo_guncelleme(t):
+            t.setRowCount(len(rows))
+            for r, i in enumerate(rows):
+                self._ilac_satiri(r, i)
+
+    def _ilac_satiri(self, r: int, i: Ilac):
+        t = self.tableilac
+        t.setItem(r, self.ABX_SIRA, QTableWidgetItem(str(r + 1)))
+        t.setItem(r, self.ABX_ID, QTableWidgetItem(str(i.id)))
+        t.setItem(r, self.ABX_ILAC, QTableWidgetItem(i.ilac or ""))
+        t.setItem(r, self.ABX_BAS, QTableWidgetItem(tarih_goster(i.baslangic)))
+        t.setItem(r, self.ABX_BIT, QTableWidgetItem(tarih_goster(i.bitis)))
+        t.setItem(r, self.ABX_DOZ, QTableWidgetItem(i.dozaj or ""))
+        t.item(r, self.ABX_SIRA).setTextAlignment(Qt.AlignCenter)
+        t.item(r, self.ABX_BAS).setTextAlignment(Qt.AlignCenter)
+        t.item(r, self.ABX_BIT).setTextAlignment(Qt.AlignCenter)
+
+    # Tek satırlık değişiklikler; satir_yaz(r, kayıt) yukarıdaki _*_satiri metotlarıdır
+    def _satir_ekle(self, t: QTableWidget, satir_yaz, kayit, sec: bool = True):
+        with tablo_guncelleme(t):
+            r = t.rowCount(); t.insertRow(r); satir_yaz(r, kayit)
+        if sec: t.selectRow(r)
+
+    def _satir_sil(self, t: QTableWidget, r: int, sira_sutunu: int):
+        with tablo_guncelleme(t):
+            t.removeRow(r)
+            for k in range(r, t.rowCount()):
+                t.item(k, sira_sutunu).setText(str(k + 1))
+
+    # --- Bildirimler ---
+    # Bu pencerenin kendi yazmaları da gelir; satır zaten güncelse ekleme/silme atlanır.
+    def _degisiklik(self, d: bildirim.Degisiklik):
+        if d.hasta_id != self.hasta_id:
+            return
+        if d.varlik == "hasta":
+            if d.islem == "sil": self.close()
+            else: self._baslik_doldur(kayitlar.hasta_getir(self.hasta_id))
+        elif d.varlik == "bakteri":
+            if d.islem == "sil":
+                self._abg_onbellek.gecersiz(d.kayit_id)
+                if self._abg_bakteri == d.kayit_id: self._antibiyogram_doldur([])
+            self._satiri_esitle(self.tableBakteri, self.BAK_ID, self.BAK_SIRA, d, Bakteri, self._bakteri_satiri)
+        elif d.varlik == "antibiyogram":
+            self._abg_onbellek.gecersiz(d.bakteri_id)
+            if self.tableAntibiyogram and d.bakteri_id == self._abg_bakteri:
+                self._satiri_esitle(self.tableAntibiyogram, self.ABG_ID, self.ABG_SIRA, d,
+                                    Antibiyogram, self._antibiyogram_satiri)
+        elif d.varlik == "ilac":
+            self._satiri_esitle(self.tableilac, self.ABX_ID, self.ABX_SIRA, d, Ilac, self._ilac_satiri)
+        elif d.varlik == "lab" and d.islem == "ekle":
+            # Kaydedilmemiş girişin üzerine yazılmaz
+            if not self.kaydedilmemis():
+                self._lab_doldur(kayitlar.son_lab(self.hasta_id))
+
+    def _satiri_esitle(self, t: QTableWidget, id_sutunu: int, sira_sutunu: int, d, tip, satir_yaz):
+        if ("bakteri" if d.varlik == "antibiyogram" else d.varlik) in self._bekleyen:
+            return  # bölüm henüz yükleniyor
+        r = next((k for k in range(t.rowCount()) if t.item(k, id_sutunu).text() == str(d.kayit_id)), -1)
+        if d.islem == "sil":
+            if r >= 0: self._satir_sil(t, r, sira_sutunu)
+            return
+        if d.islem == "ekle" and r >= 0:
+            return
+        kayit = kayitlar.kayit_getir(d.varlik, tip, d.kayit_id)
+        if kayit is None:
+            return
+        if r < 0:
+            self._satir_ekle(t, satir_yaz, kayit, sec=False)
+        else:
+            with tablo_guncelleme(t): satir_yaz(r, kayit)
 
     # --- Ekle / Sil / Güncelle ---
     def bakteri_ekle(self):
@@ -834,10 +1301,12 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         kultur, ad, tarih = dlg.get_data()
         if not ad:
             QMessageBox.warning(self, "Uyarı", "Bakteri adı boş olamaz!"); return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("INSERT INTO bakteri(kultur_ornegi, isim, ureme_tarihi, hasta_id) VALUES (?,?,?,?)",
-                    (kultur, ad, tarih, self.hasta_id))
-        conn.commit(); conn.close(); self.listele_bakteri()
+        cur = db().calistir("INSERT INTO bakteri(kultur_ornegi, isim, ureme_tarihi, hasta_id) VALUES (?,?,?,?)",
+                            (kultur, ad, tarih, self.hasta_id))
+        b = Bakteri(cur.lastrowid, self.hasta_id, kultur, ad, tarih)
+        self._satir_ekle(self.tableBakteri, self._bakteri_satiri, b)
+        self._abg_onbellek.koy(b.id, [])  # yeni bakterinin sonucu yok
+        self._antibiyogram_doldur([], b.id)
 
     def bakteri_sil(self):
         r = self.tableBakteri.currentRow()
@@ -845,11 +1314,15 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         bid = self.tableBakteri.item(r, self.BAK_ID).text()
         if QMessageBox.question(self, "Onay", "Seçili bakteriyi silmek istiyor musunuz?",
                                 QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes: return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("DELETE FROM antibiyogram WHERE bakteri_id=?", (bid,))
-        cur.execute("DELETE FROM bakteri WHERE id=?", (bid,))
-        conn.commit(); conn.close(); self.listele_bakteri()
-        if self.tableAntibiyogram: self.tableAntibiyogram.setRowCount(0)
+        with db().islem() as cur:
+            cur.execute("DELETE FROM antibiyogram WHERE bakteri_id=?", (bid,))
+            silinen = cur.execute("DELETE FROM bakteri WHERE id=?", (bid,)).rowcount
+        self._abg_onbellek.gecersiz(int(bid))
+        if not silinen:
+            self.listele_bakteri(); return
+        self._satir_sil(self.tableBakteri, r, self.BAK_SIRA)
+        self.tableBakteri.clearSelection()
+        self._antibiyogram_doldur([])
 
     def bakteri_guncelle(self):
         r = self.tableBakteri.currentRow()
@@ -861,15 +1334,16 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         dlg = BakteriEkleDialog("Bakteri Güncelle")
         dlg.kultur_input.setCurrentText(kultur); dlg.bakteri_input.setText(isim)
         if tarih:
-            d = QDate.fromString(tarih, "dd-MM-yyyy")
-            if not d.isValid(): d = QDate.fromString(tarih, "yyyy-MM-dd")
+            d = qdate_coz(tarih)
             if d.isValid(): dlg.tarih_input.setDate(d)
         if dlg.exec_() != QDialog.Accepted: return
         yeni_kultur, yeni_isim, yeni_tarih = dlg.get_data()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("UPDATE bakteri SET kultur_ornegi=?, isim=?, ureme_tarihi=? WHERE id=?",
-                    (yeni_kultur, yeni_isim, yeni_tarih, bid))
-        conn.commit(); conn.close(); self.listele_bakteri()
+        cur = db().calistir("UPDATE bakteri SET kultur_ornegi=?, isim=?, ureme_tarihi=? WHERE id=?",
+                            (yeni_kultur, yeni_isim, yeni_tarih, bid))
+        if not cur.rowcount:
+            self.listele_bakteri(); return
+        with tablo_guncelleme(self.tableBakteri):
+            self._bakteri_satiri(r, Bakteri(int(bid), self.hasta_id, yeni_kultur, yeni_isim, yeni_tarih))
 
     def antibiyogram_ekle(self):
         row = self.tableBakteri.currentRow()
@@ -882,21 +1356,25 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
             d = AntibiyogramEkleDialog("Antibiyogram Ekle")
             if d.exec_() != QDialog.Accepted: return
             ab, sonuc = d.get_data()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("INSERT INTO antibiyogram (bakteri_id, antibiyotik, sonuc) VALUES (?,?,?)", (bid, ab, sonuc))
-        conn.commit(); conn.close(); self.listele_antibiyogram(bid)
+        cur = db().calistir("INSERT INTO antibiyogram (bakteri_id, antibiyotik, sonuc) VALUES (?,?,?)", (bid, ab, sonuc))
+        self._abg_onbellek.gecersiz(int(bid))
+        if self._abg_bakteri == int(bid) and self.tableAntibiyogram:
+            self._satir_ekle(self.tableAntibiyogram, self._antibiyogram_satiri,
+                             Antibiyogram(cur.lastrowid, int(bid), ab, sonuc))
+        else:
+            self.listele_antibiyogram(bid)
 
     def antibiyogram_sil(self):
         if not self.tableAntibiyogram: return
         r = self.tableAntibiyogram.currentRow()
         if r < 0: QMessageBox.warning(self, "Uyarı", "Silmek için antibiyogram seçin!"); return
         abid = self.tableAntibiyogram.item(r, self.ABG_ID).text()
-        br = self.tableBakteri.currentRow()
-        if br < 0: return
-        bid = self.tableBakteri.item(br, self.BAK_ID).text()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("DELETE FROM antibiyogram WHERE id=?", (abid,))
-        conn.commit(); conn.close(); self.listele_antibiyogram(bid)
+        silindi = db().calistir("DELETE FROM antibiyogram WHERE id=?", (abid,)).rowcount
+        if self._abg_bakteri is not None: self._abg_onbellek.gecersiz(self._abg_bakteri)
+        if silindi:
+            self._satir_sil(self.tableAntibiyogram, r, self.ABG_SIRA)
+        elif self._abg_bakteri is not None:
+            self.listele_antibiyogram(str(self._abg_bakteri))
 
     def antibiyogram_guncelle(self):
         if not self.tableAntibiyogram: return
@@ -910,22 +1388,21 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         if idx >= 0: dlg.sonuc_input.setCurrentIndex(idx)
         if dlg.exec_() != QDialog.Accepted: return
         yeni_ab, yeni_sonuc = dlg.get_data()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("UPDATE antibiyogram SET antibiyotik=?, sonuc=? WHERE id=?", (yeni_ab, yeni_sonuc, abid))
-        conn.commit(); conn.close()
-        br = self.tableBakteri.currentRow()
-        if br >= 0:
-            bid = self.tableBakteri.item(br, self.BAK_ID).text()
-            self.listele_antibiyogram(bid)
+        cur = db().calistir("UPDATE antibiyogram SET antibiyotik=?, sonuc=? WHERE id=?", (yeni_ab, yeni_sonuc, abid))
+        if self._abg_bakteri is not None: self._abg_onbellek.gecersiz(self._abg_bakteri)
+        if cur.rowcount:
+            with tablo_guncelleme(self.tableAntibiyogram):
+                self._antibiyogram_satiri(r, Antibiyogram(int(abid), self._abg_bakteri, yeni_ab, yeni_sonuc))
+        elif self._abg_bakteri is not None:
+            self.listele_antibiyogram(str(self._abg_bakteri))
 
     def ilac_ekle(self):
         dlg = IlacEkleDialog("İlaç Ekle")
         if dlg.exec_() != QDialog.Accepted: return
         ilac, bas, bit, doz = dlg.get_data()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("""INSERT INTO ilac(ilac, baslangic, bitis, dozaj, hasta_id)
-                       VALUES (?,?,?,?,?)""", (ilac, bas, bit, doz, self.hasta_id))
-        conn.commit(); conn.close(); self.listele_ilac()
+        cur = db().calistir("""INSERT INTO ilac(ilac, baslangic, bitis, dozaj, hasta_id)
+                               VALUES (?,?,?,?,?)""", (ilac, bas, bit, doz, self.hasta_id))
+        self._satir_ekle(self.tableilac, self._ilac_satiri, Ilac(cur.lastrowid, self.hasta_id, ilac, bas, bit, doz))
 
     def ilac_sil(self):
         r = self.tableilac.currentRow()
@@ -933,9 +1410,10 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         ilac_id = self.tableilac.item(r, self.ABX_ID).text()
         if QMessageBox.question(self, "Onay", "Seçili kaydı silmek istiyor musunuz?",
                                 QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes: return
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("DELETE FROM ilac WHERE id=?", (ilac_id,))
-        conn.commit(); conn.close(); self.listele_ilac()
+        if db().calistir("DELETE FROM ilac WHERE id=?", (ilac_id,)).rowcount:
+            self._satir_sil(self.tableilac, r, self.ABX_SIRA)
+        else:
+            self.listele_ilac()
 
     def ilac_guncelle(self):
         r = self.tableilac.currentRow()
@@ -947,23 +1425,26 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         doz = self.tableilac.item(r, self.ABX_DOZ).text()
         dlg = IlacEkleDialog("İlaç Güncelle"); dlg.ilac_input.setText(ilac)
         if bas:
-            d = QDate.fromString(bas, "dd-MM-yyyy")
-            if not d.isValid(): d = QDate.fromString(bas, "yyyy-MM-dd")
+            d = qdate_coz(bas)
             if d.isValid(): dlg.baslangic_input.setDate(d)
         if bit:
-            d = QDate.fromString(bit, "dd-MM-yyyy")
-            if not d.isValid(): d = QDate.fromString(bit, "yyyy-MM-dd")
+            d = qdate_coz(bit)
             if d.isValid(): dlg.bitis_input.setDate(d)
         dlg.dozaj_input.setText(doz)
         if dlg.exec_() != QDialog.Accepted: return
         yeni_ilac, yeni_bas, yeni_bit, yeni_doz = dlg.get_data()
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        cur.execute("""UPDATE ilac
-                       SET ilac=?, baslangic=?, bitis=?, dozaj=? WHERE id=?""",
-                    (yeni_ilac, yeni_bas, yeni_bit, yeni_doz, ilac_id))
-        conn.commit(); conn.close(); self.listele_ilac()
+        cur = db().calistir("""UPDATE ilac
+                               SET ilac=?, baslangic=?, bitis=?, dozaj=? WHERE id=?""",
+                            (yeni_ilac, yeni_bas, yeni_bit, yeni_doz, ilac_id))
+        if not cur.rowcount:
+            self.listele_ilac(); return
+        with tablo_guncelleme(self.tableilac):
+            self._ilac_satiri(r, Ilac(int(ilac_id), self.hasta_id, yeni_ilac, yeni_bas, yeni_bit, yeni_doz))
 
     # --------- Laboratuvar yardımcı/kaydet/yükle ---------
+    def lab_trend_ac(self):
+        LabTrendPenceresi(self.hasta_id, self).exec_()
+
     def lab_kaydet(self):
         G = lambda name: getattr(self, name, None)
         def num(w):
@@ -1001,24 +1482,15 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
             "egfrt":     num(G("le_egfrt")),
         }
 
-        conn = None
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
             cols = ",".join(row.keys())
             qs = ",".join("?" for _ in row)
-            cur.execute(f"INSERT INTO lab({cols}) VALUES({qs})", list(row.values()))
-            conn.commit()
+            db().calistir(f"INSERT INTO lab({cols}) VALUES({qs})", list(row.values()))
         except Exception as e:
-            if conn:
-                try: conn.rollback()
-                except: pass
             QMessageBox.critical(self, "Hata", f"Kayıt başarısız:\n{e}")
             return
-        finally:
-            if conn:
-                try: conn.close()
-                except: pass
+        # Kaydedilenler artık "kaydedilmemiş giriş" sayılmaz; diğer pencerelerin lab kayıtları gelebilir
+        for w in self._lab_alanlari(): w.setModified(False)
         self.lab_son_kaydi_yukle(show_message=False)
         QMessageBox.information(self, "Kaydedildi", "Laboratuvar verileri kaydedildi.")
 
@@ -1028,162 +1500,48 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
             return
         self._lab_loading = True
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM lab WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (self.hasta_id,))
-            row = cur.fetchone()
-            cols = [d[1] for d in cur.execute("PRAGMA table_info(lab)")]
-            conn.close()
-
-            if not row:
+            son = kayitlar.son_lab(self.hasta_id)
+            if not son:
                 if show_message:
                     QMessageBox.information(self, "Bilgi", "Bu hasta için laboratuvar kaydı bulunamadı.")
                 return
-
-            data = dict(zip(cols, row))
-
-            def setv(obj, key):
-                w = getattr(self, obj, None)
-                if w is not None:
-                    v = data.get(key)
-                    w.setText("" if v is None else str(v))
-
-            setv("le_ppd", "ppd")
-            for obj, key in [
-                ("le_crp","crp"),("le_lokosit","lokosit"),("le_lenfosit","lenfosit"),
-                ("le_notrofil","notrofil"),("le_pct","pct"),
-                ("le_glukoz","glukoz"),("le_na","na"),("le_cl","cl"),("le_p","p"),("le_mg","mg"),
-                ("le_ast","ast"),("le_alt","alt"),("le_ggt","ggt"),("le_alp","alp"),
-                ("le_tbil","tbil"),("le_dbil","dbil"),("le_albumin","albumin"),
-                ("le_kreatinin","kreatinin"),("le_bun","bun"),("le_egfrt","egfrt"),
-            ]:
-                setv(obj, key)
+            self._lab_doldur(son)
         finally:
             self._lab_loading = False
 
+    def _lab_doldur(self, son):
+        if not son:
+            return
+        def setv(obj, key):
+            w = getattr(self, obj, None)
+            if w is not None:
+                v = getattr(son, key, None)
+                w.setText("" if v is None else str(v))
+
+        setv("le_ppd", "ppd")
+        for obj, key in [
+            ("le_crp","crp"),("le_lokosit","lokosit"),("le_lenfosit","lenfosit"),
+            ("le_notrofil","notrofil"),("le_pct","pct"),
+            ("le_glukoz","glukoz"),("le_na","na"),("le_cl","cl"),("le_p","p"),("le_mg","mg"),
+            ("le_ast","ast"),("le_alt","alt"),("le_ggt","ggt"),("le_alp","alp"),
+            ("le_tbil","tbil"),("le_dbil","dbil"),("le_albumin","albumin"),
+            ("le_kreatinin","kreatinin"),("le_bun","bun"),("le_egfrt","egfrt"),
+        ]:
+            setv(obj, key)
+        for w in self._lab_alanlari(): w.setModified(False)
+
     # --------- CSV ve YAZDIR ---------
     def yazdir_rapor(self):
-        import html
-        hid = int(self.hasta_id)
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-
-        # Hasta
-        cur.execute("SELECT id, tc, ad, soyad, dogum, servis FROM hasta WHERE id=?", (hid,))
-        h = cur.fetchone()
-        if not h:
+        # Yazdırma desteği ve rapor üretimi ilk kullanımda yüklenir (açılışı yavaşlatmasın)
+        from PyQt5.QtGui import QTextDocument
+        from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
+        from rapor import rapor_html, rapor_verisi_yukle, varsayilan_dosya_adi
+        rapor = rapor_verisi_yukle(int(self.hasta_id))
+        if rapor is None:
             QMessageBox.warning(self, "Uyarı", "Hasta bulunamadı!")
-            conn.close()
             return
-        h_id, tc, ad, soyad, dogum, servis = h
-
-        # Son Anket (varsa)
-        last_anket = None; anket_cols = []
-        if self._table_exists(cur, "anket"):
-            cur.execute("SELECT * FROM anket WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (hid,))
-            last_anket = cur.fetchone()
-            anket_cols = [d[1] for d in cur.execute("PRAGMA table_info(anket)")]
-
-        # Son Lab (varsa)
-        last_lab = None; lab_cols = []
-        if self._table_exists(cur, "lab"):
-            cur.execute("SELECT * FROM lab WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (hid,))
-            last_lab = cur.fetchone()
-            lab_cols = [d[1] for d in cur.execute("PRAGMA table_info(lab)")]
-
-        # Bakteriler
-        cur.execute("SELECT id, isim, ureme_tarihi FROM bakteri WHERE hasta_id=? ORDER BY id", (hid,))
-        bakteriler = cur.fetchall()
-
-        # İlaçlar
-        cur.execute("""SELECT ilac, baslangic, bitis, dozaj
-                       FROM ilac
-                       WHERE hasta_id=?
-                       ORDER BY id""", (hid,))
-        ilaclar = cur.fetchall()
-
-        # HTML
-        esc = html.escape
-        html_parts = []
-        html_parts.append(f"""
-        <h2>Hasta Raporu</h2>
-        <p><b>ID:</b> {h_id} &nbsp; <b>TC:</b> {esc(tc or '')}</p>
-        <p><b>Ad Soyad:</b> {esc(ad or '')} {esc(soyad or '')}</p>
-        <p><b>Doğum:</b> {esc(dogum or '')} &nbsp; <b>Servis:</b> {esc(servis or '')}</p>
-        <hr/>
-        """)
-
-        if last_anket:
-            html_parts.append("<h3>Son Anket</h3><table border='1' cellspacing='0' cellpadding='4'>")
-            for col, val in zip(anket_cols, last_anket):
-                html_parts.append(f"<tr><td><b>{esc(col)}</b></td><td>{esc(str(val) if val is not None else '')}</td></tr>")
-            html_parts.append("</table><br/>")
-
-        if last_lab:
-            html_parts.append("<h3>Son Laboratuvar</h3><table border='1' cellspacing='0' cellpadding='4'>")
-            for col, val in zip(lab_cols, last_lab):
-                html_parts.append(f"<tr><td><b>{esc(col)}</b></td><td>{esc(str(val) if val is not None else '')}</td></tr>")
-            html_parts.append("</table><br/>")
-
-        html_parts.append("<h3>Bakteriler &amp; Antibiyogram</h3>")
-        if not bakteriler:
-            html_parts.append("<p>Kayıt yok.</p>")
-        else:
-            for bid, b_ad, b_tarih in bakteriler:
-                html_parts.append(
-                    f"<p><b>Bakteri:</b> {esc(b_ad or '')} &nbsp; "
-                    f"<b>Üreme Tarihi:</b> {esc(b_tarih or '')} &nbsp; "
-                    f"<b>ID:</b> {bid}</p>"
-                )
-                cur.execute(
-                    "SELECT antibiyotik, sonuc FROM antibiyogram WHERE bakteri_id=? ORDER BY id",
-                    (bid,)
-                )
-                abgs = cur.fetchall()
-                if abgs:
-                    html_parts.append(
-                        "<table border='1' cellspacing='0' cellpadding='4'>"
-                        "<tr><th>Antibiyotik</th><th>Sonuç</th></tr>"
-                    )
-                    for ab, snc in abgs:
-                        html_parts.append(f"<tr><td>{esc(ab or '')}</td><td>{esc(snc or '')}</td></tr>")
-                    html_parts.append("</table><br/>")
-                else:
-                    html_parts.append("<p style='margin-left:12px;'>Antibiyogram yok.</p>")
-
-        html_parts.append("<h3>Kullanılan İlaçlar</h3>")
-        if ilaclar:
-            html_parts.append(
-                "<table border='1' cellspacing='0' cellpadding='4'>"
-                "<tr><th>İlaç</th><th>Başlangıç</th><th>Bitiş</th><th>Dozaj</th></tr>"
-            )
-            for ilac, bas, bit, doz in ilaclar:
-                html_parts.append(
-                    f"<tr><td>{esc(ilac or '')}</td>"
-                    f"<td>{esc(bas or '')}</td>"
-                    f"<td>{esc(bit or '')}</td>"
-                    f"<td>{esc(doz or '')}</td></tr>"
-                )
-            html_parts.append("</table>")
-        else:
-            html_parts.append("<p>İlaç kaydı yok.</p>")
-
-        html_str = "".join(html_parts)
-
-        # Varsayılan dosya adı: AD_SOYAD_rapor.pdf
-        def safe(s):
-            s = (s or "").strip()
-            if not s:
-                return ""
-            keep = []
-            for ch in s:
-                if ch.isalnum() or ch in (" ", "_", "-"):
-                    keep.append(ch)
-            return "".join(keep).strip().replace(" ", "_")
-
-        default_name = f"{safe(ad)}_{safe(soyad)}_rapor.pdf".strip("_")
-        if not default_name or default_name == "_rapor.pdf":
-            default_name = f"hasta_{h_id}_rapor.pdf"
+        html_str = rapor_html(rapor)
+        default_name = varsayilan_dosya_adi(rapor)
 
         btn = QMessageBox.question(
             self, "Yazdır",
@@ -1194,7 +1552,6 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
         if btn == QMessageBox.Yes:
             path, _ = QFileDialog.getSaveFileName(self, "PDF kaydet", default_name, "PDF (*.pdf)")
             if not path:
-                conn.close()
                 return
             printer = QPrinter(QPrinter.HighResolution)
             printer.setOutputFormat(QPrinter.PdfFormat)
@@ -1207,12 +1564,62 @@ class DetayPencere(QMainWindow, Ui_DetayPencere):
             if dlg.exec_() == QPrintDialog.Accepted:
                 doc = QTextDocument(); doc.setHtml(html_str); doc.print_(printer)
 
-        conn.close()
+# ------------------ Detay pencereleri ------------------
+class DetayPencereleri:
+    """Açılan DetayPencere'ler hasta_id ile LRU sırasında tutulur.
+
+    Aynı hasta tekrar istenirse penceresi öne getirilir (bildirim yolu sayesinde günceldir).
+    Yeni hasta için kapatılmış (gizli) bir pencere setupUi yapılmadan bagla() ile yeniden
+    kullanılır; açık pencereler başka hastaya hiç bağlanmaz, gizli yoksa yeni pencere kurulur.
+    Bellek için en fazla GIZLI_SINIR gizli pencere saklanır; fazlası silinir (kaydedilmemiş
+    lab girişi olanlar hariç).
+    """
+    GIZLI_SINIR = 2
+
+    def __init__(self):
+        self._pencereler: "OrderedDict[int, DetayPencere]" = OrderedDict()
+
+    def ac(self, hasta_id: int) -> DetayPencere:
+        w = self._pencereler.pop(hasta_id, None)
+        if w is None:
+            w = self._bos_pencere()
+            if w is None:
+                w = DetayPencere(hasta_id)
+                w.kapandi.connect(lambda: QTimer.singleShot(0, self._buda))
+            else:
+                w.bagla(hasta_id, sor=False)
+        elif w.yukleme_eksik:
+            w.bagla(hasta_id)
+        self._pencereler[hasta_id] = w
+        if w.isMinimized(): w.showNormal()
+        w.show(); w.raise_(); w.activateWindow()
+        return w
+
+    def _bos_pencere(self) -> Optional[DetayPencere]:
+        # Yalnızca kapatılmış ve kaydedilmemiş lab girişi olmayan pencereler yeniden kullanılır
+        gizli = next((h for h, w in self._pencereler.items()
+                      if not w.isVisible() and not w.kaydedilmemis()), None)
+        return self._pencereler.pop(gizli) if gizli is not None else None
+
+    def _buda(self):
+        # Kaydedilmemiş lab girişi olan gizli pencere silinmez; sınıra da sayılmaz
+        gizli = [h for h, w in self._pencereler.items() if not w.isVisible() and not w.kaydedilmemis()]
+        for h in gizli[:max(0, len(gizli) - self.GIZLI_SINIR)]:
+            self._pencereler.pop(h).deleteLater()
+
+    def __len__(self):
+        return len(self._pencereler)
 
 # ------------------ Main ------------------
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # PyInstaller exe + toplu PDF süreç havuzu
+    olcum = acilis.AcilisOlcumu(_ACILIS) if acilis.etkin() else None
+    if olcum: olcum.asama("içe aktarma")
     veritabani_olustur()
+    if olcum: olcum.asama("veritabanı")
     app = QApplication(sys.argv)
     w = AnaPencere()
+    if olcum: olcum.asama("pencere"); olcum.ilk_cizimi_bekle(w)
     w.show()
     sys.exit(app.exec_())
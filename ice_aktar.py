@@ -0,0 +1,247 @@
+"""Laboratuvar sisteminden gelen dosyaların toplu içe aktarımı.
+
+Desteklenen dosyalar başlık satırlı, ayraçla bölünmüş metinlerdir (',', ';', '|' veya sekme):
+
+* Mikrobiyoloji: tc, kultur_ornegi, isim (bakteri), ureme_tarihi, antibiyotik, sonuc
+  Her satır bir antibiyogram sonucudur; aynı hasta/örnek/bakteri/tarih tek bakteri kaydına bağlanır.
+* Laboratuvar: tc, tarih (created_at) ve lab tablosundaki sütun adları (crp, lokosit, ...)
+
+Hastalar tc ile eşlenir. Satırlar PARTI büyüklüğünde executemany ile ve tek işlem içinde yazılır;
+hatalı satırlar atlanır ve satır numarasıyla raporlanır.
+"""
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from veritabani import Veritabani, db, tr_katla
+
+PARTI = 5000
+PARCA = 900  # IN (...) başına değişken; eski SQLite sürümlerinin 999 sınırının altında
+
+# Başlık eş anlamlıları (tr_katla uygulanmış halde)
+_ORTAK = {"tc": "tc", "tckn": "tc", "tc_kimlik": "tc", "tc_kimlik_no": "tc", "hasta_tc": "tc"}
+_MIKRO_BASLIK = dict(_ORTAK, **{
+    "kultur_ornegi": "kultur_ornegi", "kultur": "kultur_ornegi", "ornek": "kultur_ornegi", "numune": "kultur_ornegi",
+    "isim": "isim", "bakteri": "isim", "organizma": "isim", "mikroorganizma": "isim",
+    "ureme_tarihi": "ureme_tarihi", "tarih": "ureme_tarihi",
+    "antibiyotik": "antibiyotik", "ilac": "antibiyotik",
+    "sonuc": "sonuc", "yorum": "sonuc", "sir": "sonuc",
+})
+_LAB_BASLIK = dict(_ORTAK, **{"tarih": "created_at", "created_at": "created_at", "zaman": "created_at"})
+
+_SONUC = {
+    "s": "Duyarlı", "duyarli": "Duyarlı",
+    "i": "Orta Duyarlı", "orta duyarli": "Orta Duyarlı", "orta": "Orta Duyarlı",
+    "r": "Dirençli", "direncli": "Dirençli",
+}
+_TARIH_BICIMLERI = ("%d-%m-%Y", "%d.%m.%Y", "%d/%m/%Y", "%Y-%m-%d")
+
+@dataclass
+class IceAktarimSonucu:
+    okunan: int = 0
+    eklenen: Dict[str, int] = field(default_factory=dict)
+    guncellenen: Dict[str, int] = field(default_factory=dict)
+    atlanan: Dict[str, int] = field(default_factory=dict)       # zaten var / dosyada tekrar
+    hatalar: List[Tuple[int, str]] = field(default_factory=list)  # (satır no, mesaj)
+
+    def ozet(self, en_fazla: int = 20) -> str:
+        parcalar = [f"Okunan satır: {self.okunan}"]
+        parcalar += [f"Eklenen {t}: {n}" for t, n in self.eklenen.items()]
+        parcalar += [f"Güncellenen {t}: {n}" for t, n in self.guncellenen.items()]
+        parcalar += [f"Atlanan (tekrar) {t}: {n}" for t, n in self.atlanan.items()]
+        parcalar.append(f"Hatalı satır: {len(self.hatalar)}")
+        parcalar += [f"  satır {no}: {m}" for no, m in self.hatalar[:en_fazla]]
+        if len(self.hatalar) > en_fazla:
+            parcalar.append(f"  … {len(self.hatalar) - en_fazla} hata daha")
+        return "\n".join(parcalar)
+
+# ------------------ Okuma ------------------
+def _satirlar(yol: str, eslesme: Dict[str, str], ayrac: str = None) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(satır no, {alan: değer}) üretir; başlıklar eslesme ile uygulama alan adlarına çevrilir."""
+    with open(yol, newline="", encoding="utf-8-sig") as f:
+        if ayrac is None:
+            ornek = f.read(4096); f.seek(0)
+            try:
+                ayrac = csv.Sniffer().sniff(ornek, delimiters=",;|\t").delimiter
+            except csv.Error:
+                ayrac = ","
+        okuyucu = csv.reader(f, delimiter=ayrac)
+        baslik = next(okuyucu, None)
+        if not baslik:
+            return
+        alanlar = [eslesme.get(tr_katla(b).strip().replace("/", "").replace(" ", "_")) for b in baslik]
+        for no, row in enumerate(okuyucu, start=2):
+            if not any(c.strip() for c in row):
+                continue
+            yield no, {a: v.strip() for a, v in zip(alanlar, row) if a}
+
+def _partiler(it, n: int):
+    parti = []
+    for x in it:
+        parti.append(x)
+        if len(parti) >= n:
+            yield parti; parti = []
+    if parti:
+        yield parti
+
+def _tarih(s: str) -> Optional[datetime]:
+    s = (s or "").strip()
+    for b in _TARIH_BICIMLERI:
+        try:
+            return datetime.strptime(s[:10], b)
+        except ValueError:
+            pass
+    return None
+
+def _zaman(s: str) -> Optional[datetime]:
+    """Tarih ve varsa saati ('10:30' ya da '10:30:15'); saat yoksa gece yarısı."""
+    d = _tarih(s)
+    saat = (s or "").strip()[10:].lstrip("T ").strip()
+    if d is None or not saat:
+        return d
+    for b in ("%H:%M:%S", "%H:%M"):
+        try:
+            t = datetime.strptime(saat[:8], b)
+            return d.replace(hour=t.hour, minute=t.minute, second=t.second)
+        except ValueError:
+            pass
+    return None
+
+def tarih_metni(d: datetime) -> str:
+    # Veritabanında saklanan biçim (ISO)
+    return d.strftime("%Y-%m-%d")
+
+def _hasta_idleri(vt: Veritabani, tcler, onbellek: Dict[str, Optional[int]]):
+    eksik = [tc for tc in set(tcler) if tc not in onbellek]
+    for parca in _parcalar(eksik):
+        bulunan = dict(vt.sorgu(f"SELECT tc, id FROM hasta WHERE tc IN ({','.join('?' * len(parca))})", parca))
+        for tc in parca:
+            onbellek[tc] = bulunan.get(tc)
+
+def _in(n: int) -> str:
+    return ",".join("?" * n)
+
+def _parcalar(degerler: List, n: int = PARCA) -> Iterator[List]:
+    for i in range(0, len(degerler), n):
+        yield degerler[i:i + n]
+
+# ------------------ Mikrobiyoloji ------------------
+def mikrobiyoloji_ice_aktar(yol: str, vt: Veritabani = None, ayrac: str = None) -> IceAktarimSonucu:
+    vt = vt or db()
+    sonuc = IceAktarimSonucu(eklenen={"bakteri": 0, "antibiyogram": 0}, guncellenen={"antibiyogram": 0})
+    hasta_onb: Dict[str, Optional[int]] = {}
+
+    with vt.islem() as cur:
+        for parti in _partiler(_satirlar(yol, _MIKRO_BASLIK, ayrac), PARTI):
+            sonuc.okunan += len(parti)
+            _hasta_idleri(vt, [r.get("tc", "") for _, r in parti], hasta_onb)
+
+            # 1) Doğrula, bakteri anahtarlarını çıkar
+            gecerli = []  # (bakteri anahtarı, antibiyotik, sonuc)
+            for no, r in parti:
+                hid = hasta_onb.get(r.get("tc", ""))
+                if hid is None:
+                    sonuc.hatalar.append((no, f"TC bulunamadı: {r.get('tc', '')!r}")); continue
+                if not r.get("isim"):
+                    sonuc.hatalar.append((no, "Bakteri adı boş")); continue
+                d = _tarih(r.get("ureme_tarihi", ""))
+                if d is None:
+                    sonuc.hatalar.append((no, f"Geçersiz tarih: {r.get('ureme_tarihi', '')!r}")); continue
+                ab = r.get("antibiyotik", "")
+                snc = _SONUC.get(tr_katla(r.get("sonuc", "")).strip()) if ab else None
+                if ab and snc is None:
+                    sonuc.hatalar.append((no, f"Geçersiz sonuç: {r.get('sonuc', '')!r}")); continue
+                anahtar = (hid, r.get("kultur_ornegi", ""), r["isim"], tarih_metni(d))
+                gecerli.append((anahtar, ab, snc))
+            if not gecerli:
+                continue
+
+            # 2) Bakteriler: mevcutları bul, eksikleri topluca ekle, id'leri tekrar oku
+            hidler = sorted({a[0] for a, _, _ in gecerli})
+            def bakteri_idleri():
+                return {(h, k or "", i, t): bid for parca in _parcalar(hidler) for bid, h, k, i, t in cur.execute(
+                    f"SELECT id, hasta_id, kultur_ornegi, isim, ureme_tarihi FROM bakteri WHERE hasta_id IN ({_in(len(parca))})",
+                    parca)}
+            bak = bakteri_idleri()
+            yeni = sorted({a for a, _, _ in gecerli if a not in bak})
+            if yeni:
+                cur.executemany("INSERT INTO bakteri(hasta_id, kultur_ornegi, isim, ureme_tarihi) VALUES (?,?,?,?)", yeni)
+                sonuc.eklenen["bakteri"] += len(yeni)
+                bak = bakteri_idleri()
+
+            # 3) Antibiyogram: aynı bakteri+antibiyotik varsa sonucu güncelle, yoksa ekle
+            bidler = sorted({bak[a] for a, ab, _ in gecerli if ab})
+            mevcut = {}
+            for parca in _parcalar(bidler):
+                for aid, bid, ab in cur.execute(
+                        f"SELECT id, bakteri_id, antibiyotik FROM antibiyogram WHERE bakteri_id IN ({_in(len(parca))})", parca):
+                    mevcut[(bid, ab)] = aid
+            ekle, guncelle = {}, {}
+            for a, ab, snc in gecerli:
+                if not ab: continue
+                k = (bak[a], ab)
+                if k in mevcut: guncelle[mevcut[k]] = snc
+                else: ekle[k] = snc  # dosyada tekrar varsa son satır geçerli
+            cur.executemany("INSERT INTO antibiyogram(bakteri_id, antibiyotik, sonuc) VALUES (?,?,?)",
+                            [(bid, ab, snc) for (bid, ab), snc in ekle.items()])
+            cur.executemany("UPDATE antibiyogram SET sonuc=? WHERE id=?", [(snc, aid) for aid, snc in guncelle.items()])
+            sonuc.eklenen["antibiyogram"] += len(ekle)
+            sonuc.guncellenen["antibiyogram"] += len(guncelle)
+    return sonuc
+
+# ------------------ Laboratuvar ------------------
+def lab_ice_aktar(yol: str, vt: Veritabani = None, ayrac: str = None) -> IceAktarimSonucu:
+    vt = vt or db()
+    sayisal = [c for c in vt.sutunlar("lab") if c not in ("id", "hasta_id", "created_at", "ppd")]
+    eslesme = dict(_LAB_BASLIK, ppd="ppd", **{c: c for c in sayisal})
+    sutunlar = ["hasta_id", "created_at", "ppd"] + sayisal
+    sql = f"INSERT INTO lab({','.join(sutunlar)}) VALUES ({_in(len(sutunlar))})"
+    sonuc = IceAktarimSonucu(eklenen={"lab": 0}, atlanan={"lab": 0})
+    hasta_onb: Dict[str, Optional[int]] = {}
+
+    with vt.islem() as cur:
+        for parti in _partiler(_satirlar(yol, eslesme, ayrac), PARTI):
+            sonuc.okunan += len(parti)
+            _hasta_idleri(vt, [r.get("tc", "") for _, r in parti], hasta_onb)
+            adaylar = []
+            for no, r in parti:
+                hid = hasta_onb.get(r.get("tc", ""))
+                if hid is None:
+                    sonuc.hatalar.append((no, f"TC bulunamadı: {r.get('tc', '')!r}")); continue
+                ham = r.get("created_at", "")
+                d = _zaman(ham)
+                if d is None:
+                    sonuc.hatalar.append((no, f"Geçersiz tarih: {ham!r}")); continue
+                # Uygulamanın yazdığı biçim (yyyy-MM-ddTHH:mm:ss): tekrar denetimi GUI kayıtlarıyla da eşleşir
+                zaman = d.strftime("%Y-%m-%dT%H:%M:%S")
+                degerler, hata = [], None
+                for c in sayisal:
+                    v = (r.get(c) or "").replace(",", ".")
+                    try:
+                        degerler.append(float(v) if v else None)
+                    except ValueError:
+                        hata = f"{c} sayı değil: {r.get(c)!r}"; break
+                if hata:
+                    sonuc.hatalar.append((no, hata)); continue
+                adaylar.append((hid, zaman, r.get("ppd") or None, *degerler))
+            if not adaylar:
+                continue
+            # Aynı hasta+zaman zaten varsa (dosya tekrar yüklendi) ya da dosyada tekrarlanıyorsa ilki
+            # dışındakiler atlanır; veritabanı idx_lab_hasta_zaman ile nokta aramalarla denetlenir
+            anahtarlar = sorted({(a[0], a[1]) for a in adaylar})
+            var = set()
+            for parca in _parcalar(anahtarlar, PARCA // 2):
+                kosul = " OR ".join(["(hasta_id=? AND created_at=?)"] * len(parca))
+                var.update(cur.execute(f"SELECT hasta_id, created_at FROM lab WHERE {kosul}",
+                                       [x for k in parca for x in k]))
+            yeni = []
+            for a in adaylar:
+                if (a[0], a[1]) not in var:
+                    var.add((a[0], a[1])); yeni.append(a)
+            cur.executemany(sql, yeni)
+            sonuc.eklenen["lab"] += len(yeni)
+            sonuc.atlanan["lab"] += len(adaylar) - len(yeni)
+    return sonuc
+
+TURLER = {"mikro": mikrobiyoloji_ice_aktar, "lab": lab_ice_aktar}
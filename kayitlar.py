@@ -0,0 +1,130 @@
+"""Tablo satırları için tipli, hafif kayıtlar.
+
+Sabit şemalı tablolar (hasta, bakteri, antibiyogram, ilac) NamedTuple'dır: örnek başına sözlük
+yoktur, alan adıyla ve eski kod için sırayla/açma ile erişilebilir. Anket kaydı anket_semasi'ndan,
+sütunları zamanla eklenen lab için kayıt tipi şemadan bir kez üretilir (Veritabani.kayit_tipi).
+Satırlar doğrudan imlecin row_factory'si ile kayda dönüştürülür (Veritabani.sorgu(..., tip=)).
+"""
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+
+import anket_semasi
+from anket_semasi import Anket
+from veritabani import Veritabani, db
+
+class Hasta(NamedTuple):
+    id: int
+    tc: Optional[str]
+    ad: Optional[str]
+    soyad: Optional[str]
+    dogum: Optional[str]
+    servis: Optional[str]
+
+class Bakteri(NamedTuple):
+    id: int
+    hasta_id: int
+    kultur_ornegi: Optional[str]
+    isim: Optional[str]
+    ureme_tarihi: Optional[str]
+
+class Antibiyogram(NamedTuple):
+    id: int
+    bakteri_id: int
+    antibiyotik: Optional[str]
+    sonuc: Optional[str]
+
+class Ilac(NamedTuple):
+    id: int
+    hasta_id: int
+    ilac: Optional[str]
+    baslangic: Optional[str]
+    bitis: Optional[str]
+    dozaj: Optional[str]
+
+def secim(tip) -> str:
+    """SELECT listesi: kaydın alanları, tanım sırasıyla."""
+    return ", ".join(tip._fields)
+
+# ------------------ Gösterim ------------------
+def tarih_goster(s) -> str:
+    """Saklanan ISO tarihi ('yyyy-MM-dd...') ekranda 'dd-MM-yyyy' gösterir; başka biçimler aynen kalır."""
+    s = "" if s is None else str(s)
+    if len(s) >= 10 and s[4] == "-" and s[7] == "-" and s[:4].isdigit():
+        return f"{s[8:10]}-{s[5:7]}-{s[:4]}"
+    return s
+
+# ------------------ Okuma ------------------
+def kayit_getir(tablo: str, tip, kayit_id: int, vt: Veritabani = None):
+    """Tek satır (tip: Hasta, Bakteri, Antibiyogram, Ilac); yoksa None."""
+    return (vt or db()).tek(f"SELECT {secim(tip)} FROM {tablo} WHERE id=?", (kayit_id,), tip=tip)
+
+def hasta_getir(hasta_id: int, vt: Veritabani = None) -> Optional[Hasta]:
+    return (vt or db()).tek(f"SELECT {secim(Hasta)} FROM hasta WHERE id=?", (hasta_id,), tip=Hasta)
+
+def bakteriler(hasta_id: int, vt: Veritabani = None) -> List[Bakteri]:
+    return (vt or db()).sorgu(f"SELECT {secim(Bakteri)} FROM bakteri WHERE hasta_id=? ORDER BY id",
+                              (hasta_id,), tip=Bakteri)
+
+def antibiyogramlar(bakteri_id: int, vt: Veritabani = None) -> List[Antibiyogram]:
+    return (vt or db()).sorgu(f"SELECT {secim(Antibiyogram)} FROM antibiyogram WHERE bakteri_id=? ORDER BY id",
+                              (bakteri_id,), tip=Antibiyogram)
+
+def hastanin_antibiyogramlari(hasta_id: int, vt: Veritabani = None) -> Dict[int, List[Antibiyogram]]:
+    """Hastanın tüm bakterilerinin sonuçları tek sorguda: bakteri_id -> liste (sonucu olmayan bakteri yok)."""
+    sonuc: Dict[int, List[Antibiyogram]] = {}
+    for a in (vt or db()).sorgu(
+            f"SELECT {', '.join('a.' + f for f in Antibiyogram._fields)} FROM bakteri b "
+            f"JOIN antibiyogram a ON a.bakteri_id = b.id WHERE b.hasta_id=? ORDER BY b.id, a.id",
+            (hasta_id,), tip=Antibiyogram):
+        sonuc.setdefault(a.bakteri_id, []).append(a)
+    return sonuc
+
+def ilaclar(hasta_id: int, vt: Veritabani = None) -> List[Ilac]:
+    return (vt or db()).sorgu(f"SELECT {secim(Ilac)} FROM ilac WHERE hasta_id=? ORDER BY id",
+                              (hasta_id,), tip=Ilac)
+
+def son_lab(hasta_id: int, vt: Veritabani = None):
+    """Son lab satırı; alanlar lab tablosunun sütunları (Veritabani.kayit_tipi('lab'))."""
+    vt = vt or db()
+    return vt.tek("SELECT * FROM lab WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (hasta_id,),
+                  tip=vt.kayit_tipi("lab"))
+
+def son_anket(hasta_id: int, vt: Veritabani = None) -> Optional[Anket]:
+    """Son anket; alanlar anket_semasi'ndaki sırayla."""
+    return (vt or db()).tek(anket_semasi.SON_ANKET_SQL, (hasta_id,), tip=Anket)
+
+# ------------------ Önbellek ------------------
+class AntibiyogramOnbellegi:
+    """bakteri_id -> antibiyogram listesi; en son kullanılan `kapasite` bakteri tutulur (LRU).
+
+    Pencere açılırken hastanın tüm sonuçlarıyla doldurulur (yenile); yazmalardan sonra ilgili
+    bakteri gecersiz() ile düşürülür ve bir sonraki istekte veritabanından okunur.
+    """
+    def __init__(self, kapasite: int = 256):
+        self.kapasite = kapasite
+        self._d: "OrderedDict[int, List[Antibiyogram]]" = OrderedDict()
+
+    def yenile(self, sonuclar: Dict[int, List[Antibiyogram]]):
+        self._d.clear()
+        for bid, rows in sonuclar.items():
+            self.koy(bid, rows)
+
+    def koy(self, bakteri_id: int, rows: List[Antibiyogram]):
+        self._d[bakteri_id] = rows
+        self._d.move_to_end(bakteri_id)
+        while len(self._d) > self.kapasite:
+            self._d.popitem(last=False)
+
+    def getir(self, bakteri_id: int, vt: Veritabani = None) -> List[Antibiyogram]:
+        rows = self._d.get(bakteri_id)
+        if rows is None:
+            self.koy(bakteri_id, antibiyogramlar(bakteri_id, vt))
+            return self._d[bakteri_id]
+        self._d.move_to_end(bakteri_id)
+        return rows
+
+    def gecersiz(self, bakteri_id: int):
+        self._d.pop(bakteri_id, None)
+
+    def __contains__(self, bakteri_id: int) -> bool:
+        return bakteri_id in self._d
@@ -0,0 +1,196 @@
+"""Ekransız komut satırı: python -m enfeksiyon <komut> ...
+
+Pencere oluşturmaz; Qt yalnızca PDF çizerken (offscreen) yüklenir.
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+import veritabani
+from veritabani import TABLOLAR, db, sema_surumu, tarama_yapan_sorgular, veritabani_olustur
+
+# ------------------ Komutlar ------------------
+def _rapor(args) -> int:
+    import toplu_rapor
+    if args.hasta:
+        idler = args.hasta
+    else:
+        idler = toplu_rapor.hasta_idleri(args.servis, args.baslangic, args.bitis)
+    if not idler:
+        print("Seçime uyan hasta yok.", file=sys.stderr)
+        return 1
+
+    def ilerleme(biten, toplam):
+        if not args.sessiz:
+            print(f"\r{biten}/{toplam}", end="", file=sys.stderr, flush=True)
+        return True
+    sonuclar = toplu_rapor.toplu_pdf(idler, args.cikti, isci_sayisi=args.isci, ilerleme=ilerleme)
+    if not args.sessiz:
+        print(file=sys.stderr)
+    hatalar = [(hid, hata) for hid, _, hata in sonuclar if hata]
+    for hid, hata in hatalar:
+        print(f"ID {hid}: {hata}", file=sys.stderr)
+    print(f"{len(sonuclar) - len(hatalar)} / {len(idler)} rapor -> {args.cikti}")
+    return 1 if hatalar else 0
+
+def _disa_aktar(args) -> int:
+    import disa_aktar
+    try:
+        sonuc = disa_aktar.tumunu_disa_aktar(args.cikti, args.bicim, args.tablo or TABLOLAR)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for t, (yol, n) in sonuc.items():
+        print(f"{t:<13}: {n:>8} satır -> {yol}")
+    return 0
+
+def _ice_aktar(args) -> int:
+    import ice_aktar
+    sonuc = ice_aktar.TURLER[args.tur](args.dosya, ayrac=args.ayrac)
+    print(sonuc.ozet(en_fazla=args.hata_sayisi))
+    return 1 if sonuc.hatalar else 0
+
+def _stres_yazici(yol: str, profil: Optional[str], adet: int, no: int):
+    # Ayrı süreçte: kendi bağlantısıyla art arda kısa yazma işlemleri + okuma
+    import time
+    vt = veritabani.ayarla(yol, profil)
+    hatalar, en_uzun = 0, 0.0
+    for i in range(adet):
+        t = time.perf_counter()
+        try:
+            with vt.islem() as cur:
+                cur.execute("INSERT INTO lab(hasta_id, created_at, crp) VALUES (?,?,?)", (no, f"stres-{no}-{i}", float(i)))
+            vt.tek("SELECT * FROM lab WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (no,))
+        except Exception:
+            hatalar += 1
+        en_uzun = max(en_uzun, time.perf_counter() - t)
+    return adet - hatalar, hatalar, en_uzun
+
+def _stres(args) -> int:
+    import os, tempfile, time
+    from concurrent.futures import ProcessPoolExecutor
+    yol = args.dosya or os.path.join(tempfile.mkdtemp(), "stres.db")
+    vt = veritabani.ayarla(yol, args.profil)
+    veritabani_olustur(vt)
+    print(f"Dosya: {yol}  profil: {vt.profil_etiketi}  journal_mode: {vt.tek('PRAGMA journal_mode')[0]}")
+    t = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.surec) as havuz:
+        sonuclar = list(havuz.map(_stres_yazici, [yol] * args.surec, [args.profil] * args.surec,
+                                  [args.adet] * args.surec, range(1, args.surec + 1)))
+    sure = time.perf_counter() - t
+    basarili = sum(s[0] for s in sonuclar); hatali = sum(s[1] for s in sonuclar)
+    satir = vt.tek("SELECT COUNT(*) FROM lab WHERE created_at LIKE 'stres-%'")[0]
+    print(f"{args.surec} süreç x {args.adet} yazma: {basarili} başarılı, {hatali} hatalı, "
+          f"{satir} satır, {sure:.2f} sn, en uzun işlem {max(s[2] for s in sonuclar) * 1000:.0f} ms")
+    if not args.dosya:
+        import shutil
+        vt.kapat(); shutil.rmtree(os.path.dirname(yol), ignore_errors=True)
+    return 0 if hatali == 0 and satir == basarili else 1
+
+def _antibiyogram(args) -> int:
+    import csv
+    import surveyans
+    hucreler = surveyans.kumulatif_antibiyogram(args.baslangic, args.bitis, args.servis, args.duzey,
+                                               servis_bazinda=args.servis_bazinda, donem_bazinda=args.donem_bazinda)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8-sig") as f:
+            w = csv.writer(f)
+            w.writerow(["donem", "servis", "organizma", "antibiyotik", "izolat", "duyarli", "orta", "direncli", "yuzde_duyarli"])
+            for h in hucreler:
+                w.writerow([h.donem or "", h.servis or "", h.isim, h.antibiyotik, h.test,
+                            h.duyarli, h.orta, h.direncli, f"{h.yuzde_duyarli:.1f}"])
+        print(f"{len(hucreler)} satır -> {args.csv}")
+        return 0
+    if not hucreler:
+        print("Seçime uyan antibiyogram sonucu yok.", file=sys.stderr)
+        return 1
+    for h in hucreler:
+        onek = " ".join(x for x in (h.donem, h.servis) if x is not None)
+        uyari = "" if h.yeterli else f"  (<{surveyans.ESIK} izolat)"
+        print(f"{onek + '  ' if onek else ''}{h.isim:<25} {h.antibiyotik:<20} "
+              f"%{h.yuzde_duyarli:5.1f} D  n={h.test}{uyari}")
+    return 0
+
+def _istatistik(args) -> int:
+    vt = db()
+    print(f"Veritabanı : {vt.yol}")
+    print(f"Şema sürümü: {sema_surumu(vt.baglanti().cursor())}")
+    print(f"Depolama   : {vt.profil_etiketi} (journal_mode={vt.tek('PRAGMA journal_mode')[0]})")
+    for t in TABLOLAR:
+        print(f"{t:<13}: {vt.tek(f'SELECT COUNT(*) FROM {t}')[0]}")
+    from pano import pano_ozeti
+    oz = pano_ozeti(vt=vt)
+    print(f"Aktif antibiyotik tedavisi: {oz.aktif_tedavi}")
+    print(f"Son 7 günde üreyen kültür : {oz.haftalik_kultur}")
+    print("Servislere göre hasta:")
+    for servis, n in oz.servisler:
+        print(f"  {servis or '-':<20} {n}")
+    taramalar = tarama_yapan_sorgular(vt)
+    for sql, detay in taramalar:
+        print(f"UYARI tam tarama: {detay}  <- {sql}")
+    return 1 if taramalar else 0
+
+# ------------------ Ayrıştırıcı ------------------
+def _ayristirici() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="enfeksiyon", description="Hasta takip - komut satırı")
+    p.add_argument("--db", help="Veritabanı dosyası (varsayılan: uygulama klasöründeki hastatakip.db)")
+    p.add_argument("--profil", choices=("yerel", "ag", "otomatik"),
+                   help="Depolama profili (varsayılan: ENFEKSIYON_DEPOLAMA veya otomatik)")
+    alt = p.add_subparsers(dest="komut", required=True)
+
+    r = alt.add_parser("report", help="PDF hasta raporları üret")
+    r.add_argument("--hasta", type=int, nargs="+", help="Hasta ID(leri)")
+    r.add_argument("--servis")
+    r.add_argument("--baslangic", help="yyyy-MM-dd (bu tarihten itibaren kaydı olanlar)")
+    r.add_argument("--bitis", help="yyyy-MM-dd")
+    r.add_argument("--cikti", "-o", default=".", help="PDF klasörü")
+    r.add_argument("--isci", type=int, help="Süreç sayısı (varsayılan: otomatik)")
+    r.add_argument("--sessiz", "-q", action="store_true")
+    r.set_defaults(f=_rapor)
+
+    e = alt.add_parser("export", help="Klinik tabloları CSV/Parquet olarak dışa aktar")
+    e.add_argument("--cikti", "-o", default="disa_aktarim", help="Çıktı klasörü")
+    e.add_argument("--bicim", choices=("csv", "parquet"), default="csv")
+    e.add_argument("--tablo", nargs="+", choices=TABLOLAR, help="Yalnızca bu tablolar")
+    e.set_defaults(f=_disa_aktar)
+
+    i = alt.add_parser("import", help="Mikrobiyoloji/laboratuvar dosyası içe aktar")
+    i.add_argument("tur", choices=("mikro", "lab"))
+    i.add_argument("dosya")
+    i.add_argument("--ayrac", help="Sütun ayracı (varsayılan: otomatik)")
+    i.add_argument("--hata-sayisi", type=int, default=50, help="Listelenecek en fazla hata")
+    i.set_defaults(f=_ice_aktar)
+
+    st = alt.add_parser("stress", help="Birden çok yazan süreçle eşzamanlılık testi (ayrı dosyada)")
+    st.add_argument("--dosya", help="Test dosyası (ör. ağ paylaşımında); varsayılan geçici klasör")
+    st.add_argument("--surec", type=int, default=4)
+    st.add_argument("--adet", type=int, default=200, help="Süreç başına yazma")
+    st.set_defaults(f=_stres)
+
+    a = alt.add_parser("antibiogram", help="Kümülatif antibiyogram (ilk izolat, %% duyarlı)")
+    a.add_argument("--baslangic", help="yyyy, yyyy-MM veya yyyy-MM-dd")
+    a.add_argument("--bitis", help="yyyy, yyyy-MM veya yyyy-MM-dd")
+    a.add_argument("--servis")
+    a.add_argument("--duzey", choices=("yil", "ay"), default="yil", help="İlk izolat kuralının dönemi")
+    a.add_argument("--servis-bazinda", action="store_true", help="Servislere ayrıştır")
+    a.add_argument("--donem-bazinda", action="store_true", help="Dönemlere ayrıştır")
+    a.add_argument("--csv", help="Sonucu CSV dosyasına yaz")
+    a.set_defaults(f=_antibiyogram)
+
+    s = alt.add_parser("stats", help="Tablo sayıları ve sorgu planı denetimi")
+    s.set_defaults(f=_istatistik)
+    return p
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _ayristirici().parse_args(argv)
+    if args.f is _stres:
+        return _stres(args)  # üretim veritabanına dokunmaz
+    if args.db or args.profil:
+        veritabani.ayarla(args.db or veritabani.DB_PATH, args.profil)
+    veritabani_olustur()
+    return args.f(args)
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Laboratuvar değerlerinin zaman serisi (trend) verisi ve çizim öncesi seyreltme.
+
+Hastanın tüm ölçümleri tek sorguda sütun dizileri (array('d')) olarak okunur; uzun seriler
+çizimden önce LTTB (Largest-Triangle-Three-Buckets) ile ekran genişliği kadar noktaya indirilir.
+"""
+import math
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from veritabani import Veritabani, db
+
+ETIKETLER = {
+    "crp": "CRP", "pct": "Prokalsitonin (PCT)", "lokosit": "Lökosit", "lenfosit": "Lenfosit",
+    "notrofil": "Nötrofil", "kreatinin": "Kreatinin", "bun": "BUN", "egfrt": "eGFR",
+    "glukoz": "Glukoz", "na": "Sodyum (Na)", "cl": "Klor (Cl)", "p": "Fosfor (P)", "mg": "Magnezyum (Mg)",
+    "ast": "AST", "alt": "ALT", "ggt": "GGT", "alp": "ALP",
+    "tbil": "Total bilirubin", "dbil": "Direkt bilirubin", "albumin": "Albümin",
+}
+_SAYISAL_DISI = ("id", "hasta_id", "created_at", "ppd")
+
+@dataclass
+class LabSerileri:
+    zaman: array = field(default_factory=lambda: array("d"))   # epoch saniye, artan
+    degerler: Dict[str, array] = field(default_factory=dict)   # sütun -> değer (eksik: NaN)
+
+    def seri(self, sutun: str) -> Tuple[array, array]:
+        """Yalnızca ölçülmüş noktalar: (zaman, değer)."""
+        x, y = array("d"), array("d")
+        for t, v in zip(self.zaman, self.degerler[sutun]):
+            if v == v:  # NaN değil
+                x.append(t); y.append(v)
+        return x, y
+
+def sayisal_sutunlar(vt: Veritabani = None) -> List[str]:
+    vt = vt or db()
+    return [c for c in vt.sutunlar("lab") if c not in _SAYISAL_DISI]
+
+def _zaman(s) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(s).replace(" ", "T")[:19]).timestamp()
+    except ValueError:
+        return None
+
+def lab_serileri(hasta_id: int, sutunlar: Sequence[str] = None, vt: Veritabani = None) -> LabSerileri:
+    vt = vt or db()
+    sutunlar = list(sutunlar or sayisal_sutunlar(vt))
+    sonuc = LabSerileri(degerler={c: array("d") for c in sutunlar})
+    diziler = [sonuc.degerler[c] for c in sutunlar]
+    nan = math.nan
+    cur = vt.baglanti().execute(
+        f"SELECT created_at, {', '.join(sutunlar)} FROM lab WHERE hasta_id=? ORDER BY created_at, id", (hasta_id,))
+    for row in cur:
+        t = _zaman(row[0])
+        if t is None:
+            continue
+        sonuc.zaman.append(t)
+        for d, v in zip(diziler, row[1:]):
+            try:
+                d.append(nan if v is None or v == "" else float(v))
+            except (TypeError, ValueError):
+                d.append(nan)
+    return sonuc
+
+# ------------------ Seyreltme ------------------
+def lttb(x: Sequence[float], y: Sequence[float], hedef: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: görsel şekli koruyarak seçilen noktaların indeksleri."""
+    n = len(x)
+    if hedef >= n or hedef < 3:
+        return list(range(n))
+    secilen = [0]
+    kova = (n - 2) / (hedef - 2)
+    a = 0
+    for i in range(hedef - 2):
+        # sonraki kovanın ortalaması
+        bas = int((i + 1) * kova) + 1
+        son = min(int((i + 2) * kova) + 1, n)
+        m = son - bas
+        ort_x = sum(x[bas:son]) / m
+        ort_y = sum(y[bas:son]) / m
+        # bu kovada a ve ortalama ile en büyük üçgeni kuran nokta
+        k_bas, k_son = int(i * kova) + 1, int((i + 1) * kova) + 1
+        ax, ay = x[a], y[a]
+        en_iyi, en_buyuk = k_bas, -1.0
+        for j in range(k_bas, k_son):
+            alan = abs((ax - ort_x) * (y[j] - ay) - (ax - x[j]) * (ort_y - ay))
+            if alan > en_buyuk:
+                en_buyuk, en_iyi = alan, j
+        secilen.append(en_iyi)
+        a = en_iyi
+    secilen.append(n - 1)
+    return secilen
+
+def seyrelt(x: Sequence[float], y: Sequence[float], hedef: int) -> Tuple[array, array]:
+    idx = lttb(x, y, hedef)
+    return array("d", (x[i] for i in idx)), array("d", (y[i] for i in idx))
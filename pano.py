@@ -0,0 +1,34 @@
+"""Servis özeti (pano): tetikleyicilerin güncel tuttuğu ozet_sayac tablosundan okunur.
+
+Sorgular tablo boyutundan bağımsızdır; hasta/ilac/bakteri taranmaz (veritabani.OZET_SAYACLARI).
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from veritabani import Veritabani, db
+
+@dataclass
+class PanoOzeti:
+    toplam_hasta: int = 0
+    servisler: List[Tuple[str, int]] = field(default_factory=list)  # (servis, hasta sayısı)
+    aktif_tedavi: int = 0       # bugün süren antibiyotik tedavisi
+    haftalik_kultur: int = 0    # son 7 günde üreyen kültür
+
+def pano_ozeti(bugun: date = None, vt: Veritabani = None) -> PanoOzeti:
+    vt = vt or db()
+    bugun = bugun or date.today()
+    gun = bugun.isoformat()
+    hafta_basi = (bugun - timedelta(days=6)).isoformat()
+    with vt.islem(yazma=False) as cur:
+        servisler = cur.execute(
+            "SELECT deger, adet FROM ozet_sayac WHERE anahtar='servis' AND adet > 0 ORDER BY adet DESC, deger"
+        ).fetchall()
+        biten = cur.execute(
+            "SELECT COALESCE(SUM(adet), 0) FROM ozet_sayac WHERE anahtar='ilac_bitis' AND deger >= ?", (gun,)).fetchone()[0]
+        baslamamis = cur.execute(
+            "SELECT COALESCE(SUM(adet), 0) FROM ozet_sayac WHERE anahtar='ilac_baslangic' AND deger > ?", (gun,)).fetchone()[0]
+        kultur = cur.execute(
+            "SELECT COALESCE(SUM(adet), 0) FROM ozet_sayac WHERE anahtar='kultur_gun' AND deger BETWEEN ? AND ?",
+            (hafta_basi, gun)).fetchone()[0]
+    return PanoOzeti(sum(n for _, n in servisler), servisler, biten - baslamamis, kultur)
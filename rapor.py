@@ -0,0 +1,144 @@
+import html
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import anket_semasi
+import kayitlar
+from anket_semasi import Anket
+from kayitlar import Ilac, tarih_goster
+from veritabani import Veritabani, db
+
+# ------------------ Rapor verisi ------------------
+@dataclass
+class RaporBakteri:
+    id: int
+    isim: Optional[str]
+    ureme_tarihi: Optional[str]
+    antibiyogram: List[Tuple[Optional[str], Optional[str]]] = field(default_factory=list)  # (antibiyotik, sonuc)
+
+@dataclass
+class HastaRaporu:
+    id: int
+    tc: Optional[str]
+    ad: Optional[str]
+    soyad: Optional[str]
+    dogum: Optional[str]
+    servis: Optional[str]
+    anket: Optional[Anket] = None  # son anket kaydı
+    lab: Optional[tuple] = None    # son lab kaydı
+    bakteriler: List[RaporBakteri] = field(default_factory=list)
+    ilaclar: List[Ilac] = field(default_factory=list)
+
+def rapor_verisi_yukle(hasta_id: int, vt: Veritabani = None) -> Optional[HastaRaporu]:
+    """Raporun tüm verisini tek okuma işleminde, kültür sayısından bağımsız sabit sayıda sorguyla getirir."""
+    vt = vt or db()
+    with vt.islem(yazma=False) as cur:
+        h = kayitlar.hasta_getir(hasta_id, vt)
+        if not h:
+            return None
+        rapor = HastaRaporu(*h)
+        if vt.tablo_var("anket"):
+            rapor.anket = kayitlar.son_anket(hasta_id, vt)
+        if vt.tablo_var("lab"):
+            rapor.lab = kayitlar.son_lab(hasta_id, vt)
+
+        # Bakteriler + antibiyogramları tek JOIN'de
+        cur.execute("""
+            SELECT b.id, b.isim, b.ureme_tarihi, a.id, a.antibiyotik, a.sonuc
+            FROM bakteri b LEFT JOIN antibiyogram a ON a.bakteri_id = b.id
+            WHERE b.hasta_id=?
+            ORDER BY b.id, a.id
+        """, (hasta_id,))
+        son = None
+        for bid, isim, tarih, aid, ab, sonuc in cur:
+            if son is None or son.id != bid:
+                son = RaporBakteri(bid, isim, tarih); rapor.bakteriler.append(son)
+            if aid is not None:
+                son.antibiyogram.append((ab, sonuc))
+
+        rapor.ilaclar = kayitlar.ilaclar(hasta_id, vt)
+    return rapor
+
+# ------------------ HTML ------------------
+def rapor_html(rapor: HastaRaporu) -> str:
+    esc = html.escape
+    html_parts = []
+    html_parts.append(f"""
+    <h2>Hasta Raporu</h2>
+    <p><b>ID:</b> {rapor.id} &nbsp; <b>TC:</b> {esc(rapor.tc or '')}</p>
+    <p><b>Ad Soyad:</b> {esc(rapor.ad or '')} {esc(rapor.soyad or '')}</p>
+    <p><b>Doğum:</b> {esc(tarih_goster(rapor.dogum))} &nbsp; <b>Servis:</b> {esc(rapor.servis or '')}</p>
+    <hr/>
+    """)
+
+    if rapor.anket:
+        html_parts.append(f"<h3>Son Anket</h3><p>{esc(tarih_goster(rapor.anket.created_at))}</p>"
+                          "<table border='1' cellspacing='0' cellpadding='4'>")
+        for bolum, satirlar in anket_semasi.rapor_satirlari(rapor.anket):
+            html_parts.append(f"<tr><th colspan='2' align='left'>{esc(bolum)}</th></tr>")
+            for etiket, deger in satirlar:
+                html_parts.append(f"<tr><td><b>{esc(etiket)}</b></td><td>{esc(deger)}</td></tr>")
+        html_parts.append("</table><br/>")
+
+    if rapor.lab:
+        html_parts.append("<h3>Son Laboratuvar</h3><table border='1' cellspacing='0' cellpadding='4'>")
+        for col, val in zip(rapor.lab._fields, rapor.lab):
+            html_parts.append(f"<tr><td><b>{esc(col)}</b></td><td>{esc(str(val) if val is not None else '')}</td></tr>")
+        html_parts.append("</table><br/>")
+
+    html_parts.append("<h3>Bakteriler &amp; Antibiyogram</h3>")
+    if not rapor.bakteriler:
+        html_parts.append("<p>Kayıt yok.</p>")
+    else:
+        for b in rapor.bakteriler:
+            html_parts.append(
+                f"<p><b>Bakteri:</b> {esc(b.isim or '')} &nbsp; "
+                f"<b>Üreme Tarihi:</b> {esc(tarih_goster(b.ureme_tarihi))} &nbsp; "
+                f"<b>ID:</b> {b.id}</p>"
+            )
+            if b.antibiyogram:
+                html_parts.append(
+                    "<table border='1' cellspacing='0' cellpadding='4'>"
+                    "<tr><th>Antibiyotik</th><th>Sonuç</th></tr>"
+                )
+                for ab, snc in b.antibiyogram:
+                    html_parts.append(f"<tr><td>{esc(ab or '')}</td><td>{esc(snc or '')}</td></tr>")
+                html_parts.append("</table><br/>")
+            else:
+                html_parts.append("<p style='margin-left:12px;'>Antibiyogram yok.</p>")
+
+    html_parts.append("<h3>Kullanılan İlaçlar</h3>")
+    if rapor.ilaclar:
+        html_parts.append(
+            "<table border='1' cellspacing='0' cellpadding='4'>"
+            "<tr><th>İlaç</th><th>Başlangıç</th><th>Bitiş</th><th>Dozaj</th></tr>"
+        )
+        for i in rapor.ilaclar:
+            html_parts.append(
+                f"<tr><td>{esc(i.ilac or '')}</td>"
+                f"<td>{esc(tarih_goster(i.baslangic))}</td>"
+                f"<td>{esc(tarih_goster(i.bitis))}</td>"
+                f"<td>{esc(i.dozaj or '')}</td></tr>"
+            )
+        html_parts.append("</table>")
+    else:
+        html_parts.append("<p>İlaç kaydı yok.</p>")
+
+    return "".join(html_parts)
+
+def varsayilan_dosya_adi(rapor: HastaRaporu) -> str:
+    """AD_SOYAD_rapor.pdf; ad/soyad boşsa hasta_<id>_rapor.pdf"""
+    def safe(s):
+        s = (s or "").strip()
+        if not s:
+            return ""
+        keep = []
+        for ch in s:
+            if ch.isalnum() or ch in (" ", "_", "-"):
+                keep.append(ch)
+        return "".join(keep).strip().replace(" ", "_")
+
+    default_name = f"{safe(rapor.ad)}_{safe(rapor.soyad)}_rapor.pdf".strip("_")
+    if not default_name or default_name == "_rapor.pdf":
+        default_name = f"hasta_{rapor.id}_rapor.pdf"
+    return default_name
@@ -0,0 +1,162 @@
+"""Antibiyotik direnç sürveyansı: kümülatif antibiyogram.
+
+Her organizma/antibiyotik çifti için duyarlılık yüzdesi; servise ve döneme (yıl/ay) göre.
+Her dönemde hasta başına organizma için yalnızca ilk izolat (sonucu olan ilk kültür) sayılır.
+
+Dönem sonuçları surveyans_onbellek tablosunda saklanır. Tetikleyiciler değişen kültürlerin
+ayının sürüm sayacını artırır (veritabani._surveyans_olustur); bir dönem yalnızca sayaç
+toplamı (imza) değiştiyse yeniden hesaplanır, böylece yıllık rapor geçmişi baştan taramaz.
+"""
+import calendar
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from veritabani import Veritabani, db
+
+DUZEYLER = {"yil": 4, "ay": 7}  # dönem anahtarı = ureme_tarihi'nin ilk n karakteri
+SONUCLAR = ("Duyarlı", "Orta Duyarlı", "Dirençli")
+ESIK = 30  # CLSI M39: bundan az izolatlı yüzdeler istatistiksel olarak güvenilmez
+
+@dataclass
+class Hucre:
+    isim: str
+    antibiyotik: str
+    test: int
+    duyarli: int
+    orta: int
+    direncli: int
+    servis: Optional[str] = None  # servis/dönem bazında ayrıştırılmadıysa None
+    donem: Optional[str] = None
+
+    @property
+    def yuzde_duyarli(self) -> float:
+        return 100.0 * self.duyarli / self.test if self.test else 0.0
+
+    @property
+    def yeterli(self) -> bool:
+        return self.test >= ESIK
+
+# ------------------ Önbellek ------------------
+# [?, ?) aralığındaki ilk izolatların servis/organizma/antibiyotik sayıları
+_ILK_IZOLATLAR = f"""
+    SELECT i.servis, i.isim, TRIM(a.antibiyotik), COUNT(*),
+           SUM(a.sonuc = '{SONUCLAR[0]}'), SUM(a.sonuc = '{SONUCLAR[1]}'), SUM(a.sonuc = '{SONUCLAR[2]}')
+    FROM (
+        SELECT b.id, COALESCE(h.servis, '') AS servis, TRIM(b.isim) AS isim,
+               ROW_NUMBER() OVER (PARTITION BY b.hasta_id, TRIM(b.isim)
+                                  ORDER BY b.ureme_tarihi, b.id) AS sira
+        FROM bakteri b JOIN hasta h ON h.id = b.hasta_id
+        WHERE b.ureme_tarihi >= ? AND b.ureme_tarihi < ? AND COALESCE(TRIM(b.isim), '') <> ''
+          AND EXISTS (SELECT 1 FROM antibiyogram x
+                      WHERE x.bakteri_id = b.id AND x.sonuc IN ({",".join("?" * len(SONUCLAR))}))
+    ) i JOIN antibiyogram a ON a.bakteri_id = i.id
+    WHERE i.sira = 1 AND COALESCE(TRIM(a.antibiyotik), '') <> '' AND a.sonuc IN ({",".join("?" * len(SONUCLAR))})
+    GROUP BY i.servis, i.isim, TRIM(a.antibiyotik)
+"""
+_HESAPLA = f"""
+    INSERT INTO surveyans_onbellek(duzey, donem, servis, isim, antibiyotik, test, duyarli, orta, direncli)
+    SELECT ?, ?, * FROM ({_ILK_IZOLATLAR})
+"""
+
+def _aralik(donem: str) -> Tuple[str, str]:
+    # '2024' -> ['2024', '2024~'): '2024' ile başlayan tüm ISO tarihler (indeksli aralık taraması)
+    return donem, donem + "~"
+
+def _donem_sinirinda(tarih: Optional[str], duzey: str, son: bool) -> bool:
+    """tarih (ISO yıl, ay ya da gün) dönemin ilk (son=False) ya da son (son=True) gününe denk geliyor mu."""
+    try:
+        yil = int(tarih[:4])
+        ay = int(tarih[5:7] or (12 if son else 1))
+        gun = int(tarih[8:10] or (calendar.monthrange(yil, ay)[1] if son else 1))
+    except (TypeError, ValueError):
+        return True  # sınır yok ya da dönem öneki değil: eskisi gibi önek olarak karşılaştırılır
+    if son:
+        return (duzey == "ay" or ay == 12) and gun == calendar.monthrange(yil, ay)[1]
+    return (duzey == "ay" or ay == 1) and gun == 1
+
+def _donemler(cur, duzey: str, baslangic: str = None, bitis: str = None) -> List[str]:
+    n = DUZEYLER[duzey]
+    bas = (baslangic or "")[:n]
+    bit = (bitis or "~")[:n] + "~"
+    return [d for (d,) in cur.execute(
+        "SELECT DISTINCT substr(ay,1,?) FROM surveyans_ay WHERE ay >= ? AND ay < ? AND ay <> '' ORDER BY 1",
+        (n, bas, bit))]
+
+def _imzalar(cur, duzey: str, donemler: Sequence[str]) -> Dict[str, Tuple[int, Optional[int]]]:
+    """donem -> (güncel imza, önbellekteki imza)"""
+    sonuc = {}
+    for d in donemler:
+        guncel = cur.execute("SELECT SUM(surum) FROM surveyans_ay WHERE ay >= ? AND ay < ?", _aralik(d)).fetchone()[0]
+        r = cur.execute("SELECT imza FROM surveyans_donem WHERE duzey=? AND donem=?", (duzey, d)).fetchone()
+        sonuc[d] = (guncel or 0, r[0] if r else None)
+    return sonuc
+
+def onbellegi_guncelle(duzey: str = "yil", baslangic: str = None, bitis: str = None,
+                       vt: Veritabani = None) -> List[str]:
+    """Aralıktaki eskimiş dönemleri yeniden hesaplar; hesaplanan dönemleri döndürür."""
+    vt = vt or db()
+    with vt.islem(yazma=False) as cur:
+        donemler = _donemler(cur, duzey, baslangic, bitis)
+        eski = [d for d, (g, o) in _imzalar(cur, duzey, donemler).items() if g != o]
+    if not eski:
+        return []
+    hesaplanan = []
+    with vt.islem() as cur:
+        # Yazma kilidi alındıktan sonra yeniden bakılır (başka süreç hesaplamış olabilir)
+        for d, (guncel, onceki) in _imzalar(cur, duzey, eski).items():
+            if guncel == onceki:
+                continue
+            cur.execute("DELETE FROM surveyans_onbellek WHERE duzey=? AND donem=?", (duzey, d))
+            cur.execute(_HESAPLA, (duzey, d, *_aralik(d), *SONUCLAR, *SONUCLAR))
+            cur.execute("INSERT OR REPLACE INTO surveyans_donem(duzey, donem, imza) VALUES (?,?,?)",
+                        (duzey, d, guncel))
+            hesaplanan.append(d)
+    return hesaplanan
+
+# ------------------ Sorgu ------------------
+def kumulatif_antibiyogram(baslangic: str = None, bitis: str = None, servis: str = None,
+                           duzey: str = "yil", servis_bazinda: bool = False, donem_bazinda: bool = False,
+                           vt: Veritabani = None) -> List[Hucre]:
+    """[baslangic, bitis] (ISO tarih veya dönem öneki, ör. '2024' / '2024-03') aralığının antibiyogramı.
+
+    İlk izolat kuralı her dönem (duzey) içinde uygulanır; çok dönemli aralıkta dönem sayıları toplanır.
+    Sınırlar dönem başına/sonuna denk gelmiyorsa (ör. duzey='ay' ile 2024-01-15..2024-02-10) dönem
+    tamamına yuvarlanmaz: izolatlar tam tarihlerle süzülür ve önbellek kullanılmadan hesaplanır.
+    """
+    vt = vt or db()
+    if not (_donem_sinirinda(baslangic, duzey, False) and _donem_sinirinda(bitis, duzey, True)):
+        return _tam_aralik(baslangic, bitis, servis, duzey, servis_bazinda, donem_bazinda, vt)
+    onbellegi_guncelle(duzey, baslangic, bitis, vt)
+    n = DUZEYLER[duzey]
+    kosul, params = ["duzey = ?", "donem >= ?", "donem < ?"], [duzey, (baslangic or "")[:n], (bitis or "~")[:n] + "~"]
+    if servis is not None:
+        kosul.append("servis = ?"); params.append(servis)
+    grup = ["isim", "antibiyotik"]
+    grup.append("servis" if servis_bazinda else "NULL")
+    grup.append("donem" if donem_bazinda else "NULL")
+    anahtar = ", ".join(g for g in grup if g != "NULL")
+    rows = vt.sorgu(f"""
+        SELECT isim, antibiyotik, SUM(test), SUM(duyarli), SUM(orta), SUM(direncli), {grup[2]}, {grup[3]}
+        FROM surveyans_onbellek WHERE {" AND ".join(kosul)}
+        GROUP BY {anahtar} ORDER BY {anahtar}
+    """, params)
+    return [Hucre(*r) for r in rows]
+
+def _tam_aralik(baslangic: Optional[str], bitis: Optional[str], servis: Optional[str], duzey: str,
+                servis_bazinda: bool, donem_bazinda: bool, vt: Veritabani) -> List[Hucre]:
+    # Her dönemin aralıkla kesişen kısmı doğrudan tablolardan; gruplama kumulatif_antibiyogram ile aynı
+    alt, ust = baslangic or "", (bitis + "~") if bitis else "~"
+    toplam: Dict[tuple, List[int]] = {}
+    with vt.islem(yazma=False) as cur:
+        for d in _donemler(cur, duzey, baslangic, bitis):
+            bas, son = _aralik(d)
+            for srv, isim, ab, *sayilar in cur.execute(
+                    _ILK_IZOLATLAR, (max(bas, alt), min(son, ust), *SONUCLAR, *SONUCLAR)):
+                if servis is not None and srv != servis:
+                    continue
+                anahtar = (isim, ab, srv if servis_bazinda else None, d if donem_bazinda else None)
+                t = toplam.setdefault(anahtar, [0, 0, 0, 0])
+                for i, v in enumerate(sayilar):
+                    t[i] += v
+    return [Hucre(isim, ab, *t, servis=srv, donem=d)
+            for (isim, ab, srv, d), t in sorted(toplam.items(), key=lambda x: tuple(k or "" for k in x[0]))]
@@ -0,0 +1,25 @@
+"""Veritabanı gerilemeleri: sıcak sorgu planları ve çok süreçli yazma."""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import komut_satiri
+import veritabani
+
+@pytest.fixture
+def vt(tmp_path):
+    v = veritabani.ayarla(str(tmp_path / "test.db"))
+    veritabani.veritabani_olustur(v)
+    yield v
+    v.kapat()
+
+def test_sicak_sorgular_tarama_yapmaz(vt):
+    assert veritabani.tarama_yapan_sorgular(vt) == []
+
+def test_stres_iki_surec(tmp_path, vt):
+    args = argparse.Namespace(dosya=str(tmp_path / "test.db"), profil=None, surec=2, adet=20)
+    assert komut_satiri._stres(args) == 0
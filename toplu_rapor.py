@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import veritabani
+from rapor import rapor_html, rapor_verisi_yukle, varsayilan_dosya_adi
+from veritabani import Veritabani, db
+
+# Bu sayının altındaki işlerde süreç havuzu açmak (her süreçte Qt yüklemek) kazandırmaz
+HAVUZ_ESIGI = 40
+
+Sonuc = Tuple[int, Optional[str], Optional[str]]  # (hasta_id, pdf yolu, hata)
+
+# ------------------ Hasta seçimi ------------------
+def hasta_idleri(servis: str = None, baslangic: str = None, bitis: str = None,
+                 vt: Veritabani = None) -> List[int]:
+    """Servise ve/veya [baslangic, bitis] (ISO 'yyyy-MM-dd') aralığında kaydı olan hastalar."""
+    vt = vt or db()
+    kosullar, params = [], []
+    if servis:
+        kosullar.append("h.servis = ?"); params.append(servis)
+    if baslangic or bitis:
+        bas, bit = baslangic or "0000-01-01", bitis or "9999-12-31"
+        # Tarihler ISO saklanır (göç 3); created_at saat içerdiği için üst sınır günün sonuna uzatılır
+        kosullar.append("""h.id IN (
+            SELECT hasta_id FROM bakteri WHERE ureme_tarihi BETWEEN ? AND ?
+            UNION SELECT hasta_id FROM ilac WHERE bitis >= ? AND baslangic <= ?
+            UNION SELECT hasta_id FROM lab WHERE created_at BETWEEN ? AND ?
+            UNION SELECT hasta_id FROM anket_surum WHERE created_at BETWEEN ? AND ?
+        )""")
+        params += [bas, bit, bas, bit, bas, bit + "T99", bas, bit + "T99"]
+    where = " WHERE " + " AND ".join(kosullar) if kosullar else ""
+    return [r[0] for r in vt.sorgu(f"SELECT h.id FROM hasta h{where} ORDER BY h.id", params)]
+
+# ------------------ PDF çizimi ------------------
+_qt_app = None
+
+def _qt_hazirla():
+    """QTextDocument/QPrinter için QGuiApplication gerekir; yoksa ekransız (offscreen) açılır."""
+    global _qt_app
+    from PyQt5.QtGui import QGuiApplication
+    if QGuiApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        _qt_app = QGuiApplication([])
+
+class PdfCizici:
+    """Tek QTextDocument + QPrinter; her rapor için yalnızca HTML ve çıktı dosyası değişir."""
+    def __init__(self):
+        _qt_hazirla()
+        from PyQt5.QtGui import QTextDocument
+        from PyQt5.QtPrintSupport import QPrinter
+        self.doc = QTextDocument()
+        self.printer = QPrinter(QPrinter.HighResolution)
+        self.printer.setOutputFormat(QPrinter.PdfFormat)
+
+    def ciz(self, html_str: str, yol: str):
+        self.doc.setHtml(html_str)
+        self.printer.setOutputFileName(yol)
+        self.doc.print_(self.printer)
+
+    def hasta_pdf(self, hasta_id: int, klasor: str) -> Sonuc:
+        try:
+            rapor = rapor_verisi_yukle(hasta_id)
+            if rapor is None:
+                return hasta_id, None, "Hasta bulunamadı"
+            yol = os.path.join(klasor, f"{hasta_id}_{varsayilan_dosya_adi(rapor)}")
+            self.ciz(rapor_html(rapor), yol)
+            return hasta_id, yol, None
+        except Exception as e:
+            return hasta_id, None, str(e)
+
+# --- süreç havuzu işçileri ---
+_isci_cizici: Optional[PdfCizici] = None
+
+def _isci_baslat(db_yolu: str):
+    global _isci_cizici
+    veritabani.ayarla(db_yolu)
+    _isci_cizici = PdfCizici()
+
+def _isci_pdf(hasta_id: int, klasor: str) -> Sonuc:
+    return _isci_cizici.hasta_pdf(hasta_id, klasor)
+
+# ------------------ Toplu dışa aktarım ------------------
+def toplu_pdf(hasta_idleri: List[int], klasor: str, isci_sayisi: int = None,
+              ilerleme: Callable[[int, int], bool] = None) -> List[Sonuc]:
+    """Her hasta için klasor içine PDF üretir.
+
+    ilerleme(biten, toplam) her rapordan sonra çağrılır; False dönerse kalan işler iptal edilir.
+    Büyük işler süreç havuzunda (her işçide tek QTextDocument/QPrinter) çizilir.
+    """
+    os.makedirs(klasor, exist_ok=True)
+    toplam = len(hasta_idleri)
+    if isci_sayisi is None:
+        isci_sayisi = min(os.cpu_count() or 1, 8) if toplam >= HAVUZ_ESIGI else 1
+    sonuclar: List[Sonuc] = []
+
+    if isci_sayisi <= 1:
+        cizici = PdfCizici()
+        for hid in hasta_idleri:
+            sonuclar.append(cizici.hasta_pdf(hid, klasor))
+            if ilerleme and ilerleme(len(sonuclar), toplam) is False:
+                break
+        return sonuclar
+
+    with ProcessPoolExecutor(max_workers=isci_sayisi, initializer=_isci_baslat,
+                             initargs=(db().yol,)) as havuz:
+        isler = [havuz.submit(_isci_pdf, hid, klasor) for hid in hasta_idleri]
+        for f in as_completed(isler):
+            sonuclar.append(f.result())
+            if ilerleme and ilerleme(len(sonuclar), toplam) is False:
+                for x in isler: x.cancel()
+                break
+    return sonuclar
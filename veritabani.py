@@ -0,0 +1,699 @@
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+import anket_semasi
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "hastatakip.db")
+TABLOLAR = ("hasta", "bakteri", "antibiyogram", "ilac", "lab", "anket", "anket_surum", "anket_fark")
+
+# ------------------ Türkçe katlama ------------------
+# SQLite LOWER() yalnızca ASCII harfleri küçültür; İ/ı/Ş/Ğ... olduğu gibi kalır.
+_TR_KATLA = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s", "Ğ": "g", "ğ": "g",
+    "Ç": "c", "ç": "c", "Ö": "o", "ö": "o", "Ü": "u", "ü": "u",
+})
+
+def tr_katla(s) -> str:
+    """Arama için büyük/küçük harf ve aksan farklarını siler: 'İŞÇİ' -> 'isci'."""
+    if s is None:
+        return ""
+    s = str(s).translate(_TR_KATLA).lower()
+    if s.isascii():
+        return s
+    return "".join(ch for ch in unicodedata.normalize("NFKD", s) if not unicodedata.combining(ch))
+
+def fts_sorgusu(q: str) -> str:
+    """Kullanıcı metnini FTS5 MATCH ifadesine çevirir: her kelime önek olarak, hepsi birlikte."""
+    kelimeler = [k.replace('"', "") for k in tr_katla(q).split()]
+    return " ".join(f'"{k}"*' for k in kelimeler if k)
+
+def _fts5_var(cur) -> bool:
+    return bool(cur.execute(
+        "SELECT 1 FROM pragma_compile_options WHERE compile_options='ENABLE_FTS5'").fetchone())
+
+# ------------------ Depolama profilleri ------------------
+# yerel: WAL ile okuyucular yazanı beklemez. WAL paylaşımlı bellek kullandığı için
+# ağ paylaşımında (SMB/NFS) güvenli DEĞİLDİR; orada klasik günlük + uzun bekleme kullanılır.
+DEPOLAMA_PROFILLERI: Dict[str, Dict[str, object]] = {
+    "yerel": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -32000,
+        "mmap_size": 256 * 1024 * 1024, "temp_store": "MEMORY", "busy_timeout": 5000,
+    },
+    "ag": {
+        "journal_mode": "DELETE", "synchronous": "FULL", "cache_size": -32000,
+        "mmap_size": 0, "temp_store": "MEMORY", "busy_timeout": 20000,
+    },
+}
+KILIT_DENEME = 6          # busy_timeout sonrası ek deneme sayısı
+KILIT_BEKLEME = 0.05      # ilk bekleme (sn); her denemede iki katına çıkar
+
+def ag_yolu_mu(yol: str) -> bool:
+    yol = os.path.abspath(yol)
+    if yol.startswith("\\\\") or yol.startswith("//"):
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        kok = os.path.splitdrive(yol)[0] + "\\"
+        return ctypes.windll.kernel32.GetDriveTypeW(kok) == 4  # DRIVE_REMOTE
+    return False
+
+def _istenen_profil(profil: str = None) -> str:
+    return (profil or os.environ.get("ENFEKSIYON_DEPOLAMA") or "otomatik").lower()
+
+def profil_sec(yol: str, profil: str = None) -> str:
+    """profil / ENFEKSIYON_DEPOLAMA: 'yerel', 'ag' veya 'otomatik' (ağ sürücüsü algılanır)."""
+    profil = _istenen_profil(profil)
+    if profil in DEPOLAMA_PROFILLERI:
+        return profil
+    return "ag" if ag_yolu_mu(yol) else "yerel"
+
+def _kilitli_mi(e: Exception) -> bool:
+    m = str(e).lower()
+    return isinstance(e, sqlite3.OperationalError) and ("locked" in m or "busy" in m)
+
+T = TypeVar("T")
+
+def kilitte_tekrar_dene(fn: Callable[[], T]) -> T:
+    """'database is locked' hatasında üstel geri çekilmeyle yeniden dener."""
+    bekle = KILIT_BEKLEME
+    for deneme in range(KILIT_DENEME + 1):
+        try:
+            return fn()
+        except sqlite3.OperationalError as e:
+            if not _kilitli_mi(e) or deneme == KILIT_DENEME:
+                raise
+            time.sleep(bekle * (1 + random.random()))
+            bekle *= 2
+
+# ------------------ Bağlantı katmanı ------------------
+def _fabrika(tip):
+    # row_factory: satır tuple'ını doğrudan kayda çevirir (sütun eşlemesi tipin alan sırasıdır)
+    f = _fabrikalar.get(tip)
+    if f is None:
+        yap = tip._make
+        f = _fabrikalar[tip] = lambda cur, row: yap(row)
+    return f
+
+_fabrikalar = {}
+
+class Veritabani:
+    """hastatakip.db için uzun ömürlü bağlantı sahibi.
+
+    Her iş parçacığı kendi bağlantısını bir kez açar ve tekrar kullanır
+    (sqlite3 bağlantıları iş parçacıkları arasında paylaşılamaz). Hazır ifade
+    önbelleği ve PRAGMA table_info sonuçları bağlantı ömrü boyunca saklanır.
+    """
+
+    def __init__(self, yol: str = None, cached_statements: int = 256, profil: str = None):
+        self.yol = yol or DB_PATH
+        self.cached_statements = cached_statements
+        # Profil yoldan seçilir (UNC / ağ sürücüsü -> ag); profil_etiketi etkin hali gösterir
+        self.istenen = _istenen_profil(profil)
+        self.profil = profil_sec(self.yol, profil)
+        self.klasik_gunluk = False  # yerel profil ama dosya WAL'a çevrilmedi (aşağıya bakın)
+        self._yerel = threading.local()
+        self._kilit = threading.Lock()
+        self._baglantilar: List[sqlite3.Connection] = []
+        self._sutunlar = {}
+        self._tipler = {}
+        # Yazan bir islem() commit edildikten sonra (yazan iş parçacığında) çağrılır; bildirim.DegisiklikYolu
+        self.yazma_sonrasi: List[Callable[[], None]] = []
+
+    def baglanti(self) -> sqlite3.Connection:
+        conn = getattr(self._yerel, "conn", None)
+        if conn is None:
+            # isolation_level=None: okumalar açık işlem bırakmaz, yazmalar islem() ile yapılır.
+            # check_same_thread=False yalnızca kapat()'ın her bağlantıyı kapatabilmesi için; bağlantıyı
+            # yine yalnızca açan iş parçacığı kullanır.
+            conn = sqlite3.connect(self.yol, isolation_level=None, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+            conn.create_function("tr_katla", 1, tr_katla, deterministic=True)
+            self._pragmalari_uygula(conn)
+            self._yerel.conn = conn
+            self._yerel.derinlik = 0
+            with self._kilit:
+                self._baglantilar.append(conn)
+        return conn
+
+    @property
+    def profil_etiketi(self) -> str:
+        """Etkin profil, ör. 'otomatik→yerel', 'otomatik→yerel (klasik günlük)', 'ag'."""
+        etiket = self.profil if self.istenen in DEPOLAMA_PROFILLERI else f"otomatik→{self.profil}"
+        return etiket + (" (klasik günlük)" if self.klasik_gunluk else "")
+
+    def _pragmalari_uygula(self, conn: sqlite3.Connection):
+        mevcut = conn.execute("PRAGMA journal_mode").fetchone()[0].upper()
+        ayar = dict(DEPOLAMA_PROFILLERI[self.profil])
+        yeni_dosya = conn.execute("PRAGMA page_count").fetchone()[0] == 0
+        if ayar["journal_mode"] == "WAL" and mevcut != "WAL" and not yeni_dosya and self.istenen != "yerel":
+            # journal_mode dosyaya yazılır ve paylaşımı kullanan herkesi etkiler; algılama yanılabilir
+            # (Windows dışı bağlama, DFS, tanınmayan eşlenmiş sürücü). Var olan klasik günlüklü dosya
+            # yalnızca açıkça 'yerel' istenince WAL'a çevrilir; o zamana kadar klasik günlükte FULL.
+            ayar.update(journal_mode=mevcut, synchronous="FULL")
+            self.klasik_gunluk = True
+        conn.execute(f"PRAGMA busy_timeout={int(ayar['busy_timeout'])}")
+        if mevcut != ayar["journal_mode"]:
+            try:
+                # journal_mode dosyaya yazılır; başka bağlantı açıkken değişmeyebilir, sorun değil
+                kilitte_tekrar_dene(lambda: conn.execute(f"PRAGMA journal_mode={ayar['journal_mode']}").fetchone())
+            except sqlite3.OperationalError:
+                pass
+        for ad in ("synchronous", "cache_size", "mmap_size", "temp_store"):
+            conn.execute(f"PRAGMA {ad}={ayar[ad]}")
+
+    # --- Okuma ---
+    def _imlec(self, sql: str, params, tip):
+        cur = self.baglanti().cursor()
+        if tip is not None:
+            cur.row_factory = _fabrika(tip)
+        return cur.execute(sql, params)
+
+    def sorgu(self, sql: str, params=(), tip=None) -> List[tuple]:
+        """tip verilirse (kayitlar.Hasta, kayit_tipi('lab') ...) satırlar o kayıt olarak döner."""
+        return kilitte_tekrar_dene(lambda: self._imlec(sql, params, tip).fetchall())
+
+    def tek(self, sql: str, params=(), tip=None) -> Optional[tuple]:
+        return kilitte_tekrar_dene(lambda: self._imlec(sql, params, tip).fetchone())
+
+    def sutunlar(self, tablo: str) -> Tuple[str, ...]:
+        cols = self._sutunlar.get(tablo)
+        if cols is None:
+            cols = tuple(r[1] for r in self.baglanti().execute(f"PRAGMA table_info({tablo})"))
+            self._sutunlar[tablo] = cols
+        return cols
+
+    def kayit_tipi(self, tablo: str):
+        """tablo sütunlarıyla üretilmiş namedtuple; şema değişene kadar aynı tip kullanılır."""
+        cols = self.sutunlar(tablo)
+        tip = self._tipler.get(tablo)
+        if tip is None or tip._fields != cols:
+            tip = namedtuple(tablo.capitalize(), cols)
+            self._tipler[tablo] = tip
+        return tip
+
+    def tablo_var(self, tablo: str) -> bool:
+        return bool(self.sutunlar(tablo))
+
+    def hasta_fts_var(self) -> bool:
+        return self.tablo_var("hasta_fts")
+
+    def sema_degisti(self):
+        # ALTER TABLE / CREATE sonrası çağrılır
+        self._sutunlar.clear()
+
+    # --- Yazma ---
+    @contextmanager
+    def islem(self, yazma: bool = True) -> Iterator[sqlite3.Cursor]:
+        """BEGIN ... COMMIT; hata olursa ROLLBACK. İç içe çağrılar dıştaki işleme katılır.
+
+        yazma=True: BEGIN IMMEDIATE ile yazma kilidi baştan alınır (kilitliyse beklenir/tekrar denenir);
+        yazma=False: yalnızca tutarlı okuma için ertelenmiş işlem.
+        """
+        conn = self.baglanti()
+        cur = conn.cursor()
+        if self._yerel.derinlik == 0:
+            basla = "BEGIN IMMEDIATE" if yazma else "BEGIN"
+            kilitte_tekrar_dene(lambda: cur.execute(basla))
+            self._yerel.yazma = yazma
+        self._yerel.derinlik += 1
+        try:
+            yield cur
+        except BaseException:
+            self._yerel.derinlik -= 1
+            if self._yerel.derinlik == 0:
+                conn.rollback()
+            raise
+        else:
+            self._yerel.derinlik -= 1
+            if self._yerel.derinlik == 0:
+                try:
+                    kilitte_tekrar_dene(conn.commit)
+                except BaseException:
+                    # Denemeler tükendiyse işlem açık kalmasın (bağlantı ve diğer istemciler kilitlenir)
+                    conn.rollback()
+                    raise
+                if self._yerel.yazma:
+                    for f in list(self.yazma_sonrasi): f()
+
+    def calistir(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self.islem() as cur:
+            cur.execute(sql, params)
+            return cur
+
+    def kapat(self):
+        """Tüm iş parçacıklarının bağlantılarını kapatır; arka plan işleri bitmişken çağrılmalıdır."""
+        with self._kilit:
+            for conn in self._baglantilar:
+                try: conn.close()
+                except sqlite3.Error: pass
+            self._baglantilar.clear()
+        self._yerel = threading.local()
+        self._sutunlar.clear()
+
+_vt: Optional[Veritabani] = None
+_vt_kilit = threading.Lock()
+
+def db() -> Veritabani:
+    global _vt
+    if _vt is None:
+        with _vt_kilit:
+            if _vt is None:
+                _vt = Veritabani(DB_PATH)
+    return _vt
+
+def ayarla(yol: str, profil: str = None) -> Veritabani:
+    """Varsayılan veritabanını başka bir dosyaya/profile yönlendirir (ör. test/CLI)."""
+    global _vt, DB_PATH
+    with _vt_kilit:
+        if _vt is not None:
+            _vt.kapat()
+        DB_PATH = yol
+        _vt = Veritabani(yol, profil=profil)
+    return _vt
+
+# ------------------ Şema ------------------
+def _ensure_columns(cur, table, cols: List[Tuple[str, str]]):
+    cur.execute(f"PRAGMA table_info({table})")
+    mevcut = {r[1] for r in cur.fetchall()}
+    for ad, tip in cols:
+        if ad not in mevcut:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {ad} {tip}")
+
+def veritabani_olustur(vt: Veritabani = None):
+    vt = vt or db()
+    with vt.islem() as cur:
+        # hasta
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS hasta(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tc TEXT UNIQUE,
+                ad TEXT,
+                soyad TEXT,
+                dogum TEXT,
+                servis TEXT
+            )
+        """)
+
+        # bakteri
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS bakteri(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kultur_ornegi TEXT,
+                isim TEXT,
+                ureme_tarihi TEXT,
+                hasta_id INTEGER,
+                FOREIGN KEY(hasta_id) REFERENCES hasta(id)
+            )
+        """)
+        _ensure_columns(cur, "bakteri", [("kultur_ornegi", "TEXT")])
+
+        # antibiyogram
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS antibiyogram(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                antibiyotik TEXT,
+                sonuc TEXT,
+                bakteri_id INTEGER,
+                FOREIGN KEY(bakteri_id) REFERENCES bakteri(id)
+            )
+        """)
+
+        # ilac
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS ilac(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ilac TEXT,
+                baslangic TEXT,
+                bitis TEXT,
+                dozaj TEXT,
+                hasta_id INTEGER,
+                FOREIGN KEY(hasta_id) REFERENCES hasta(id)
+            )
+        """)
+
+        # laboratuvar
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS lab(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                hasta_id INTEGER,
+                created_at TEXT,
+                ppd TEXT,
+                crp REAL, lokosit REAL, lenfosit REAL, notrofil REAL, pct REAL,
+                glukoz REAL, na REAL, cl REAL, p REAL, mg REAL,
+                ast REAL, alt REAL, ggt REAL, alp REAL,
+                tbil REAL, dbil REAL, albumin REAL,
+                kreatinin REAL, bun REAL, egfrt REAL,
+                FOREIGN KEY(hasta_id) REFERENCES hasta(id)
+            )
+        """)
+
+        # anket
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS anket(
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                hasta_id INTEGER,
+                created_at TEXT
+            )
+        """)
+
+        _ensure_columns(cur, "anket", anket_semasi.sutun_tanimlari())
+        _gocleri_uygula(cur)
+        cur.execute("DELETE FROM degisiklik WHERE id <= (SELECT MAX(id) FROM degisiklik) - ?", (DEGISIKLIK_SAKLAMA,))
+    vt.sema_degisti()
+
+# ------------------ Göçler (PRAGMA user_version) ------------------
+# ISO tarih sütunları: 3. göç mevcut 'dd-MM-yyyy' değerleri çevirir; tetikleyiciler bundan sonraki
+# yazmalarda (eski sürüm istemciler, dış araçlar) aynı dönüşümü saf SQL ile uygular. Böylece sürveyans
+# aralıkları, pano sayaçları, toplu rapor ve içe aktarma eşlemesi eski biçimli satırları atlamaz.
+ISO_TARIH_SUTUNLARI = (("hasta", "dogum"), ("bakteri", "ureme_tarihi"), ("ilac", "baslangic"), ("ilac", "bitis"))
+_GUN_AY_YIL = "[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]"
+_ISO = "substr({0},7,4)||'-'||substr({0},4,2)||'-'||substr({0},1,2)"
+
+def _iso_ifade(x: str) -> str:
+    """x'in ISO hali (SQL): sayaç tetikleyicileri değeri bu haliyle sayar. Eski biçimli satır önce
+    olduğu gibi eklenip ardından iso_* tetikleyicisiyle güncellendiğinde, tetikleyicilerin hangi
+    sırayla çalıştığından bağımsız olarak sayaçlar tutarlı kalır."""
+    return f"CASE WHEN {x} GLOB '{_GUN_AY_YIL}' THEN {_ISO.format(x)} ELSE {x} END"
+
+
+# FTS'e yazılan katlanmış metin saf SQL ile üretilir: tetikleyiciler uygulamanın kaydettiği tr_katla
+# fonksiyonuna dayanırsa başka yazanlar (eski exe, sqlite3 kabuğu, bakım betikleri) hastaya yazamaz.
+# Büyük/küçük harf ve ş/ç/ğ/ö/ü aksanlarını unicode61 (remove_diacritics 2) katlar; yalnızca onun
+# i'ye indirmediği İ ve ı burada değiştirilir. Sonuç sorgu tarafındaki tr_katla ile aynı terimlerdir.
+_FTS_KATLA = "replace(replace({0}, 'İ', 'i'), 'ı', 'i')"
+
+def _hasta_fts_olustur(cur):
+    # Katlanmış tc/ad/soyad/servis için içeriksiz FTS5 gölge indeksi; tetikleyicilerle güncel tutulur.
+    # Yeniden çalıştırılabilir: eski (tr_katla'lı) tetikleyiciler ve indeks yenisiyle değiştirilir.
+    if not _fts5_var(cur):
+        return  # FTS5 yoksa arama LIKE + tr_katla ile yapılır
+    for t in ("hasta_fts_ai", "hasta_fts_ad", "hasta_fts_au"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {t}")
+    cur.execute("DROP TABLE IF EXISTS hasta_fts")
+    cur.execute("""
+        CREATE VIRTUAL TABLE hasta_fts USING fts5(
+            tc, ad, soyad, servis,
+            content='', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )
+    """)
+    katli = ", ".join(_FTS_KATLA.format(f"{{0}}.{c}") for c in ("tc", "ad", "soyad", "servis"))
+    cur.execute(f"""
+        CREATE TRIGGER hasta_fts_ai AFTER INSERT ON hasta BEGIN
+            INSERT INTO hasta_fts(rowid, tc, ad, soyad, servis) VALUES (new.id, {katli.format("new")});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER hasta_fts_ad AFTER DELETE ON hasta BEGIN
+            INSERT INTO hasta_fts(hasta_fts, rowid, tc, ad, soyad, servis)
+            VALUES ('delete', old.id, {katli.format("old")});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER hasta_fts_au AFTER UPDATE OF tc, ad, soyad, servis ON hasta BEGIN
+            INSERT INTO hasta_fts(hasta_fts, rowid, tc, ad, soyad, servis)
+            VALUES ('delete', old.id, {katli.format("old")});
+            INSERT INTO hasta_fts(rowid, tc, ad, soyad, servis) VALUES (new.id, {katli.format("new")});
+        END
+    """)
+    cur.execute(f"INSERT INTO hasta_fts(rowid, tc, ad, soyad, servis) SELECT id, {katli.format('hasta')} FROM hasta")
+
+def _surveyans_olustur(cur):
+    # Kümülatif antibiyogram önbelleği (surveyans.py). surveyans_ay her kültür ayı için bir sürüm
+    # sayacı tutar; tetikleyiciler ilgili ayı artırır, önbellek yalnızca sayacı değişen dönemler için
+    # yeniden hesaplanır.
+    cur.execute("CREATE TABLE IF NOT EXISTS surveyans_ay (ay TEXT PRIMARY KEY, surum INTEGER NOT NULL)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS surveyans_donem (
+            duzey TEXT, donem TEXT, imza INTEGER, PRIMARY KEY (duzey, donem)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS surveyans_onbellek (
+            duzey TEXT, donem TEXT, servis TEXT, isim TEXT, antibiyotik TEXT,
+            test INTEGER, duyarli INTEGER, orta INTEGER, direncli INTEGER
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_surveyans_onbellek ON surveyans_onbellek(duzey, donem)")
+    ay = "COALESCE(substr(" + _iso_ifade("{0}") + ",1,7),'')"
+    artir = "ON CONFLICT(ay) DO UPDATE SET surum = surum + 1"
+    tetikleyiciler = {
+        "sv_bakteri_ai": f"AFTER INSERT ON bakteri BEGIN "
+                         f"INSERT INTO surveyans_ay VALUES ({ay.format('new.ureme_tarihi')}, 1) {artir}; END",
+        "sv_bakteri_ad": f"AFTER DELETE ON bakteri BEGIN "
+                         f"INSERT INTO surveyans_ay VALUES ({ay.format('old.ureme_tarihi')}, 1) {artir}; END",
+        "sv_bakteri_au": f"AFTER UPDATE OF hasta_id, isim, ureme_tarihi ON bakteri BEGIN "
+                         f"INSERT INTO surveyans_ay VALUES ({ay.format('old.ureme_tarihi')}, 1) {artir}; "
+                         f"INSERT INTO surveyans_ay VALUES ({ay.format('new.ureme_tarihi')}, 1) {artir}; END",
+    }
+    bakteri_ayi = ("INSERT INTO surveyans_ay SELECT " + ay.format("ureme_tarihi") +
+                   ", 1 FROM bakteri WHERE id = {0}.bakteri_id " + artir + ";")
+    tetikleyiciler.update({
+        "sv_antibiyogram_ai": f"AFTER INSERT ON antibiyogram BEGIN {bakteri_ayi.format('new')} END",
+        "sv_antibiyogram_ad": f"AFTER DELETE ON antibiyogram BEGIN {bakteri_ayi.format('old')} END",
+        "sv_antibiyogram_au": f"AFTER UPDATE OF bakteri_id, antibiyotik, sonuc ON antibiyogram BEGIN "
+                              f"{bakteri_ayi.format('old')} {bakteri_ayi.format('new')} END",
+        # Gruplama hastanın servisine göre yapılır
+        "sv_hasta_au": "AFTER UPDATE OF servis ON hasta WHEN old.servis IS NOT new.servis BEGIN "
+                       "INSERT INTO surveyans_ay SELECT DISTINCT " + ay.format("ureme_tarihi") +
+                       ", 1 FROM bakteri WHERE hasta_id = new.id " + artir + "; END",
+    })
+    for ad, govde in tetikleyiciler.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {ad} {govde}")
+    cur.execute(f"INSERT OR IGNORE INTO surveyans_ay SELECT DISTINCT {ay.format('ureme_tarihi')}, 1 FROM bakteri")
+
+# Pano sayaçları: (anahtar, tablo, değer ifadesi, koşul); {0} yerine new/old/tablo adı gelir.
+# ozet_sayac(anahtar, deger) satırı, koşulu sağlayan ve değeri deger olan satır sayısıdır.
+_ILAC_SIRALI = f"{_iso_ifade('{0}.baslangic')} <= {_iso_ifade('{0}.bitis')}"
+OZET_SAYACLARI: List[Tuple[str, str, str, str]] = [
+    ("servis", "hasta", "COALESCE({0}.servis, '')", "1"),
+    ("kultur_gun", "bakteri", f"substr({_iso_ifade('{0}.ureme_tarihi')}, 1, 10)", "{0}.ureme_tarihi IS NOT NULL"),
+    # Aktif tedavi = bitisi bugün/sonra olanlar - henüz başlamamışlar (pano.pano_ozeti)
+    ("ilac_bitis", "ilac", f"substr({_iso_ifade('{0}.bitis')}, 1, 10)", _ILAC_SIRALI),
+    ("ilac_baslangic", "ilac", f"substr({_iso_ifade('{0}.baslangic')}, 1, 10)", _ILAC_SIRALI),
+]
+_OZET_SUTUNLARI = {"hasta": "servis", "bakteri": "ureme_tarihi", "ilac": "baslangic, bitis"}
+
+def _ozet_sayaclari_olustur(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ozet_sayac (
+            anahtar TEXT, deger TEXT, adet INTEGER NOT NULL, PRIMARY KEY (anahtar, deger)
+        )
+    """)
+    def artir(a, deger, kosul):
+        return (f"INSERT INTO ozet_sayac(anahtar, deger, adet) SELECT '{a}', {deger}, 1 WHERE {kosul} "
+                f"ON CONFLICT(anahtar, deger) DO UPDATE SET adet = adet + 1;")
+    def azalt(a, deger, kosul):
+        return f"UPDATE ozet_sayac SET adet = adet - 1 WHERE anahtar = '{a}' AND deger = {deger} AND {kosul};"
+    for tablo, sutunlar in _OZET_SUTUNLARI.items():
+        sayaclar = [(a, d, k) for a, t, d, k in OZET_SAYACLARI if t == tablo]
+        yeni = " ".join(artir(a, d.format("new"), k.format("new")) for a, d, k in sayaclar)
+        eski = " ".join(azalt(a, d.format("old"), k.format("old")) for a, d, k in sayaclar)
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS ozet_{tablo}_ai AFTER INSERT ON {tablo} BEGIN {yeni} END")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS ozet_{tablo}_ad AFTER DELETE ON {tablo} BEGIN {eski} END")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS ozet_{tablo}_au AFTER UPDATE OF {sutunlar} ON {tablo} "
+                    f"BEGIN {eski} {yeni} END")
+    for a, tablo, deger, kosul in OZET_SAYACLARI:
+        cur.execute(f"INSERT OR REPLACE INTO ozet_sayac SELECT '{a}', {deger.format(tablo)}, COUNT(*) "
+                    f"FROM {tablo} WHERE {kosul.format(tablo)} GROUP BY 2")
+
+def _anket_gecmisi_olustur(cur):
+    # anket'te hasta başına yalnızca son hal kalır; her kayıt bir sürümdür ve değişen alanların
+    # önceki değerleri anket_fark'ta saklanır (anket_gecmisi.py).
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS anket_surum (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, hasta_id INTEGER, no INTEGER, created_at TEXT,
+            UNIQUE (hasta_id, no), FOREIGN KEY(hasta_id) REFERENCES hasta(id)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS anket_fark (
+            id INTEGER PRIMARY KEY, surum_id INTEGER, sutun TEXT, deger,
+            FOREIGN KEY(surum_id) REFERENCES anket_surum(id)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_anket_fark_surum ON anket_fark(surum_id)")
+    # Eski tam kopyalar: hastanın satırları sırayla sürüm olur, ardışık satırların farkı yazılır
+    sutunlar = anket_semasi.SUTUNLAR
+    oku = cur.connection.cursor()
+    hasta, onceki, no = object(), None, 0
+    for r in oku.execute(f"SELECT hasta_id, created_at, {', '.join(sutunlar)} FROM anket ORDER BY hasta_id, id"):
+        if r[0] != hasta:
+            hasta, onceki, no = r[0], None, 0
+        no += 1
+        sid = cur.execute("INSERT INTO anket_surum(hasta_id, no, created_at) VALUES (?,?,?)",
+                          (r[0], no, r[1])).lastrowid
+        if onceki is not None:
+            cur.executemany("INSERT INTO anket_fark(surum_id, sutun, deger) VALUES (?,?,?)",
+                            [(sid, c, e) for c, e, y in zip(sutunlar, onceki, r[2:]) if e != y])
+        onceki = r[2:]
+    cur.execute("DELETE FROM anket WHERE id NOT IN (SELECT MAX(id) FROM anket GROUP BY hasta_id)")
+    _anket_tek_satir_kurali(cur)
+
+def _anket_tek_satir_kurali(cur):
+    # "Hasta başına tek satır" UNIQUE indeksle değil anket_gecmisi.kaydet'te sağlanır: eski sürüm
+    # istemciler anketi düz INSERT ile kaydeder ve paylaşımlı veritabanında hata almamalıdır;
+    # onların eklediği satırlar bir sonraki kayıtta sürüm olarak geçmişe katılır.
+    cur.execute("DROP INDEX IF EXISTS idx_anket_hasta")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_anket_hasta_son ON anket(hasta_id, id DESC)")
+    # Hastanın son anket satırı silinince (hasta silme) geçmişi de gider; birleştirmede silinen
+    # fazladan satırlar geçmişe dokunmaz
+    cur.execute("DROP TRIGGER IF EXISTS anket_gecmis_ad")
+    cur.execute("""
+        CREATE TRIGGER anket_gecmis_ad AFTER DELETE ON anket
+        WHEN NOT EXISTS (SELECT 1 FROM anket WHERE hasta_id = old.hasta_id) BEGIN
+            DELETE FROM anket_fark WHERE surum_id IN (SELECT id FROM anket_surum WHERE hasta_id = old.hasta_id);
+            DELETE FROM anket_surum WHERE hasta_id = old.hasta_id;
+        END
+    """)
+
+def _iso_tarih_tetikleyicileri(cur):
+    for t, c in ISO_TARIH_SUTUNLARI:
+        duzelt = f"UPDATE {t} SET {c} = {_ISO.format(c)} WHERE id = new.id;"
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS iso_{t}_{c}_ai AFTER INSERT ON {t} "
+                    f"WHEN new.{c} GLOB '{_GUN_AY_YIL}' BEGIN {duzelt} END")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS iso_{t}_{c}_au AFTER UPDATE OF {c} ON {t} "
+                    f"WHEN new.{c} GLOB '{_GUN_AY_YIL}' BEGIN {duzelt} END")
+        # 3. göçten sonra eski istemcilerin yazdıkları
+        cur.execute(f"UPDATE {t} SET {c} = {_ISO.format(c)} WHERE {c} GLOB '{_GUN_AY_YIL}'")
+    # Sayaç tetikleyicileri ISO'ya çevrilmiş değeri sayacak şekilde yeniden kurulur; eski biçimle
+    # birikmiş sayaç satırları atılıp sayaçlar baştan hesaplanır
+    for (ad,) in cur.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND "
+                             "(name GLOB 'sv_*' OR name GLOB 'ozet_*')").fetchall():
+        cur.execute(f"DROP TRIGGER {ad}")
+    cur.execute("DELETE FROM ozet_sayac")
+    _ozet_sayaclari_olustur(cur)
+    cur.execute("DELETE FROM surveyans_ay WHERE ay <> '' AND ay NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]'")
+    _surveyans_olustur(cur)
+
+# Değişiklik günlüğü: tablo -> (hasta_id, bakteri_id) ifadeleri; {0} yerine new/old gelir
+DEGISIKLIK_TABLOLARI: Dict[str, Tuple[str, str]] = {
+    "hasta": ("{0}.id", "NULL"),
+    "bakteri": ("{0}.hasta_id", "{0}.id"),
+    "antibiyogram": ("(SELECT hasta_id FROM bakteri WHERE id = {0}.bakteri_id)", "{0}.bakteri_id"),
+    "ilac": ("{0}.hasta_id", "NULL"),
+    "lab": ("{0}.hasta_id", "NULL"),
+    "anket": ("{0}.hasta_id", "NULL"),
+}
+DEGISIKLIK_SAKLAMA = 50_000  # açılışta günlükte bırakılan son satır sayısı
+
+def _degisiklik_gunlugu_olustur(cur):
+    # Her yazma bir satır bırakır; açık pencereler bunu bildirim.DegisiklikYolu üzerinden alır
+    # (başka süreçlerin yazmaları dahil) ve yalnızca etkilenen satırı günceller.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS degisiklik (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, varlik TEXT, kayit_id INTEGER, islem TEXT,
+            hasta_id INTEGER, bakteri_id INTEGER
+        )
+    """)
+    for tablo, (hasta, bakteri) in DEGISIKLIK_TABLOLARI.items():
+        for ad, olay, islem, satir in (("ai", "INSERT", "ekle", "new"), ("au", "UPDATE", "guncelle", "new"),
+                                       ("ad", "DELETE", "sil", "old")):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS degisiklik_{tablo}_{ad} AFTER {olay} ON {tablo} BEGIN
+                    INSERT INTO degisiklik(varlik, kayit_id, islem, hasta_id, bakteri_id)
+                    VALUES ('{tablo}', {satir}.id, '{islem}', {hasta.format(satir)}, {bakteri.format(satir)});
+                END
+            """)
+
+# Her sürüm bir kez uygulanır; yeni göç listenin sonuna eklenir.
+# Adımlar SQL metni ya da imleç alan bir fonksiyon olabilir.
+GOCLER: List[Tuple[int, List[Union[str, Callable]]]] = [
+    (1, [
+        "CREATE INDEX IF NOT EXISTS idx_bakteri_hasta ON bakteri(hasta_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_antibiyogram_bakteri ON antibiyogram(bakteri_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_ilac_hasta ON ilac(hasta_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_lab_hasta_son ON lab(hasta_id, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_anket_hasta_son ON anket(hasta_id, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_hasta_soyad_ad ON hasta(soyad, ad)",
+        "CREATE INDEX IF NOT EXISTS idx_hasta_servis ON hasta(servis)",
+        "ANALYZE",
+    ]),
+    (2, [_hasta_fts_olustur]),
+    # 'dd-MM-yyyy' metin tarihleri ISO 'yyyy-MM-dd' yapılır: sıralama/aralık sorguları indeksle çalışır.
+    # Gösterim biçimi arayüzde (kayitlar.tarih_goster) uygulanır.
+    (3, [
+        *(f"UPDATE {t} SET {c} = {_ISO.format(c)} WHERE {c} GLOB '{_GUN_AY_YIL}'" for t, c in ISO_TARIH_SUTUNLARI),
+        "CREATE INDEX IF NOT EXISTS idx_bakteri_ureme ON bakteri(ureme_tarihi)",
+        "CREATE INDEX IF NOT EXISTS idx_ilac_bitis ON ilac(bitis, baslangic)",
+        "CREATE INDEX IF NOT EXISTS idx_ilac_baslangic ON ilac(baslangic)",
+        "CREATE INDEX IF NOT EXISTS idx_hasta_dogum ON hasta(dogum)",
+        "ANALYZE",
+    ]),
+    (4, [_surveyans_olustur]),
+    (5, [_ozet_sayaclari_olustur]),
+    # Lab trendi: hastanın ölçümleri zaman sırasıyla (lab_trend.lab_serileri)
+    (6, ["CREATE INDEX IF NOT EXISTS idx_lab_hasta_zaman ON lab(hasta_id, created_at)"]),
+    (7, [_anket_gecmisi_olustur]),
+    (8, [_degisiklik_gunlugu_olustur]),
+    # hasta_fts tetikleyicileri tr_katla yerine saf SQL katlama kullanır (diğer yazanlar için)
+    (9, [_hasta_fts_olustur]),
+    # 7'nin UNIQUE idx_anket_hasta'sı eski istemcilerin anket kaydını bozuyordu
+    (10, [_anket_tek_satir_kurali]),
+    # Eski istemcilerin yazdığı 'dd-MM-yyyy' tarihler de her yazmada ISO'ya çevrilir
+    (11, [_iso_tarih_tetikleyicileri]),
+]
+
+def sema_surumu(cur) -> int:
+    return cur.execute("PRAGMA user_version").fetchone()[0]
+
+def _gocleri_uygula(cur):
+    mevcut = sema_surumu(cur)
+    for surum, ifadeler in GOCLER:
+        if surum <= mevcut:
+            continue
+        for adim in ifadeler:
+            if callable(adim): adim(cur)
+            else: cur.execute(adim)
+        cur.execute(f"PRAGMA user_version={surum}")
+
+# ------------------ Sorgu planı denetimi ------------------
+# Uygulamanın sık çalıştırdığı sorgular; hiçbiri tam tablo taraması yapmamalı.
+SICAK_SORGULAR: List[Tuple[str, tuple]] = [
+    ("SELECT id, hasta_id, kultur_ornegi, isim, ureme_tarihi FROM bakteri WHERE hasta_id=? ORDER BY id", (1,)),
+    ("SELECT id, bakteri_id, antibiyotik, sonuc FROM antibiyogram WHERE bakteri_id=? ORDER BY id", (1,)),
+    ("SELECT a.id, a.bakteri_id, a.antibiyotik, a.sonuc FROM bakteri b JOIN antibiyogram a ON a.bakteri_id = b.id "
+     "WHERE b.hasta_id=? ORDER BY b.id, a.id", (1,)),
+    ("SELECT id, hasta_id, ilac, baslangic, bitis, dozaj FROM ilac WHERE hasta_id=? ORDER BY id", (1,)),
+    ("SELECT * FROM lab WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (1,)),
+    ("SELECT created_at, crp FROM lab WHERE hasta_id=? ORDER BY created_at, id", (1,)),
+    ("SELECT * FROM anket WHERE hasta_id=? ORDER BY id DESC LIMIT 1", (1,)),
+    # Anket geçmişi (anket_gecmisi)
+    ("SELECT s.no, f.sutun, f.deger FROM anket_surum s JOIN anket_fark f ON f.surum_id = s.id "
+     "WHERE s.hasta_id = ? AND s.no > ? ORDER BY s.no DESC", (1, 0)),
+    ("SELECT COALESCE(MAX(no), 0) + 1 FROM anket_surum WHERE hasta_id=?", (1,)),
+    ("SELECT COUNT(*), EXISTS(SELECT 1 FROM anket_surum WHERE hasta_id=?) FROM anket WHERE hasta_id=?", (1, 1)),
+    ("SELECT id FROM hasta WHERE tc=?", ("",)),
+    ("DELETE FROM antibiyogram WHERE bakteri_id IN (SELECT id FROM bakteri WHERE hasta_id=?)", (1,)),
+    ("DELETE FROM bakteri WHERE hasta_id=?", (1,)),
+    ("DELETE FROM ilac WHERE hasta_id=?", (1,)),
+    ("DELETE FROM anket WHERE hasta_id=?", (1,)),
+    ("DELETE FROM lab WHERE hasta_id=?", (1,)),
+    # Son 7 günün kültürleri / bugün aktif ilaçlar
+    ("SELECT id, hasta_id FROM bakteri WHERE ureme_tarihi >= ?", ("2024-01-01",)),
+    ("SELECT id, hasta_id FROM ilac WHERE bitis >= ? AND baslangic <= ?", ("2024-01-01", "2024-01-01")),
+    # Değişiklik bildirimi (bildirim.DegisiklikYolu.tara)
+    ("SELECT id, varlik, kayit_id, islem, hasta_id, bakteri_id FROM degisiklik WHERE id > ? ORDER BY id", (0,)),
+    # Kümülatif antibiyogram dönem imzası
+    ("SELECT SUM(surum) FROM surveyans_ay WHERE ay >= ? AND ay < ?", ("2024", "2024~")),
+]
+
+def tarama_yapan_sorgular(vt: Veritabani = None) -> List[Tuple[str, str]]:
+    """EXPLAIN QUERY PLAN ile SICAK_SORGULAR'ı denetler; tarama/geçici sıralama yapanları (sorgu, plan satırı) olarak döndürür."""
+    vt = vt or db()
+    hatali = []
+    for sql, params in SICAK_SORGULAR:
+        for r in vt.sorgu("EXPLAIN QUERY PLAN " + sql, params):
+            detay = r[-1]
+            if detay.startswith("SCAN ") or "TEMP B-TREE" in detay:
+                hatali.append((sql, detay))
+    return hatali